@@ -0,0 +1,19 @@
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.metrics import registry
+
+FRAGMENT_PREFIX = 'template.cache.'
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache, считающий попадания в кэш фрагментов шаблонов."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, default, version)
+        if key.startswith(FRAGMENT_PREFIX):
+            # Ключ тега {% cache %}: template.cache.<имя фрагмента>.<хэш>
+            fragment = key[len(FRAGMENT_PREFIX):].split('.', 1)[0]
+            registry.inc(
+                'yatube_cache_requests_total', cache=fragment,
+                result='miss' if value is default else 'hit')
+        return value
@@ -0,0 +1,67 @@
+import functools
+import threading
+from time import perf_counter
+
+from django.template.backends.django import Template
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL-запросы, рендеринг шаблонов, view."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.view_time = 0.0
+        self._rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка для connection.execute_wrapper().
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += perf_counter() - start
+
+    def server_timing(self):
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'view;dur={self.view_time * 1000:.1f}',
+        ))
+
+
+def current_metrics():
+    return getattr(_local, 'metrics', None)
+
+
+def set_current_metrics(metrics):
+    _local.metrics = metrics
+
+
+def _timed_render(render):
+    @functools.wraps(render)
+    def wrapper(self, context=None, request=None):
+        metrics = current_metrics()
+        # Вложенные шаблоны (виджеты форм, render_to_string внутри
+        # рендеринга) уже учтены во внешнем.
+        if metrics is None or metrics._rendering:
+            return render(self, context, request)
+        metrics._rendering = True
+        start = perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            metrics.template_time += perf_counter() - start
+            metrics._rendering = False
+    wrapper.timed = True
+    return wrapper
+
+
+def install_template_timing():
+    if not getattr(Template.render, 'timed', False):
+        Template.render = _timed_render(Template.render)
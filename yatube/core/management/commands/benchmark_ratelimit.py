@@ -0,0 +1,55 @@
+from time import perf_counter
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import resolve
+
+from core.middleware import RateLimitMiddleware
+
+
+def view(request):
+    return HttpResponse()
+
+
+class Command(BaseCommand):
+    help = (
+        'Микробенчмарк RateLimitMiddleware: сколько микросекунд '
+        'добавляет проверка лимита к запросу, без сети и базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        middleware = RateLimitMiddleware(view)
+        request = RequestFactory().post('/create/', REMOTE_ADDR='10.0.0.1')
+        request.user = AnonymousUser()
+        request.resolver_match = resolve('/create/')
+        # Без правила, с запасом жетонов и с исчерпанной корзиной.
+        cases = {
+            'без правила': {},
+            'разрешён': {'posts:post_create': {'rate': '1000000000/s'}},
+            'отказ 429': {'posts:post_create': {'rate': '1/d'}},
+        }
+        baseline = None
+        for name, rules in cases.items():
+            cache.clear()
+            with override_settings(RATE_LIMITS=rules):
+                seconds = self.measure(
+                    middleware, request, options['iterations'])
+            micros = seconds / options['iterations'] * 1e6
+            if baseline is None:
+                baseline = micros
+            self.stdout.write(
+                f'{name:12} {micros:6.1f} мкс/запрос '
+                f'(+{micros - baseline:.1f})')
+
+    @staticmethod
+    def measure(middleware, request, iterations):
+        start = perf_counter()
+        for _ in range(iterations):
+            middleware.process_view(request, view, (), {})
+        return perf_counter() - start
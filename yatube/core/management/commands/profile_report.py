@@ -0,0 +1,35 @@
+import glob
+import os
+import pstats
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Сводка по дампам cProfile: самые затратные функции.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view', default='',
+            help='Только дампы этого view, например posts.index.')
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help='Сколько функций вывести.')
+        parser.add_argument(
+            '--filter', default='posts/views',
+            help='Регулярное выражение по файлу и имени функции.')
+        parser.add_argument(
+            '--sort', default='cumulative',
+            choices=('cumulative', 'tottime', 'calls'),
+            help='Поле сортировки.')
+
+    def handle(self, *args, **options):
+        pattern = f'{options["view"]}*.prof' if options['view'] else '*.prof'
+        paths = sorted(glob.glob(os.path.join(settings.PROFILE_DIR, pattern)))
+        if not paths:
+            raise CommandError(f'Нет дампов в {settings.PROFILE_DIR}.')
+        stats = pstats.Stats(*paths, stream=self.stdout)
+        self.stdout.write(f'Дампов: {len(paths)}')
+        stats.sort_stats(options['sort'])
+        stats.print_stats(options['filter'], options['top'])
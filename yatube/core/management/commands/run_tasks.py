@@ -0,0 +1,63 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.tasks import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Исполнитель фоновых задач core.tasks: забирает задачи из базы '
+        'и выполняет их в пуле потоков, при --processes - в нескольких '
+        'процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза между проверками пустой очереди, в секундах.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.')
+        parser.add_argument(
+            '--max-jobs', type=int,
+            help='Выйти после стольких задач (на процесс).')
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 1:
+            processed = self.work(options)
+            self.stdout.write(f'Выполнено задач: {processed}')
+            return
+        # Соединения с базой не должны достаться дочерним процессам.
+        connections.close_all()
+        children = [
+            multiprocessing.Process(target=self.work, args=(options,))
+            for _ in range(options['processes'])
+        ]
+        for child in children:
+            child.start()
+
+        def stop(*args):
+            for child in children:
+                child.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for child in children:
+            child.join()
+
+    @staticmethod
+    def work(options):
+        worker = Worker(
+            threads=options['threads'],
+            poll_interval=options['poll'],
+            max_jobs=options['max_jobs'],
+        )
+        # По SIGTERM исполнитель доделывает начатые задачи и выходит.
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        return worker.run(once=options['once'])
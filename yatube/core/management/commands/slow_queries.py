@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from core.slow_queries import stats
+
+SORT_KEYS = ('total', 'count', 'max', 'slow')
+
+
+class Command(BaseCommand):
+    help = 'Отчёт по SQL-запросам, сгруппированным по форме запроса.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Сколько форм запросов вывести.')
+        parser.add_argument(
+            '--sort', choices=SORT_KEYS, default='total',
+            help='Поле сортировки.')
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Очистить накопленную статистику.')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            stats.reset()
+            self.stdout.write('Статистика очищена.')
+            return
+        shapes = sorted(
+            stats.collect().items(),
+            key=lambda item: item[1][options['sort']],
+            reverse=True,
+        )[:options['limit']]
+        for shape, data in shapes:
+            self.stdout.write(
+                f'count={data["count"]} '
+                f'total_ms={data["total"] * 1000:.1f} '
+                f'avg_ms={data["total"] * 1000 / data["count"]:.2f} '
+                f'max_ms={data["max"] * 1000:.1f} slow={data["slow"]}'
+            )
+            self.stdout.write(f'  {shape}')
+            last_slow = data['last_slow']
+            if last_slow:
+                self.stdout.write(
+                    f'  последний медленный: view={last_slow["view"]} '
+                    f'origin={last_slow["origin"]}')
+                self.stdout.write(f'  params={last_slow["params"]}')
+                for line in last_slow['plan']:
+                    self.stdout.write(f'    {line}')
@@ -0,0 +1,269 @@
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+HELP = {
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время обработки запроса по view.'),
+    'yatube_db_queries_total': (
+        'counter', 'SQL-запросы по view.'),
+    'yatube_cache_requests_total': (
+        'counter', 'Обращения к кэшу страниц и фрагментов.'),
+    'yatube_thumbnail_duration_seconds': (
+        'histogram', 'Время создания миниатюр.'),
+    'yatube_tasks_total': (
+        'counter', 'Выполненные фоновые задачи по статусу.'),
+    'yatube_task_duration_seconds': (
+        'histogram', 'Время выполнения фоновых задач.'),
+    'yatube_maintenance_scanned_total': (
+        'counter', 'Объекты, проверенные командой sweep_orphans.'),
+    'yatube_maintenance_removed_total': (
+        'counter', 'Объекты, удалённые или архивированные sweep_orphans.'),
+    'yatube_maintenance_duration_seconds': (
+        'histogram', 'Длительность проходов sweep_orphans.'),
+    'yatube_ratelimited_total': (
+        'counter', 'Запросы, отклонённые ограничением частоты.'),
+    'yatube_duplicates_total': (
+        'counter', 'Отклонённые почти дубликаты постов и комментариев.'),
+    'yatube_spam_flagged_total': (
+        'counter', 'Посты и комментарии, помеченные классификатором спама.'),
+    'yatube_emails_sent_total': (
+        'counter', 'Отправленные письма-уведомления по виду.'),
+}
+
+
+def write_process_file(directory, prefix, data):
+    """Атомарно записывает данные текущего процесса в его файл.
+
+    pid берётся при каждой записи: после fork у процесса свой файл.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{prefix}-{os.getpid()}.json')
+    with open(f'{path}.tmp', 'w') as file:
+        json.dump(data, file)
+    os.replace(f'{path}.tmp', path)
+
+
+def process_alive(pid):
+    if os.name == 'nt':
+        # В Windows os.kill() завершает процесс при любом сигнале.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Процесс есть, но принадлежит другому пользователю.
+        return True
+    return True
+
+
+def _load(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _fold_exited(directory, prefix, paths, merge):
+    """Сворачивает файлы завершившихся процессов в {prefix}-exited.json.
+
+    Файл процесса забирается переименованием, а общий файл
+    переписывается под блокировкой: два процесса, читающие метрики
+    одновременно, не учтут одни значения дважды.
+    """
+    import fcntl
+
+    with open(os.path.join(directory, f'{prefix}.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        exited_path = os.path.join(directory, f'{prefix}-exited.json')
+        exited = _load(exited_path)
+        claimed = []
+        for path in paths:
+            try:
+                os.replace(path, f'{path}.exited')
+            except OSError:
+                # Уже забрал другой процесс.
+                continue
+            claimed.append(f'{path}.exited')
+            data = _load(f'{path}.exited')
+            if data is not None:
+                exited = data if exited is None else merge(exited, data)
+        if exited is not None:
+            with open(f'{exited_path}.tmp', 'w') as file:
+                json.dump(exited, file)
+            os.replace(f'{exited_path}.tmp', exited_path)
+        for path in claimed:
+            os.remove(path)
+    return exited
+
+
+def read_process_files(directory, prefix, merge=None):
+    """Данные всех процессов, записанные write_process_file().
+
+    Файлы завершившихся процессов merge(total, data) сворачивает
+    в один общий: счётчики не уменьшаются, когда процесс сервера
+    перезапускается, и значения короткой команды (sweep_orphans)
+    остаются после её выхода, а файлов не становится больше
+    с каждым перезапуском. Без merge файлы читаются как есть.
+    """
+    exited = []
+    for path in glob.glob(os.path.join(directory, f'{prefix}-*.json')):
+        pid = os.path.basename(path)[len(prefix) + 1:-len('.json')]
+        if not pid.isdigit() or int(pid) <= 0:
+            continue
+        if merge is not None and not process_alive(int(pid)):
+            exited.append(path)
+            continue
+        data = _load(path)
+        if data is not None:
+            yield data
+    if merge is not None and exited:
+        data = _fold_exited(directory, prefix, exited, merge)
+    else:
+        data = _load(os.path.join(directory, f'{prefix}-exited.json'))
+    if data is not None:
+        yield data
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())], ensure_ascii=False)
+
+
+def merge_metrics(total, data):
+    """Прибавляет к total счётчики и гистограммы из data."""
+    counters, histograms = total['counters'], total['histograms']
+    for key, value in data['counters'].items():
+        counters[key] = counters.get(key, 0) + value
+    for key, value in data['histograms'].items():
+        summed = histograms.setdefault(key, {
+            'buckets': value['buckets'],
+            'counts': [0] * len(value['buckets']),
+            'sum': 0.0,
+            'count': 0,
+        })
+        for i, count in enumerate(value['counts']):
+            summed['counts'][i] += count
+        summed['sum'] += value['sum']
+        summed['count'] += value['count']
+    return total
+
+
+class MetricsRegistry:
+    """Счётчики и гистограммы, общие для всех процессов сервера.
+
+    Каждый процесс копит значения в памяти и не чаще раза
+    в flush_interval секунд сбрасывает их в свой файл в directory.
+    Эндпоинт /metrics складывает файлы всех процессов. Без directory
+    берётся METRICS_DIR на момент записи.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self._directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._flushed = 0.0
+
+    @property
+    def directory(self):
+        return self._directory or settings.METRICS_DIR
+
+    def inc(self, name, amount=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.setdefault(key, {
+                'buckets': list(buckets),
+                'counts': [0] * len(buckets),
+                'sum': 0.0,
+                'count': 0,
+            })
+            for i, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][i] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._flushed >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            data = {
+                'counters': self._counters,
+                'histograms': self._histograms,
+            }
+            write_process_file(self.directory, 'metrics', data)
+            self._flushed = time.monotonic()
+
+    def collect(self):
+        """Суммирует значения всех процессов."""
+        self.flush()
+        total = {'counters': {}, 'histograms': {}}
+        for data in read_process_files(
+                self.directory, 'metrics', merge_metrics):
+            merge_metrics(total, data)
+        return total['counters'], total['histograms']
+
+    def render(self):
+        """Текстовый формат экспозиции Prometheus."""
+        counters, histograms = self.collect()
+        series = {}
+        for key, value in counters.items():
+            name, labels = json.loads(key)
+            series.setdefault(name, []).append(
+                f'{name}{_labels(labels)} {value}')
+        for key, value in histograms.items():
+            name, labels = json.loads(key)
+            lines = series.setdefault(name, [])
+            for bound, count in zip(value['buckets'], value['counts']):
+                lines.append(
+                    f'{name}_bucket{_labels(labels, le=bound)} {count}')
+            lines.append(
+                f'{name}_bucket{_labels(labels, le="+Inf")} {value["count"]}')
+            lines.append(f'{name}_sum{_labels(labels)} {value["sum"]}')
+            lines.append(f'{name}_count{_labels(labels)} {value["count"]}')
+        output = []
+        for name in sorted(series):
+            kind, help_text = HELP.get(name, ('untyped', name))
+            output.append(f'# HELP {name} {help_text}')
+            output.append(f'# TYPE {name} {kind}')
+            output.extend(series[name])
+        return '\n'.join(output) + '\n'
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'),
+        )
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+registry = MetricsRegistry(
+    flush_interval=settings.METRICS_FLUSH_INTERVAL)
@@ -0,0 +1,205 @@
+import cProfile
+import itertools
+import logging
+import os
+from datetime import datetime
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+
+from core import page_cache, ratelimit
+from core.instrumentation import (
+    RequestMetrics, install_template_timing, set_current_metrics
+)
+from core.metrics import registry
+from core.personal import fill_holes
+
+request_logger = logging.getLogger('yatube.requests')
+
+
+class RequestMetricsMiddleware:
+    """Считает SQL-запросы и время обработки каждого запроса.
+
+    Итог отдаётся в заголовке Server-Timing, пишется строкой
+    key=value в логгер yatube.requests (уровень INFO) и попадает
+    в метрики /metrics. Сами счётчики
+    доступны как request.metrics, по ним тесты проверяют лимиты
+    запросов к базе для view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_timing()
+
+    def __call__(self, request):
+        metrics = request.metrics = RequestMetrics(request)
+        set_current_metrics(metrics)
+        start = perf_counter()
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            metrics.view_time = perf_counter() - start
+            set_current_metrics(None)
+        response['Server-Timing'] = metrics.server_timing()
+        view_name = self.view_name(request)
+        request_logger.info(
+            'method=%s path=%s view=%s status=%s queries=%d '
+            'db_ms=%.1f tpl_ms=%.1f view_ms=%.1f',
+            request.method, request.path, view_name, response.status_code,
+            metrics.queries, metrics.db_time * 1000,
+            metrics.template_time * 1000, metrics.view_time * 1000,
+        )
+        registry.observe(
+            'yatube_request_duration_seconds', metrics.view_time,
+            view=view_name)
+        registry.inc(
+            'yatube_db_queries_total', metrics.queries, view=view_name)
+        return response
+
+    @staticmethod
+    def view_name(request):
+        # Страница из кэша отдаётся до разбора URL.
+        match = request.resolver_match
+        if match is None:
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return 'unresolved'
+        return match.view_name
+
+
+class PersonalMiddleware:
+    """Заполняет персональные фрагменты, оставленные тегом {% personal %}."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or 'text/html' not in response.get('Content-Type', '')
+            or b'<!--personal:' not in response.content
+        ):
+            return response
+        content = response.content.decode(response.charset)
+        response.content = fill_holes(request, content)
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = len(response.content)
+        return response
+
+
+class PageCacheMiddleware:
+    """Кэш готовых страниц, общий для всех посетителей.
+
+    Кэшируются только страницы, которые view пометило тегами
+    через page_cache.add_page_tags(). Всё, что зависит от пользователя,
+    выносится в персональные фрагменты ({% personal %}), поэтому в кэше
+    лежит страница с метками, а заполняет их PersonalMiddleware.
+    Для авторизованных пользователей кэш включается настройкой
+    PAGE_CACHE_AUTHENTICATED; пользователям, для которых функция
+    из PAGE_CACHE_SKIP_USER вернёт True, страницы собираются заново.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.skip_user = (
+            import_string(settings.PAGE_CACHE_SKIP_USER)
+            if settings.PAGE_CACHE_SKIP_USER else None)
+
+    def __call__(self, request):
+        if request.method != 'GET' or (
+            request.user.is_authenticated
+            and not self.is_shared_for(request.user)
+        ):
+            return self.get_response(request)
+        response = page_cache.get_page(request)
+        if response is not None:
+            return response
+        request.page_cache_tags = {}
+        response = self.get_response(request)
+        if self.is_cacheable(request, response):
+            page_cache.set_page(request, response)
+        return response
+
+    def is_shared_for(self, user):
+        """Можно ли авторизованному пользователю общие страницы."""
+        return settings.PAGE_CACHE_AUTHENTICATED and not (
+            self.skip_user and self.skip_user(user))
+
+    @staticmethod
+    def is_cacheable(request, response):
+        # Страница с CSRF-токеном привязана к cookie конкретного
+        # посетителя, отдавать её другим нельзя.
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED')
+        )
+
+
+class RateLimitMiddleware:
+    """Ограничивает частоту запросов к view из settings.RATE_LIMITS.
+
+    Ключ настройки - имя URL, значение - аргументы
+    core.ratelimit.check(): rate, key и methods.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.view_name
+        rule = settings.RATE_LIMITS.get(name)
+        if rule is None:
+            return None
+        return ratelimit.check(request, name, **rule)
+
+
+class ProfilerMiddleware:
+    """Профилирует запрос через cProfile и пишет дамп в PROFILE_DIR.
+
+    Профилирование включает сотрудник (is_staff) заголовком X-Profile
+    или параметром ?profile=1; кроме того, при PROFILE_SAMPLE_RATE = N
+    профилируется каждый N-й запрос процесса. Файлы называются
+    <view>-<время>.prof, сводку по ним выводит команда profile_report.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.counter = itertools.count(1)
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(
+            settings.PROFILE_DIR,
+            '{}-{}.prof'.format(
+                view_name.replace(':', '.'),
+                datetime.now().strftime('%Y%m%dT%H%M%S.%f'),
+            ),
+        ))
+        return response
+
+    def should_profile(self, request):
+        rate = settings.PROFILE_SAMPLE_RATE
+        if rate and next(self.counter) % rate == 0:
+            return True
+        requested = (
+            'HTTP_X_PROFILE' in request.META
+            or request.GET.get('profile') == '1'
+        )
+        return requested and request.user.is_staff
@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from core.metrics import registry
+
+KEY_PREFIX = 'page'
+TAG_PREFIX = 'page_tag'
+# Заголовки, которые не сохраняются со страницей: cookie принадлежат
+# одному посетителю, а длину меняет заполнение персональных меток.
+SKIP_HEADERS = {'set-cookie', 'content-length'}
+
+
+def add_page_tags(request, *tags, posts=()):
+    """Помечает страницу тегами, по которым её сбросят сигналы моделей.
+
+    Для выведенных на странице постов (posts) теги добавляются по самому
+    посту, его автору и группе.
+
+    Версии тегов запоминаются сразу, до рендеринга: если пост изменят,
+    пока страница собирается, она сохранится уже устаревшей и не будет
+    отдана из кэша.
+    """
+    page_tags = getattr(request, 'page_cache_tags', None)
+    if page_tags is None:
+        # Страница не кэшируется (например, пользователь авторизован).
+        return
+    tags = set(tags)
+    for post in posts:
+        tags.add(f'post:{post.pk}')
+        tags.add(f'author:{post.author_id}')
+        if post.group_id:
+            tags.add(f'group:{post.group_id}')
+    page_tags.update(tag_versions(tags - page_tags.keys()))
+
+
+def purge_tags(*tags):
+    """Сбрасывает все страницы, помеченные хотя бы одним из тегов.
+
+    Записи не удаляются: у тега меняется версия, и страница, сохранённая
+    со старой версией, при следующем чтении считается устаревшей.
+    """
+    for tag in tags:
+        key = f'{TAG_PREFIX}:{tag}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def tag_versions(tags):
+    """Текущие версии тегов одним запросом к кэшу."""
+    if not tags:
+        return {}
+    keys = {f'{TAG_PREFIX}:{tag}': tag for tag in tags}
+    versions = cache.get_many(keys)
+    return {tag: versions.get(key, 0) for key, tag in keys.items()}
+
+
+def page_key(request):
+    return f'{KEY_PREFIX}:{request.path}:{request.GET.get("page", "")}'
+
+
+def get_page(request):
+    entry = cache.get(page_key(request))
+    if entry is None or tag_versions(entry['tags']) != entry['tags']:
+        registry.inc(
+            'yatube_cache_requests_total', cache='page', result='miss')
+        return None
+    registry.inc('yatube_cache_requests_total', cache='page', result='hit')
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for header, value in entry['headers']:
+        response[header] = value
+    return response
+
+
+def set_page(request, response):
+    tags = getattr(request, 'page_cache_tags', None)
+    if not tags:
+        return
+    cache.set(
+        page_key(request),
+        {
+            'content': response.content,
+            'status': response.status_code,
+            # Все заголовки, выставленные view и внутренними middleware
+            # (X-Frame-Options и т. п.): при попадании в кэш они
+            # не выполняются.
+            'headers': [
+                (header, value) for header, value in response.items()
+                if header.lower() not in SKIP_HEADERS
+            ],
+            'tags': tags,
+        },
+        settings.PAGE_CACHE_TIMEOUT,
+    )
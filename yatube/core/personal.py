@@ -0,0 +1,42 @@
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from django.template.loader import render_to_string
+
+MARKER = '<!--personal:{template}?{params}-->'
+MARKER_RE = re.compile(r'<!--personal:([\w/.-]+)\?([^>]*)-->')
+
+_providers = {}
+
+
+def personal_context(template_name):
+    """Регистрирует функцию, собирающую контекст персонального фрагмента.
+
+    Функция получает request и параметры из шаблона (строками)
+    и возвращает словарь контекста для template_name.
+    """
+    def decorator(func):
+        _providers[template_name] = func
+        return func
+    return decorator
+
+
+def make_marker(template_name, **params):
+    """Метка на месте фрагмента, который заполнится для каждого запроса."""
+    return MARKER.format(template=template_name, params=urlencode(params))
+
+
+def render_hole(request, template_name, params):
+    provider = _providers.get(template_name)
+    context = provider(request, **params) if provider else params
+    return render_to_string(template_name, context, request=request)
+
+
+def fill_holes(request, content):
+    """Подставляет в общую для всех страницу персональные фрагменты."""
+    return MARKER_RE.sub(
+        lambda match: render_hole(
+            request, match.group(1), dict(parse_qsl(match.group(2)))
+        ),
+        content,
+    )
@@ -0,0 +1,96 @@
+import math
+import time
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from core.metrics import registry
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+# Сколько живёт блокировка корзины, если процесс упал, не сняв её.
+LOCK_TIMEOUT = 1
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'10/m' -> (10, 60): ёмкость корзины и время её полного наполнения."""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period]
+
+
+def hit(key, rate, now=None):
+    """Берёт жетон из корзины key; возвращает 0 или сколько секунд ждать.
+
+    Корзина хранится в кэше одним числом - моментом, когда она
+    снова станет полной (token bucket в форме GCRA). В API кэша нет
+    сравнения с обменом, поэтому чтение и запись идут под блокировкой
+    через cache.add, атомарный во всех бэкендах. Блокировка общая
+    только для запросов одного клиента к одному view: параллельный
+    запрос того же клиента получает отказ, а не ждёт.
+    """
+    count, period = parse_rate(rate)
+    interval = period / count
+    lock = f'{key}:lock'
+    if not cache.add(lock, 1, LOCK_TIMEOUT):
+        return interval
+    try:
+        now = time.time() if now is None else now
+        full_at = max(cache.get(key, now), now) + interval
+        if full_at - now > period:
+            return full_at - now - period
+        cache.set(key, full_at, math.ceil(full_at - now))
+        return 0
+    finally:
+        cache.delete(lock)
+
+
+def client_ip(request):
+    header = settings.RATE_LIMIT_IP_HEADER
+    if header and header in request.META:
+        # За прокси адрес клиента - первый в X-Forwarded-For.
+        return request.META[header].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request, key):
+    """Чья корзина: 'user', 'ip' или 'user_or_ip' (гостям - по адресу)."""
+    if key != 'ip' and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def check(request, name, rate, key='user_or_ip', methods=('POST',)):
+    """Ответ 429, если клиент исчерпал лимит view name, иначе None."""
+    if not settings.RATE_LIMIT_ENABLED or request.method not in methods:
+        return None
+    wait = hit(f'ratelimit:{name}:{client_key(request, key)}', rate)
+    if not wait:
+        return None
+    registry.inc('yatube_ratelimited_total', view=name)
+    retry_after = math.ceil(wait)
+    # Отказ должен стоить дешевле запроса, который он останавливает:
+    # без шаблонов и базы.
+    response = HttpResponse(
+        f'Слишком много запросов, повторите через {retry_after} с.',
+        status=429, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ratelimit(rate, key='user_or_ip', methods=('POST',), name=None):
+    """Декоратор view: не больше rate запросов методами methods.
+
+    rate - строка вида '10/m'; name - имя корзины, по умолчанию
+    путь к view.
+    """
+    def decorator(view):
+        bucket = name or f'{view.__module__}.{view.__qualname__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            limited = check(request, bucket, rate, key, methods)
+            return limited or view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,179 @@
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from time import perf_counter
+
+from django.conf import settings
+
+from core.instrumentation import current_metrics
+from core.metrics import read_process_files, write_process_file
+
+logger = logging.getLogger('yatube.slow_queries')
+
+_IN_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+\b')
+
+_local = threading.local()
+
+
+def normalize_sql(sql):
+    """Форма запроса: без литералов и с IN (...) любой длины."""
+    sql = _IN_RE.sub('IN (...)', sql)
+    sql = _STRING_RE.sub('?', sql)
+    return _NUMBER_RE.sub('?', sql)
+
+
+def merge_shapes(shapes, data):
+    """Прибавляет к shapes статистику форм запросов из data."""
+    for shape, stats in data.items():
+        total = shapes.setdefault(shape, {
+            'count': 0, 'total': 0.0, 'max': 0.0, 'slow': 0,
+            'last_slow': None,
+        })
+        total['count'] += stats['count']
+        total['total'] += stats['total']
+        total['max'] = max(total['max'], stats['max'])
+        total['slow'] += stats['slow']
+        total['last_slow'] = stats['last_slow'] or total['last_slow']
+    return shapes
+
+
+class QueryStats:
+    """Статистика запросов по форме SQL, общая для процессов сервера.
+
+    Хранится рядом с метриками: файл sql-<pid>.json на процесс.
+    Без directory берётся METRICS_DIR на момент записи, так что
+    override_settings уводит статистику во временную директорию.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self._directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._shapes = {}
+        self._flushed = 0.0
+
+    @property
+    def directory(self):
+        return self._directory or settings.METRICS_DIR
+
+    def record(self, sql, duration, slow_entry=None):
+        shape = normalize_sql(sql)
+        with self._lock:
+            stats = self._shapes.setdefault(shape, {
+                'count': 0, 'total': 0.0, 'max': 0.0, 'slow': 0,
+                'last_slow': None,
+            })
+            stats['count'] += 1
+            stats['total'] += duration
+            stats['max'] = max(stats['max'], duration)
+            if slow_entry is not None:
+                stats['slow'] += 1
+                stats['last_slow'] = slow_entry
+        if time.monotonic() - self._flushed >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            write_process_file(self.directory, 'sql', self._shapes)
+            self._flushed = time.monotonic()
+
+    def collect(self):
+        """Складывает статистику всех процессов."""
+        self.flush()
+        shapes = {}
+        for data in read_process_files(self.directory, 'sql', merge_shapes):
+            merge_shapes(shapes, data)
+        return shapes
+
+    def reset(self):
+        with self._lock:
+            self._shapes = {}
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.startswith('sql-'):
+                os.remove(os.path.join(self.directory, name))
+
+
+stats = QueryStats(flush_interval=settings.METRICS_FLUSH_INTERVAL)
+
+
+def query_origin():
+    """Ближайшая к запросу строка кода проекта (не Django и не core)."""
+    for frame in reversed(traceback.extract_stack()):
+        if (
+            frame.filename.startswith(settings.BASE_DIR)
+            and not frame.filename.startswith(
+                os.path.join(settings.BASE_DIR, 'core'))
+        ):
+            return f'{frame.filename}:{frame.lineno} in {frame.name}'
+    return '-'
+
+
+def explain(connection, sql, params):
+    prefix = (
+        'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    )
+    _local.explaining = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return [' '.join(map(str, row)) for row in cursor.fetchall()]
+    except Exception as error:
+        return [f'EXPLAIN не выполнен: {error}']
+    finally:
+        _local.explaining = False
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    """Обёртка execute: статистика по форме SQL и журнал медленных запросов.
+
+    Запросы дольше SLOW_QUERY_THRESHOLD_MS пишутся в логгер
+    yatube.slow_queries вместе с параметрами, view, местом вызова
+    и планом запроса.
+    """
+    if getattr(_local, 'explaining', False):
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = perf_counter() - start
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        slow_entry = None
+        if threshold is not None and duration * 1000 >= threshold:
+            slow_entry = _slow_entry(context, sql, params, many, duration)
+            logger.warning(
+                'slow query %.1f ms view=%s origin=%s\n%s\nparams=%r\n%s',
+                duration * 1000, slow_entry['view'], slow_entry['origin'],
+                sql, params, '\n'.join(slow_entry['plan']),
+            )
+        stats.record(sql, duration, slow_entry)
+
+
+def _slow_entry(context, sql, params, many, duration):
+    metrics = current_metrics()
+    match = metrics.request.resolver_match if metrics else None
+    is_select = sql.lstrip().upper().startswith('SELECT')
+    return {
+        'sql': sql,
+        'params': repr(params),
+        'duration': duration,
+        'view': match.view_name if match else '-',
+        'origin': query_origin(),
+        'plan': (
+            explain(context['connection'], sql, params)
+            if is_select and not many else []
+        ),
+    }
+
+
+def install(sender, connection, **kwargs):
+    """Подключает обёртку к каждому новому соединению с базой."""
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
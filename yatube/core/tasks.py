@@ -0,0 +1,289 @@
+import itertools
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from time import monotonic, perf_counter
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.metrics import registry
+from core.models import Job
+
+logger = logging.getLogger('yatube.tasks')
+
+_tasks = {}
+
+
+class Task:
+    """Функция, которую можно выполнить в фоне через .delay().
+
+    Вызов задачи как функции выполняет её сразу, в текущем потоке.
+    """
+
+    def __init__(self, func, priority=0, max_attempts=5, backoff=10,
+                 lease=300):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease = lease
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.apply_async(args, kwargs)
+
+    def apply_async(self, args=(), kwargs=None, priority=None, countdown=0):
+        """Ставит задачу в очередь.
+
+        Аргументы должны сериализоваться в JSON: передавайте id,
+        а не объекты моделей. При TASKS_EAGER задача выполняется сразу.
+        """
+        payload = json.dumps({'args': list(args), 'kwargs': kwargs or {}})
+        job = Job.objects.create(
+            name=self.name,
+            payload=payload,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=countdown),
+        )
+        if settings.TASKS_EAGER:
+            run_job(job, claimed=False)
+        return job
+
+    def retry_delay(self, attempts):
+        # Экспоненциальная пауза с разбросом, чтобы повторы
+        # упавших вместе задач не приходили одновременно.
+        return self.backoff * 2 ** (attempts - 1) * random.uniform(0.5, 1.5)
+
+
+def task(func=None, **options):
+    """Декоратор: @task или @task(priority=10, max_attempts=3)."""
+    if func is None:
+        return lambda func: task(func, **options)
+    registered = Task(func, **options)
+    _tasks[registered.name] = registered
+    return registered
+
+
+def get_task(name):
+    if name not in _tasks:
+        # Модуль с задачей мог ещё не импортироваться в этом процессе.
+        import_string(name)
+    return _tasks[name]
+
+
+def claim(worker_id, now=None):
+    """Атомарно забирает самую приоритетную готовую задачу.
+
+    Забор - условный UPDATE по id кандидата: если другой исполнитель
+    успел раньше, обновится 0 строк и берётся следующий кандидат.
+    Задачи с истёкшей арендой (исполнитель упал) забираются снова.
+    """
+    now = now or timezone.now()
+    # Задача, которая раз за разом роняет исполнителя, не должна
+    # забираться бесконечно.
+    Job.objects.filter(
+        status=Job.RUNNING, locked_until__lt=now,
+        attempts__gte=F('max_attempts'),
+    ).update(status=Job.FAILED, last_error='Истекла аренда', finished=now)
+    ready = Q(status=Job.QUEUED, run_at__lte=now) | Q(
+        status=Job.RUNNING, locked_until__lt=now)
+    while True:
+        candidate = Job.objects.filter(ready).order_by(
+            '-priority', 'run_at', 'id').values_list(
+            'id', 'name').first()
+        if candidate is None:
+            return None
+        pk, name = candidate
+        try:
+            lease = get_task(name).lease
+        except (ImportError, KeyError):
+            lease = 300
+        claimed = Job.objects.filter(ready, pk=pk).update(
+            status=Job.RUNNING,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=lease),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+
+
+def fail(job, error):
+    """Записывает ошибку задачи: повтор с паузой или FAILED, если
+    попытки кончились. Возвращает новый статус."""
+    if job.attempts >= job.max_attempts:
+        status, run_at = Job.FAILED, job.run_at
+        logger.error('task %s failed:\n%s', job, error)
+    else:
+        registered = _tasks.get(job.name)
+        delay = registered.retry_delay(job.attempts) if registered else 60
+        status = Job.QUEUED
+        run_at = timezone.now() + timedelta(seconds=delay)
+        logger.warning('task %s will be retried:\n%s', job, error)
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        status=status, run_at=run_at, locked_by='', locked_until=None,
+        last_error=error,
+        finished=timezone.now() if status == Job.FAILED else None)
+    return status
+
+
+def run_job(job, claimed=True):
+    """Выполняет задачу и записывает результат.
+
+    Результат записывается, только если аренда ещё за этим
+    исполнителем, иначе задачу уже повторяет другой.
+    """
+    if not claimed:
+        job.attempts += 1
+        Job.objects.filter(pk=job.pk).update(attempts=job.attempts)
+    owned = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    start = perf_counter()
+    try:
+        payload = json.loads(job.payload)
+        get_task(job.name)(*payload['args'], **payload['kwargs'])
+    except Exception:
+        status = fail(job, traceback.format_exc())
+    else:
+        status = Job.DONE
+        owned.update(
+            status=status, locked_by='', locked_until=None,
+            finished=timezone.now())
+    registry.inc('yatube_tasks_total', task=job.name, status=status)
+    registry.observe(
+        'yatube_task_duration_seconds', perf_counter() - start,
+        task=job.name)
+    job.status = status
+    return status
+
+
+def run_pending(worker_id='inline'):
+    """Выполняет все готовые задачи в текущем потоке; для тестов и cron."""
+    done = 0
+    while True:
+        job = claim(worker_id)
+        if job is None:
+            return done
+        run_job(job)
+        done += 1
+
+
+def purge_finished(now=None, batch_size=1000):
+    """Удаляет выполненные и упавшие задачи старше сроков хранения.
+
+    Строки удаляются пачками по id, чтобы не держать блокировку
+    очереди долго. Возвращает число удалённых задач.
+    """
+    now = now or timezone.now()
+    retention = {
+        Job.DONE: settings.TASKS_DONE_RETENTION_DAYS,
+        Job.FAILED: settings.TASKS_FAILED_RETENTION_DAYS,
+    }
+    deleted = 0
+    for status, days in retention.items():
+        old = Job.objects.filter(
+            status=status, finished__lt=now - timedelta(days=days))
+        while True:
+            ids = list(old.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += Job.objects.filter(id__in=ids).delete()[0]
+    return deleted
+
+
+class Worker:
+    """Исполнитель: забирает задачи и выполняет их в пуле потоков."""
+
+    def __init__(self, threads=4, poll_interval=1.0, max_jobs=None):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.max_jobs = max_jobs
+        self.id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        self.slots = threading.Semaphore(threads)
+        self.processed = 0
+        self._claims = itertools.count()
+        self._next_purge = 0.0
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def _run(self, job):
+        try:
+            run_job(job)
+        except Exception:
+            # Упал не сам код задачи, а запись результата (например,
+            # потеряно соединение с базой). Без этого исключение
+            # осталось бы в future, а задача ждала бы конца аренды.
+            logger.exception('worker failed to run task %s', job)
+            try:
+                fail(job, traceback.format_exc())
+            except Exception:
+                logger.exception('task %s left to its lease', job)
+        finally:
+            try:
+                # У каждого потока своё соединение с базой.
+                close_old_connections()
+            finally:
+                # Иначе пул потеряет поток, а run() - место в нём.
+                self.slots.release()
+
+    def _maybe_purge(self):
+        if monotonic() < self._next_purge:
+            return
+        self._next_purge = monotonic() + settings.TASKS_PURGE_INTERVAL
+        try:
+            deleted = purge_finished()
+        except Exception:
+            logger.exception('failed to purge finished tasks')
+        else:
+            if deleted:
+                logger.info('purged %s finished tasks', deleted)
+
+    def run(self, once=False):
+        """Работает до stop(); с once - пока есть готовые задачи.
+
+        С once исполнитель перед выходом дожидается выполняемых задач:
+        они могли поставить в очередь новые.
+        """
+        running = set()
+        with ThreadPoolExecutor(self.threads) as pool:
+            while not self.stopping.is_set():
+                if self.max_jobs and self.processed >= self.max_jobs:
+                    break
+                self._maybe_purge()
+                self.slots.acquire()
+                # Задачи, выполнявшиеся до забора: только они могли
+                # поставить новые, которых забор ещё не увидел.
+                before = list(running)
+                # Своя метка на каждый забор: результат запишет только
+                # тот, кто выполнял задачу последним.
+                job = claim(f'{self.id}#{next(self._claims)}')
+                if job is None:
+                    self.slots.release()
+                    if once:
+                        if not before:
+                            break
+                        wait(before)
+                        continue
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                self.processed += 1
+                future = pool.submit(self._run, job)
+                running.add(future)
+                future.add_done_callback(running.discard)
+        return self.processed
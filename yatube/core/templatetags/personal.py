@@ -0,0 +1,16 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.personal import make_marker
+
+register = template.Library()
+
+
+@register.simple_tag
+def personal(template_name, **params):
+    """Оставляет в странице место под фрагмент, зависящий от пользователя.
+
+    Фрагмент рендерится позже, в PersonalMiddleware, поэтому остальная
+    страница одинакова для всех и может храниться в кэше.
+    """
+    return mark_safe(make_marker(template_name, **params))
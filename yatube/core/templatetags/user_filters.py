@@ -1,4 +1,7 @@
 from django import template
+
+from core.page_cache import tag_versions
+
 # добавляем фильтр
 register = template.Library()
 
@@ -6,3 +9,31 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+@register.filter
+def card_versions(posts):
+    # Карточка выводит имя автора и группу, а они меняются без
+    # изменения поста. Их версии (теги author_card и group_card
+    # сбрасывают сигналы User и Group) читаются для всей страницы
+    # разом и запоминаются в post.card_version.
+    posts = list(posts)
+    stale = [post for post in posts if not hasattr(post, 'card_version')]
+    tags = {f'author_card:{post.author_id}' for post in stale}
+    tags.update(
+        f'group_card:{post.group_id}' for post in stale if post.group_id)
+    versions = tag_versions(tags)
+    for post in stale:
+        post.card_version = '{}.{}.{}'.format(
+            versions[f'author_card:{post.author_id}'], post.group_id or '',
+            versions.get(f'group_card:{post.group_id}', ''))
+    return posts
+
+
+@register.filter
+def cache_versions(posts):
+    # Ключ фрагмента со списком постов собирается из ключей карточек:
+    # изменение любого поста на странице меняет и его.
+    return ','.join(
+        f'{post.pk}:{post.updated.timestamp()}:{post.card_version}'
+        for post in card_versions(posts))
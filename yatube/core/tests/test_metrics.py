@@ -0,0 +1,116 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import MetricsRegistry
+
+User = get_user_model()
+
+
+class MetricsRegistryTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_histogram_exposition(self):
+        """Гистограмма выводится накопительными бакетами."""
+        registry = MetricsRegistry(self.directory)
+        registry.observe(
+            'yatube_request_duration_seconds', 0.02, view='posts:index')
+        registry.observe(
+            'yatube_request_duration_seconds', 0.3, view='posts:index')
+        text = registry.render()
+        self.assertIn(
+            '# TYPE yatube_request_duration_seconds histogram', text)
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="0.01"} 0', text)
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="0.5"} 2', text)
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            text)
+
+    def test_processes_share_values_through_files(self):
+        """Значения разных процессов складываются."""
+        first = MetricsRegistry(self.directory)
+        first.inc('yatube_db_queries_total', 3, view='posts:index')
+        first.flush()
+        # Файл другого, живого процесса с теми же значениями.
+        shutil.copy(
+            f'{self.directory}/metrics-{os.getpid()}.json',
+            f'{self.directory}/metrics-{os.getppid()}.json')
+        self.assertIn(
+            'yatube_db_queries_total{view="posts:index"} 6', first.render())
+
+    def run_command(self, amount):
+        """Короткий процесс, как команда sweep_orphans: сбрасывает
+        счётчик в файл и завершается."""
+        subprocess.run([sys.executable, '-c', (
+            'import django; django.setup()\n'
+            'from core.metrics import MetricsRegistry\n'
+            f'registry = MetricsRegistry({self.directory!r})\n'
+            f'registry.inc("yatube_maintenance_removed_total", {amount})\n'
+            'registry.flush()\n'
+        )], cwd=settings.BASE_DIR, check=True, env=dict(
+            os.environ, DJANGO_SETTINGS_MODULE='yatube.settings'))
+
+    def test_exited_process_counters_kept(self):
+        """Счётчики завершившегося процесса остаются в сумме, а его
+        файл сворачивается в общий."""
+        registry = MetricsRegistry(self.directory)
+        self.run_command(2)
+        self.assertIn('yatube_maintenance_removed_total 2', registry.render())
+        self.run_command(3)
+        self.assertIn('yatube_maintenance_removed_total 5', registry.render())
+        self.assertIn('yatube_maintenance_removed_total 5', registry.render())
+        self.assertEqual(
+            sorted(name for name in os.listdir(self.directory)
+                   if name.endswith('.json')),
+            sorted(['metrics-exited.json', f'metrics-{os.getpid()}.json']))
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.settings = override_settings(METRICS_DIR=directory)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN='secret')
+    def test_metrics_access(self):
+        """Метрики отдаются сотрудникам и по токену, остальным - 403."""
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(
+            url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(
+            url, HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+        self.client.force_login(User.objects.create_user('user'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(
+            User.objects.create_user('staff', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_metrics_endpoint(self):
+        """Эндпоинт /metrics отдаёт метрики запросов и кэша."""
+        cache.clear()
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn('yatube_request_duration_seconds_bucket', text)
+        self.assertIn('view="posts:index"', text)
+        self.assertIn('cache="page",result="hit"', text)
+        self.assertIn('cache="index_page"', text)
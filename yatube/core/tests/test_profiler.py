@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+TEMP_PROFILE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILE_DIR=TEMP_PROFILE_DIR)
+class ProfilerMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user('staff', is_staff=True)
+        cls.user_auth = User.objects.create_user('auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        for name in os.listdir(TEMP_PROFILE_DIR):
+            os.remove(os.path.join(TEMP_PROFILE_DIR, name))
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_auth)
+
+    def test_staff_can_profile_request(self):
+        """Сотрудник получает дамп профиля по параметру или заголовку."""
+        self.staff_client.get(reverse('posts:index') + '?profile=1')
+        self.staff_client.get(reverse('posts:index'), HTTP_X_PROFILE='1')
+        dumps = os.listdir(TEMP_PROFILE_DIR)
+        self.assertEqual(len(dumps), 2)
+        self.assertTrue(dumps[0].startswith('posts.index-'))
+
+    def test_not_staff_cannot_profile_request(self):
+        """Обычный пользователь профилирование не включает."""
+        self.authorized_client.get(reverse('posts:index') + '?profile=1')
+        self.assertEqual(os.listdir(TEMP_PROFILE_DIR), [])
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampled_requests_profiled(self):
+        """При PROFILE_SAMPLE_RATE профилируются запросы без флага."""
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(len(os.listdir(TEMP_PROFILE_DIR)), 1)
+
+    def test_profile_report(self):
+        """Команда profile_report выводит функции posts.views."""
+        self.staff_client.get(reverse('posts:index') + '?profile=1')
+        out = StringIO()
+        call_command('profile_report', '--view', 'posts.index', stdout=out)
+        self.assertIn('views.py', out.getvalue())
+        self.assertIn('(index)', out.getvalue())
@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import ratelimit
+from posts.models import Post
+
+User = get_user_model()
+
+
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(ratelimit.parse_rate('10/m'), (10, 60))
+        self.assertEqual(ratelimit.parse_rate('5/h'), (5, 3600))
+
+    def test_burst_and_refill(self):
+        """Корзина отдаёт rate жетонов подряд и наполняется равномерно."""
+        hits = [ratelimit.hit('bucket', '3/m', now=100) for _ in range(4)]
+        self.assertEqual(hits[:3], [0, 0, 0])
+        self.assertAlmostEqual(hits[3], 20)
+        self.assertAlmostEqual(ratelimit.hit('bucket', '3/m', now=110), 10)
+        self.assertEqual(ratelimit.hit('bucket', '3/m', now=120), 0)
+
+    def test_locked_bucket_is_denied(self):
+        """Параллельный запрос к занятой корзине получает отказ."""
+        cache.add('bucket:lock', 1)
+        self.assertGreater(ratelimit.hit('bucket', '3/m'), 0)
+
+    def test_decorator(self):
+        @ratelimit.ratelimit('1/m', key='ip', methods=('GET',))
+        def view(request):
+            return HttpResponse('ok')
+
+        factory = RequestFactory()
+        responses = []
+        for address in ('10.0.0.1', '10.0.0.1', '10.0.0.2'):
+            request = factory.get('/', REMOTE_ADDR=address)
+            request.user = AnonymousUser()
+            responses.append(view(request))
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [200, 429, 200])
+        self.assertEqual(responses[1]['Retry-After'], '60')
+
+
+class RateLimitMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    @override_settings(RATE_LIMITS={'posts:add_comment': {'rate': '2/m'}})
+    def test_write_endpoint_limited_per_user(self):
+        url = reverse('posts:add_comment', args=(self.post.pk,))
+        codes = [
+            self.client.post(url, {'text': 'Спам'}).status_code
+            for _ in range(3)]
+        self.assertEqual(codes, [302, 302, 429])
+        self.assertEqual(self.post.comments.count(), 2)
+        # Чтение страницы лимит не расходует.
+        self.assertEqual(self.client.get(url).status_code, 302)
+        other = Client()
+        other.force_login(User.objects.create_user(username='other'))
+        self.assertEqual(other.post(url, {'text': 'Ок'}).status_code, 302)
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_disabled(self):
+        url = reverse('posts:post_create')
+        for _ in range(15):
+            response = self.client.post(url, {'text': 'Пост'})
+            self.assertEqual(response.status_code, 302)
+
+    def test_signup_limited_per_ip(self):
+        url = reverse('users:signup')
+        codes = {
+            Client(REMOTE_ADDR='10.0.0.9').post(url, {}).status_code
+            for _ in range(6)}
+        self.assertEqual(codes, {200, 429})
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_ratelimit', '--iterations', '10', stdout=out)
+        self.assertIn('отказ 429', out.getvalue())
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.slow_queries import normalize_sql, stats
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        user = User.objects.create_user('author')
+        Post.objects.create(author=user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        # reset() удаляет файлы статистики: только во временной
+        # директории, а не в METRICS_DIR запущенного сервера.
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(METRICS_DIR=self.directory)
+        self.settings.enable()
+        stats.reset()
+
+    def tearDown(self):
+        stats.reset()
+        self.settings.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_stats_follow_metrics_dir(self):
+        """Статистика пишется в METRICS_DIR на момент записи."""
+        self.client.get(reverse('posts:index'))
+        stats.flush()
+        self.assertEqual(os.listdir(self.directory),
+                         [f'sql-{os.getpid()}.json'])
+
+    def test_normalize_sql(self):
+        """Литералы и списки IN не влияют на форму запроса."""
+        self.assertEqual(
+            normalize_sql(
+                "SELECT * FROM t WHERE id IN (%s, %s, %s) AND s = 'a' "
+                "LIMIT 8 OFFSET 16"),
+            'SELECT * FROM t WHERE id IN (...) AND s = ? LIMIT ? OFFSET ?',
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_query_logged_with_plan(self):
+        """Медленный запрос пишется в лог с view, местом вызова и планом."""
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        output = '\n'.join(logs.output)
+        self.assertIn('view=posts:index', output)
+        self.assertIn('posts/views.py', output)
+        self.assertIn('SCAN', output)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_report_command(self):
+        """Команда slow_queries выводит статистику по формам запросов."""
+        with self.assertLogs('yatube.slow_queries', 'WARNING'):
+            self.client.get(reverse('posts:index'))
+        out = StringIO()
+        call_command('slow_queries', '--sort', 'count', stdout=out)
+        report = out.getvalue()
+        self.assertIn('FROM "posts_post"', report)
+        self.assertIn('view=posts:index', report)
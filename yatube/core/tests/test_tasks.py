@@ -0,0 +1,191 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Job
+
+calls = []
+
+
+@tasks.task
+def remember(value, suffix=''):
+    calls.append(f'{value}{suffix}')
+
+
+@tasks.task(max_attempts=2, backoff=60)
+def explode():
+    raise ValueError('Сломалось')
+
+
+@tasks.task
+def chain(depth):
+    """Ставит следующую задачу, пока depth не дойдёт до нуля."""
+    calls.append(str(depth))
+    if depth:
+        chain.delay(depth - 1)
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_and_run(self):
+        """Задача ставится в очередь и выполняется исполнителем."""
+        job = remember.delay('a', suffix='!')
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(calls, [])
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(calls, ['a!'])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DONE, 1))
+        self.assertIsNotNone(job.finished)
+
+    def test_priority_and_countdown(self):
+        """Сначала выполняются приоритетные задачи, отложенные ждут."""
+        remember.delay('low')
+        remember.apply_async(['high'], priority=10)
+        remember.apply_async(['later'], countdown=60)
+        tasks.run_pending()
+        self.assertEqual(calls, ['high', 'low'])
+
+    def test_retry_with_backoff(self):
+        """Упавшая задача повторяется с паузой, затем помечается ошибкой."""
+        job = explode.delay()
+        with self.assertLogs('yatube.tasks', 'WARNING'):
+            tasks.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('Сломалось', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=29))
+        self.assertEqual(tasks.run_pending(), 0)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            tasks.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_claim_and_lease(self):
+        """Задачу забирает один исполнитель, после истечения аренды -
+        другой, и результат пишет только он."""
+        job = remember.delay('x')
+        first = tasks.claim('first')
+        self.assertEqual(first.pk, job.pk)
+        self.assertIsNone(tasks.claim('second'))
+        later = timezone.now() + timedelta(seconds=remember.lease + 1)
+        second = tasks.claim('second', now=later)
+        self.assertEqual((second.pk, second.attempts), (job.pk, 2))
+        tasks.run_job(first)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.RUNNING, 'second'))
+        tasks.run_job(second)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+    def test_expired_lease_without_attempts_fails(self):
+        job = explode.delay()
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, attempts=2,
+            locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(tasks.claim('worker'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    @override_settings(
+        TASKS_DONE_RETENTION_DAYS=7, TASKS_FAILED_RETENTION_DAYS=30)
+    def test_purge_finished(self):
+        """Старые выполненные и упавшие задачи удаляются, свежие
+        и ещё не завершённые остаются."""
+        now = timezone.now()
+        kept = [
+            Job.objects.create(run_at=now, status=Job.QUEUED),
+            Job.objects.create(run_at=now, status=Job.RUNNING),
+            Job.objects.create(run_at=now, status=Job.DONE,
+                               finished=now - timedelta(days=6)),
+            Job.objects.create(run_at=now, status=Job.FAILED,
+                               finished=now - timedelta(days=20)),
+        ]
+        for i in range(5):
+            Job.objects.create(run_at=now, status=Job.DONE,
+                               finished=now - timedelta(days=8))
+        Job.objects.create(run_at=now, status=Job.FAILED,
+                           finished=now - timedelta(days=31))
+        self.assertEqual(tasks.purge_finished(batch_size=2), 6)
+        self.assertEqual(
+            set(Job.objects.values_list('pk', flat=True)),
+            {job.pk for job in kept})
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager(self):
+        """При TASKS_EAGER задача выполняется сразу при .delay()."""
+        job = remember.delay('now')
+        self.assertEqual(calls, ['now'])
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.DONE)
+
+
+class WorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.share_connection()
+
+    def share_connection(self):
+        """Потоки пула работают через соединение теста, как потоки
+        LiveServerTestCase: у своих соединений с общей базой в памяти
+        SQLite блокирует таблицы, не дожидаясь освобождения, и задачи
+        падали бы случайно."""
+        shared = connections[DEFAULT_DB_ALIAS]
+        shared.inc_thread_sharing()
+        self.addCleanup(shared.dec_thread_sharing)
+        run = tasks.Worker._run
+
+        def shared_run(worker, job):
+            connections[DEFAULT_DB_ALIAS] = shared
+            return run(worker, job)
+
+        patcher = mock.patch.object(tasks.Worker, '_run', shared_run)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_thread_pool(self):
+        """Пул потоков выполняет каждую задачу ровно один раз."""
+        for i in range(10):
+            remember.delay(i)
+        out = StringIO()
+        call_command('run_tasks', '--once', '--threads', '3', stdout=out)
+        self.assertIn('Выполнено задач: 10', out.getvalue())
+        self.assertEqual(sorted(calls), sorted(str(i) for i in range(10)))
+        self.assertEqual(
+            Job.objects.filter(status=Job.DONE).count(), 10)
+
+    def test_worker_purges_finished_jobs(self):
+        old = remember.delay('old')
+        Job.objects.filter(pk=old.pk).update(
+            status=Job.DONE, finished=timezone.now() - timedelta(days=365))
+        tasks.Worker(threads=1).run(once=True)
+        self.assertFalse(Job.objects.filter(pk=old.pk).exists())
+
+    def test_once_waits_for_running_jobs(self):
+        """С --once исполнитель выполняет и задачи, поставленные
+        выполняемыми задачами."""
+        chain.delay(3)
+        self.assertEqual(tasks.Worker(threads=2).run(once=True), 4)
+        self.assertEqual(calls, ['3', '2', '1', '0'])
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
+
+    def test_worker_error_requeues_job(self):
+        """Ошибка вне кода задачи пишется в лог, а задача уходит
+        на повтор, а не ждёт конца аренды."""
+        job = remember.delay('x')
+        with mock.patch('core.tasks.run_job',
+                        side_effect=RuntimeError('База недоступна')):
+            with self.assertLogs('yatube.tasks', 'ERROR'):
+                tasks.Worker(threads=2).run(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.QUEUED, ''))
+        self.assertIn('База недоступна', job.last_error)
@@ -0,0 +1,20 @@
+from time import perf_counter
+
+from sorl.thumbnail.base import ThumbnailBackend
+
+from core.metrics import registry
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, замеряющий создание миниатюр."""
+
+    def _create_thumbnail(self, source_image, geometry_string, options,
+                          thumbnail):
+        start = perf_counter()
+        try:
+            return super()._create_thumbnail(
+                source_image, geometry_string, options, thumbnail)
+        finally:
+            registry.observe(
+                'yatube_thumbnail_duration_seconds',
+                perf_counter() - start, geometry=geometry_string)
@@ -1,4 +1,10 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from core.metrics import registry
 
 
 def page_not_found(request, exception):
@@ -17,3 +23,26 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics_allowed(request):
+    """Метрики видят сотрудники, адреса из METRICS_ALLOWED_IPS
+    и сборщик с токеном METRICS_TOKEN."""
+    if request.user.is_staff:
+        return True
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    token = settings.METRICS_TOKEN
+    scheme, _, value = request.META.get(
+        'HTTP_AUTHORIZATION', '').partition(' ')
+    return bool(token) and scheme == 'Bearer' and constant_time_compare(
+        value, token)
+
+
+def metrics(request):
+    if not metrics_allowed(request):
+        raise PermissionDenied
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,13 +1,63 @@
 from django.contrib import admin
-from .models import Comment, Group, Post
+
+from .deletion import schedule_post_deletion
+from .models import (
+    Block, Comment, Deletion, DigestRun, Group, GroupFollow, Notification,
+    NotificationSettings, Post, SpamLabel
+)
+
+
+def delete_in_background(modeladmin, request, queryset):
+    for post in queryset:
+        schedule_post_deletion(post)
+    modeladmin.message_user(
+        request, f'В очередь удаления: {len(queryset)}. '
+                 'Удаляет команда process_deletions.')
+
+
+delete_in_background.short_description = 'Удалить в фоне'
+
+
+def _label(queryset, spam):
+    # Тексты остаются обучающей выборкой train_spam после удаления.
+    SpamLabel.objects.bulk_create(
+        SpamLabel(kind=queryset.model._meta.model_name, text=text, spam=spam)
+        for text in queryset.values_list('text', flat=True))
+
+
+def mark_spam(modeladmin, request, queryset):
+    _label(queryset, spam=True)
+    # Отметка до удаления: пока строки ждут очереди, они не попадут
+    # в обучающую выборку как обычные тексты.
+    queryset.update(flagged=True)
+    count = len(queryset)
+    if queryset.model is Post:
+        for post in queryset:
+            schedule_post_deletion(post)
+    else:
+        queryset.delete()
+    modeladmin.message_user(request, f'Отмечено как спам и удалено: {count}.')
+
+
+mark_spam.short_description = 'Спам: запомнить и удалить'
+
+
+def mark_ham(modeladmin, request, queryset):
+    _label(queryset, spam=False)
+    count = queryset.update(flagged=False)
+    modeladmin.message_user(request, f'Отмечено как не спам: {count}.')
+
+
+mark_ham.short_description = 'Не спам: запомнить и снять отметку'
 
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'created', 'author', 'group',)
+    list_display = ('pk', 'text', 'created', 'author', 'group', 'flagged',)
     list_editable = ('group',)
     search_fields = ('text',)
-    list_filter = ('created',)
+    list_filter = ('flagged', 'created',)
     empty_value_display = '-пусто-'
+    actions = (delete_in_background, mark_spam, mark_ham,)
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -17,12 +67,66 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ('text', 'created', 'author',)
+    list_display = ('text', 'created', 'author', 'flagged',)
     search_fields = ('text',)
-    list_filter = ('created',)
+    list_filter = ('flagged', 'created',)
     empty_value_display = '-пусто-'
+    actions = (mark_spam, mark_ham,)
+
+
+class DeletionAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'object_id', 'deleted', 'created',
+                    'finished',)
+    list_filter = ('kind', 'finished',)
+    empty_value_display = '-пусто-'
+
+
+class NotificationSettingsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'email_frequency',)
+    list_filter = ('email_frequency',)
+    search_fields = ('user__username',)
+
+
+class DigestRunAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'frequency', 'period_end', 'last_user_id', 'sent',
+                    'finished',)
+    list_filter = ('frequency',)
+    empty_value_display = '-пусто-'
+
+
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'kind', 'actor', 'post', 'read',
+                    'created',)
+    list_filter = ('kind', 'read',)
+    raw_id_fields = ('user', 'actor', 'post',)
+    empty_value_display = '-пусто-'
+
+
+class SpamLabelAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'text', 'spam', 'created',)
+    list_filter = ('kind', 'spam',)
+    search_fields = ('text',)
+
+
+class BlockAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author', 'kind', 'created',)
+    list_filter = ('kind',)
+    raw_id_fields = ('user', 'author',)
+
+
+class GroupFollowAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'group',)
+    list_filter = ('group',)
+    raw_id_fields = ('user',)
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(Deletion, DeletionAdmin)
+admin.site.register(NotificationSettings, NotificationSettingsAdmin)
+admin.site.register(DigestRun, DigestRunAdmin)
+admin.site.register(Notification, NotificationAdmin)
+admin.site.register(SpamLabel, SpamLabelAdmin)
+admin.site.register(Block, BlockAdmin)
+admin.site.register(GroupFollow, GroupFollowAdmin)
@@ -0,0 +1,83 @@
+import math
+import tracemalloc
+from time import perf_counter
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from .models import Group, Post, User
+
+
+def percentile(values, fraction):
+    # Метод ближайшего ранга.
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def _scenarios(user, group, post):
+    return {
+        'posts:index': lambda client: client.get(reverse('posts:index')),
+        'posts:group_list': lambda client: client.get(
+            reverse('posts:group_list', kwargs={'slug': group.slug})),
+        'posts:profile': lambda client: client.get(
+            reverse('posts:profile', kwargs={'username': post.author})),
+        'posts:post_detail': lambda client: client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})),
+        'posts:follow_index': lambda client: client.get(
+            reverse('posts:follow_index')),
+        'posts:post_create': lambda client: client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост из бенчмарка', 'group': group.pk}),
+        'posts:add_comment': lambda client: client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Комментарий из бенчмарка'}),
+    }
+
+
+# Лимиты частоты исказили бы замеры отказами 429.
+@override_settings(RATE_LIMIT_ENABLED=False)
+def run(requests=50, warm_cache=False, views=None):
+    """Замеряет задержку, число запросов к базе и пик памяти по view.
+
+    Запросы идут через Client от имени самого активного подписчика,
+    то есть через весь стек middleware. Без warm_cache кэш очищается
+    перед каждым запросом, и меряется отрисовка с нуля.
+    """
+    user = User.objects.annotate(
+        follows_count=Count('follower')).order_by('-follows_count').first()
+    group = Group.objects.annotate(
+        posts_count=Count('posts')).order_by('-posts_count').first()
+    post = Post.objects.annotate(
+        comments_count=Count('comments')).order_by('-comments_count').first()
+    client = Client()
+    client.force_login(user)
+    results = {}
+    for name, scenario in _scenarios(user, group, post).items():
+        if views and name not in views:
+            continue
+        latencies, queries = [], []
+        for _ in range(requests):
+            if not warm_cache:
+                cache.clear()
+            start = perf_counter()
+            response = scenario(client)
+            latencies.append(perf_counter() - start)
+            queries.append(response.wsgi_request.metrics.queries)
+        if not warm_cache:
+            cache.clear()
+        tracemalloc.start()
+        scenario(client)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {
+            'requests': requests,
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': max(latencies) * 1000,
+            'queries': max(queries),
+            'peak_memory_kb': peak / 1024,
+        }
+    return results
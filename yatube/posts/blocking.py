@@ -0,0 +1,70 @@
+from array import array
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from . import inbox
+from .models import Block, Follow, Notification
+
+HIDDEN_TIMEOUT = 60 * 60 * 24
+
+
+def hidden_key(user_id):
+    return f'blocking:hidden:{user_id}'
+
+
+def _load(user_id):
+    """(заглушённые, заблокированные) - id авторов в массивах array.
+
+    В кэше лежат байты массивов, по 8 на автора. Пустые наборы тоже
+    кэшируются: у большинства пользователей их нет, и лента не должна
+    ходить за ними в базу.
+    """
+    data = cache.get(hidden_key(user_id))
+    if data is None:
+        muted, blocked = array('q'), array('q')
+        for author_id, kind in Block.objects.filter(
+                user_id=user_id).values_list('author_id', 'kind'):
+            (blocked if kind == Block.BLOCK else muted).append(author_id)
+        data = (muted.tobytes(), blocked.tobytes())
+        cache.set(hidden_key(user_id), data, HIDDEN_TIMEOUT)
+    return [array('q', part) for part in data]
+
+
+def hidden_authors(user_id):
+    """Авторы, чьи посты пользователь не видит в лентах."""
+    muted, blocked = _load(user_id)
+    return frozenset(muted) | frozenset(blocked)
+
+
+def blocked_authors(user_id):
+    """Пользователи, которых user_id заблокировал."""
+    return frozenset(_load(user_id)[1])
+
+
+def has_hidden_authors(user):
+    """Для PAGE_CACHE_SKIP_USER: общие страницы не учитывают скрытых."""
+    return any(_load(user.pk))
+
+
+def block(user, author, kind=Block.BLOCK):
+    """Скрывает author от user; блокировка вдобавок рвёт подписки
+    в обе стороны и удаляет уведомления от author."""
+    with transaction.atomic():
+        Block.objects.update_or_create(
+            user=user, author=author, defaults={'kind': kind})
+        if kind == Block.BLOCK:
+            Follow.objects.filter(
+                Q(user=user, author=author) | Q(user=author, author=user),
+            ).delete()
+            Notification.objects.filter(user=user, actor=author).delete()
+    cache.delete(hidden_key(user.pk))
+    if kind == Block.BLOCK:
+        # Удалённые уведомления могли быть непрочитанными.
+        cache.delete(inbox.unread_key(user.pk))
+
+
+def unblock(user, author):
+    Block.objects.filter(user=user, author=author).delete()
+    cache.delete(hidden_key(user.pk))
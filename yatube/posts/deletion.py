@@ -0,0 +1,146 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.page_cache import purge_tags
+from . import inbox
+from .models import (
+    Block, Comment, CommentBand, Deletion, Follow, GroupFollow, Notification,
+    NotificationSettings, Post, PostBand, Recommendation, User
+)
+
+BATCH_SIZE = 500
+
+
+def schedule_user_deletion(user):
+    """Скрывает пользователя сразу, а его данные удаляет в фоне.
+
+    Неактивного пользователя не пускает на сайт ModelBackend,
+    а его посты и профиль пропадают из выдачи.
+    """
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        deletion = Deletion.objects.create(
+            kind=Deletion.USER, object_id=user.pk)
+    group_ids = Post.objects.filter(author=user).exclude(
+        group=None).values_list('group_id', flat=True).distinct()
+    purge_tags('index', f'author:{user.pk}',
+               *(f'group:{pk}' for pk in group_ids))
+    return deletion
+
+
+def schedule_post_deletion(post):
+    """Скрывает пост сразу, а его и зависимые строки удаляет в фоне."""
+    with transaction.atomic():
+        Post.objects.filter(pk=post.pk).update(deleted=True)
+        # Скрытый пост не должен находиться как дубликат; полос
+        # у поста BANDS штук, они удаляются сразу, а не в очереди.
+        PostBand.objects.filter(post_id=post.pk).delete()
+        deletion = Deletion.objects.create(
+            kind=Deletion.POST, object_id=post.pk)
+    post.deleted = True
+    tags = ['index', f'post:{post.pk}', f'author:{post.author_id}']
+    if post.group_id:
+        tags.append(f'group:{post.group_id}')
+    purge_tags(*tags)
+    return deletion
+
+
+def steps(deletion):
+    """Очереди удаления: зависимые строки раньше удаляемого объекта.
+
+    Каждая таблица, которая ссылается на удаляемое через CASCADE,
+    очищается своими пачками: итоговое удаление строки не должно
+    каскадом захватывать тысячи строк в одной транзакции.
+    Комментарии к удаляемым постам удаляются, а не обнуляются
+    через SET_NULL, чтобы не переписывать каждую строку.
+    """
+    pk = deletion.object_id
+    if deletion.kind == Deletion.POST:
+        return [
+            CommentBand.objects.filter(comment__post_id=pk),
+            Comment.objects.filter(post_id=pk),
+            Notification.objects.filter(post_id=pk),
+            PostBand.objects.filter(post_id=pk),
+            Post.objects.filter(pk=pk),
+        ]
+    return [
+        CommentBand.objects.filter(comment__post__author_id=pk),
+        CommentBand.objects.filter(comment__author_id=pk),
+        Comment.objects.filter(post__author_id=pk),
+        Comment.objects.filter(author_id=pk),
+        Follow.objects.filter(user_id=pk),
+        Follow.objects.filter(author_id=pk),
+        GroupFollow.objects.filter(user_id=pk),
+        Block.objects.filter(user_id=pk),
+        Block.objects.filter(author_id=pk),
+        Recommendation.objects.filter(user_id=pk),
+        Recommendation.objects.filter(author_id=pk),
+        NotificationSettings.objects.filter(user_id=pk),
+        # Уведомления о постах автора разосланы всем подписчикам.
+        Notification.objects.filter(user_id=pk),
+        Notification.objects.filter(actor_id=pk),
+        Notification.objects.filter(post__author_id=pk),
+        PostBand.objects.filter(post__author_id=pk),
+        Post.objects.filter(author_id=pk),
+        User.objects.filter(pk=pk),
+    ]
+
+
+def run_batch(deletion, batch_size=BATCH_SIZE):
+    """Удаляет одну пачку строк по возрастанию id.
+
+    Каждая пачка - отдельная короткая транзакция, а всё состояние
+    хранится в самих таблицах, поэтому прерванное удаление
+    продолжается с того же места. Возвращает False, когда удалять
+    больше нечего.
+    """
+    for queryset in steps(deletion):
+        ids = list(queryset.order_by('pk').values_list(
+            'pk', flat=True)[:batch_size])
+        if not ids:
+            continue
+        batch = queryset.model.objects.filter(pk__in=ids)
+        recipients = []
+        if queryset.model is Notification:
+            recipients = set(batch.filter(read=False).values_list(
+                'user_id', flat=True))
+        with transaction.atomic():
+            deleted, _ = batch.delete()
+            deletion.deleted += deleted
+            deletion.save(update_fields=['deleted'])
+        # Удалённые уведомления могли быть непрочитанными.
+        cache.delete_many([inbox.unread_key(user_id)
+                           for user_id in recipients])
+        return True
+    deletion.finished = timezone.now()
+    deletion.save(update_fields=['finished'])
+    return False
+
+
+def remaining(deletion):
+    """Сколько строк осталось удалить, по моделям; пустые не входят."""
+    counts = {}
+    for queryset in steps(deletion):
+        count = queryset.count()
+        if count:
+            name = queryset.model._meta.model_name
+            counts[name] = counts.get(name, 0) + count
+    return counts
+
+
+def process(batch_size=BATCH_SIZE, pause=0.0, progress=None):
+    """Выполняет все незавершённые заявки пачками.
+
+    pause - пауза между пачками, чтобы не занимать базу надолго.
+    progress(deletion) вызывается после каждой пачки.
+    """
+    progress = progress or (lambda deletion: None)
+    for deletion in Deletion.objects.filter(
+            finished__isnull=True).order_by('id'):
+        while run_batch(deletion, batch_size):
+            progress(deletion)
+            time.sleep(pause)
+        progress(deletion)
@@ -0,0 +1,150 @@
+from collections import defaultdict
+from datetime import timedelta
+from heapq import merge
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import get_connection, send_mass_mail
+from django.db.models import F
+from django.template.loader import get_template, render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from core.metrics import registry
+from .models import DigestRun, Follow, NotificationSettings, Post, User
+
+BATCH_SIZE = 1000
+MAX_POSTS = 20
+
+PERIODS = {
+    NotificationSettings.DAILY: timedelta(days=1),
+    NotificationSettings.WEEKLY: timedelta(days=7),
+}
+
+
+def period_end(frequency, now=None):
+    """Конец последнего завершённого периода: полночь, для недели -
+    полночь понедельника, по часовому поясу сайта."""
+    end = timezone.localtime(now).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    if frequency == NotificationSettings.WEEKLY:
+        end -= timedelta(days=end.weekday())
+    return end
+
+
+def recipients(frequency):
+    return User.objects.filter(
+        is_active=True,
+        notification_settings__email_frequency=frequency,
+    ).exclude(email='')
+
+
+class DigestBuilder:
+    """Собирает дайджесты пачки получателей тремя запросами.
+
+    Число запросов не зависит от размера пачки: получатели, их
+    подписки и посты всех их авторов за период. Каждый пост рендерится
+    один раз за рассылку, письмо получателя склеивается из готовых
+    фрагментов.
+    """
+
+    def __init__(self, frequency, since, until):
+        self.frequency = frequency
+        self.since = since
+        self.until = until
+        self.post_template = get_template('posts/emails/digest_post.txt')
+        self.digest_template = get_template('posts/emails/digest.txt')
+        self.subject = render_to_string(
+            'posts/emails/digest_subject.txt',
+            {'frequency': frequency}).strip()
+        self.follow_url = settings.SITE_URL + reverse('posts:follow_index')
+        # Один пост попадает в письма многих пачек.
+        self.rendered = {}
+
+    def batch(self, after, batch_size=BATCH_SIZE):
+        """Письма получателям с id больше after и id последнего из них.
+
+        Получатели без новых постов в подписках пропускаются.
+        """
+        users = list(recipients(self.frequency).filter(
+            id__gt=after).order_by('id').values_list(
+            'id', 'username', 'email')[:batch_size])
+        if not users:
+            return [], None
+        # Подписки всех пользователей из диапазона id: лишние строки
+        # не-получателей дешевле, чем соединение с настройками.
+        follows = Follow.objects.filter(
+            user_id__gte=users[0][0], user_id__lte=users[-1][0],
+            author__is_active=True,
+        )
+        subscriptions = defaultdict(list)
+        for user_id, author_id in follows.values_list(
+                'user_id', 'author_id'):
+            subscriptions[user_id].append(author_id)
+        posts = defaultdict(list)
+        for post in Post.objects.filter(
+            author_id__in=follows.values('author_id'),
+            created__gte=self.since, created__lt=self.until, deleted=False,
+        ).order_by('-created', '-id').values(
+            'id', 'text', 'created', 'author_id', 'author__username',
+        ).iterator():
+            posts[post['author_id']].append(
+                ((post['created'], post['id']), self.render_post(post)))
+        messages = []
+        for user_id, username, email in users:
+            feeds = [posts[author] for author in subscriptions[user_id]]
+            total = sum(map(len, feeds))
+            if not total:
+                continue
+            # Ленты авторов уже отсортированы: из слияния берутся
+            # только первые MAX_POSTS постов.
+            latest = islice(merge(*feeds, reverse=True), MAX_POSTS)
+            body = self.digest_template.render({
+                'username': username,
+                'posts': '\n'.join(text for _, text in latest),
+                'more': max(total - MAX_POSTS, 0),
+                'follow_url': self.follow_url,
+            })
+            messages.append((self.subject, body, None, [email]))
+        return messages, users[-1][0]
+
+    def render_post(self, post):
+        if post['id'] not in self.rendered:
+            self.rendered[post['id']] = self.post_template.render({
+                'post': post,
+                'url': settings.SITE_URL + reverse(
+                    'posts:post_detail', args=(post['id'],)),
+            })
+        return self.rendered[post['id']]
+
+
+def send_digests(frequency, now=None, batch_size=BATCH_SIZE,
+                 progress=None):
+    """Рассылает дайджесты за последний завершённый период.
+
+    Место остановки хранится в DigestRun после каждой пачки:
+    повторный запуск после сбоя продолжает с неё, а запуск после
+    завершения ничего не делает. Пачка, упавшая между отправкой
+    и записью места, при повторе отправится ещё раз.
+    """
+    until = period_end(frequency, now)
+    run, _ = DigestRun.objects.get_or_create(
+        frequency=frequency, period_end=until)
+    if run.finished:
+        return run
+    builder = DigestBuilder(frequency, until - PERIODS[frequency], until)
+    while True:
+        messages, last_user_id = builder.batch(run.last_user_id, batch_size)
+        if last_user_id is None:
+            break
+        sent = send_mass_mail(messages, connection=get_connection())
+        DigestRun.objects.filter(pk=run.pk).update(
+            last_user_id=last_user_id, sent=F('sent') + sent)
+        run.last_user_id = last_user_id
+        run.sent += sent
+        registry.inc('yatube_emails_sent_total', sent, kind=frequency)
+        if progress:
+            progress(run)
+    run.finished = timezone.now()
+    run.save(update_fields=['finished'])
+    return run
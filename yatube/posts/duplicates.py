@@ -0,0 +1,105 @@
+import hashlib
+import re
+import struct
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.metrics import registry
+
+# Подпись MinHash: минимумы HASHES хэш-функций по фрагментам текста.
+HASHES = 32
+# Полосы для LSH: тексты с похожестью по Жаккару J совпадают хотя бы
+# в одной полосе с вероятностью 1 - (1 - J ** ROWS) ** BANDS:
+# 0.99 при J = 0.85 (одно слово из 25 заменено), 0.4 при J = 0.5
+# и 0.00005 при J = 0.05, то есть случайных кандидатов единицы
+# даже на миллионах текстов.
+BANDS = 8
+ROWS = HASHES // BANDS
+SHINGLE_WORDS = 2
+# Короткие тексты ("Спасибо за пост!") законно повторяются.
+MIN_SHINGLES = 8
+
+WORD_RE = re.compile(r'\w+')
+# blake2b отдаёт до 64 байт: 16 независимых 32-битных хэшей за вызов.
+_DIGEST = struct.Struct('<16I')
+_SIGNATURE = struct.Struct(f'<{HASHES}I')
+
+
+def shingles(text):
+    """Множество фрагментов текста по SHINGLE_WORDS слов подряд."""
+    words = WORD_RE.findall(text.lower())
+    return {
+        ' '.join(words[i:i + SHINGLE_WORDS])
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+
+
+def _hashes(part):
+    data = part.encode()
+    return (
+        _DIGEST.unpack(hashlib.blake2b(data, person=b'first').digest())
+        + _DIGEST.unpack(hashlib.blake2b(data, person=b'second').digest())
+    )
+
+
+def fingerprint(text):
+    """Подпись MinHash текста (bytes) или None для короткого текста.
+
+    Доля совпадающих позиций двух подписей оценивает похожесть
+    по Жаккару множеств их фрагментов.
+    """
+    parts = shingles(text)
+    if len(parts) < MIN_SHINGLES:
+        return None
+    # Минимум по каждой хэш-функции через zip считается в C.
+    return _SIGNATURE.pack(*map(min, zip(*map(_hashes, parts))))
+
+
+def band_keys(signature):
+    """Ключи полос подписи для индекса, по одному на полосу."""
+    size = ROWS * 4
+    return [
+        int.from_bytes(hashlib.blake2b(
+            signature[band * size:(band + 1) * size],
+            digest_size=8, person=bytes([band])).digest(),
+            'big', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def similarity(first, second):
+    return sum(
+        a == b for a, b in zip(
+            _SIGNATURE.unpack(first), _SIGNATURE.unpack(second))) / HASHES
+
+
+def index(band_model, field, objects):
+    """Записывает полосы подписей объектов в band_model."""
+    band_model.objects.bulk_create(
+        band_model(**{field: obj, 'key': key})
+        for obj in objects if obj.minhash is not None
+        for key in band_keys(obj.minhash)
+    )
+
+
+def find_duplicate(queryset, text, exclude=None):
+    """Похожий на text объект из queryset за DUPLICATE_WINDOW_DAYS или None.
+
+    Кандидаты находятся по индексу полос одним запросом, похожесть
+    подписей проверяется только для них.
+    """
+    signature = fingerprint(text)
+    if signature is None:
+        return None
+    since = timezone.now() - timedelta(days=settings.DUPLICATE_WINDOW_DAYS)
+    candidates = queryset.filter(
+        minhash_bands__key__in=band_keys(signature), created__gte=since,
+    ).exclude(pk=exclude).values_list('pk', 'minhash').distinct()
+    for pk, other in candidates:
+        if similarity(signature, other) >= settings.DUPLICATE_SIMILARITY:
+            registry.inc('yatube_duplicates_total',
+                         kind=queryset.model._meta.model_name)
+            return pk
+    return None
@@ -0,0 +1,151 @@
+import csv
+import itertools
+import json
+import zipfile
+
+from django.core.files.storage import default_storage
+
+from .models import Comment, Post
+
+# Постов в одном запросе к базе; комментарии выбираются той же пачкой,
+# поэтому размер ограничен числом параметров SQLite.
+CHUNK_SIZE = 500
+# Размер блока при копировании картинок в архив.
+FILE_CHUNK_SIZE = 64 * 1024
+
+FIELDS = ('id', 'author', 'group', 'text', 'created', 'image', 'comments')
+# Формат выгрузки -> Content-Type.
+FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'zip': 'application/zip',
+}
+
+
+def posts_of_author(username):
+    """Посты автора для выгрузки: без удалённых."""
+    return Post.objects.filter(author__username=username, deleted=False)
+
+
+def posts_of_group(slug):
+    """Посты группы для выгрузки: без удалённых и без постов
+    пользователей, ждущих удаления."""
+    return Post.objects.filter(
+        group__slug=slug, deleted=False, author__is_active=True)
+
+
+def export_records(posts):
+    """Записи постов в формате импорта, по CHUNK_SIZE постов за раз.
+
+    Посты читаются через iterator(), комментарии - одним запросом
+    на пачку, так что память не зависит от числа постов.
+    """
+    rows = posts.order_by('id').values_list(
+        'id', 'author__username', 'group__slug', 'text', 'created', 'image',
+    ).iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = list(itertools.islice(rows, CHUNK_SIZE))
+        if not chunk:
+            return
+        comments = {}
+        for post_id, author, text, created in Comment.objects.filter(
+            post_id__in=[row[0] for row in chunk],
+        ).order_by('id').values_list(
+            'post_id', 'author__username', 'text', 'created',
+        ):
+            comments.setdefault(post_id, []).append({
+                'author': author, 'text': text,
+                'created': created.isoformat(),
+            })
+        for post_id, author, group, text, created, image in chunk:
+            yield {
+                'id': post_id,
+                'author': author,
+                'group': group or '',
+                'text': text,
+                'created': created.isoformat(),
+                'image': image,
+                'comments': comments.get(post_id, []),
+            }
+
+
+def jsonl_lines(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Файл для csv.writer, возвращающий строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(records):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for record in records:
+        record['comments'] = json.dumps(
+            record['comments'], ensure_ascii=False)
+        yield writer.writerow([record[field] for field in FIELDS])
+
+
+class ZipStream:
+    """Поток для ZipFile без seek: копит записанное до следующего pop()."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        # Пустые части не отдаём: deflate копит данные внутри себя.
+        if self.chunks:
+            data = b''.join(self.chunks)
+            self.chunks = []
+            yield data
+
+
+def zip_chunks(posts, name='posts'):
+    """ZIP-архив с posts.jsonl и картинками из media/, отдаваемый частями.
+
+    Картинки выбираются вторым проходом по постам и пишутся без сжатия:
+    они и так сжаты.
+    """
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(f'{name}.jsonl', 'w', force_zip64=True) as file:
+            for line in jsonl_lines(export_records(posts)):
+                file.write(line.encode())
+                yield from stream.pop()
+        images = posts.exclude(image='').order_by('id').values_list(
+            'image', flat=True).iterator(chunk_size=CHUNK_SIZE)
+        for image in images:
+            yield from _zip_file(archive, stream, image)
+    yield from stream.pop()
+
+
+def _zip_file(archive, stream, path):
+    if not default_storage.exists(path):
+        return
+    info = zipfile.ZipInfo(f'media/{path}')
+    info.compress_type = zipfile.ZIP_STORED
+    with default_storage.open(path) as source:
+        with archive.open(info, 'w', force_zip64=True) as target:
+            for chunk in iter(lambda: source.read(FILE_CHUNK_SIZE), b''):
+                target.write(chunk)
+                yield from stream.pop()
+
+
+def export_chunks(posts, format):
+    """Части файла выгрузки в формате jsonl, csv или zip."""
+    if format == 'zip':
+        return zip_chunks(posts)
+    if format == 'csv':
+        return csv_lines(export_records(posts))
+    return jsonl_lines(export_records(posts))
@@ -0,0 +1,121 @@
+import zlib
+from datetime import datetime, timedelta
+from heapq import merge
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils import timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Сколько постов читать за запрос на каждый показываемый: скрытые
+# авторы выпадают из выборки, и страница должна набраться за один-два
+# запроса.
+OVERFETCH = 2
+# Сколько пачек постов просматривать на страницу, если скрытые авторы
+# заняли всю ленту: страница выйдет короче, а следующая продолжит
+# с места остановки.
+MAX_SCANS = 5
+
+
+def encode_cursor(created, pk):
+    """Позиция в ленте: микросекунды created и id через '_'."""
+    return f'{(created - EPOCH) // timedelta(microseconds=1)}_{pk}'
+
+
+def decode_cursor(value):
+    """(created, id) из encode_cursor или None для мусора в запросе."""
+    microseconds, _, pk = value.partition('_')
+    try:
+        return EPOCH + timedelta(microseconds=int(microseconds)), int(pk)
+    except (ValueError, OverflowError):
+        return None
+
+
+def after(posts, cursor):
+    """Посты ленты строго после позиции cursor по (-created, -id)."""
+    created, pk = cursor
+    return posts.filter(
+        Q(created__lt=created) | Q(created=created, id__lt=pk))
+
+
+def up_to(posts, cursor):
+    """Посты ленты до позиции cursor включительно."""
+    created, pk = cursor
+    return posts.filter(
+        Q(created__gt=created) | Q(created=created, id__gte=pk))
+
+
+def _stream(posts, cursor, chunk_size):
+    """Посты источника от позиции cursor, дочитываемые пачками по мере
+    того, как слияние их забирает."""
+    while True:
+        chunk = list((after(posts, cursor) if cursor else posts)[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        cursor = (chunk[-1].created, chunk[-1].pk)
+
+
+def merged_page(request, sources, hidden=frozenset(), per_page=None):
+    """Страница ленты, слитой из нескольких источников постов.
+
+    Каждый источник - queryset, читаемый по ключу (created, id) от
+    позиции ?after= пачками с запасом; heapq.merge сливает их без
+    общего запроса с OR. Пост, попавший в два источника, идёт
+    в слиянии подряд и показывается один раз; авторы из hidden
+    отбрасываются по множеству в памяти. Возвращает обычный Page:
+    шаблону пагинатора ссылку на следующую страницу даёт next_cursor.
+    """
+    per_page = per_page or settings.SELECT_LIMIT
+    chunk_size = (per_page + 1) * OVERFETCH
+    cursor = decode_cursor(request.GET.get('after', ''))
+    merged = merge(
+        *(_stream(posts.order_by('-created', '-id'), cursor, chunk_size)
+          for posts in sources),
+        key=attrgetter('created', 'pk'), reverse=True)
+    visible = []
+    next_cursor = None
+    previous = None
+    for scanned, post in enumerate(merged, 1):
+        if post.pk == previous:
+            continue
+        previous = post.pk
+        if post.author_id in hidden:
+            pass
+        elif len(visible) == per_page:
+            # Есть хотя бы ещё один видимый пост.
+            next_cursor = encode_cursor(
+                visible[-1].created, visible[-1].pk)
+            break
+        else:
+            visible.append(post)
+        if scanned == MAX_SCANS * chunk_size:
+            next_cursor = encode_cursor(post.created, post.pk)
+            break
+    page = Page(visible, 1, Paginator(visible, per_page))
+    page.next_cursor = next_cursor
+    page.continued = 'after' in request.GET
+    # Для ключа кэша фрагментов: все курсорные страницы выводятся
+    # как <Page 1 of 1>, различают их позиция и набор скрытых.
+    page.cache_key = 'cursor:{}:{}'.format(
+        request.GET.get('after', ''),
+        zlib.crc32(','.join(map(str, sorted(hidden))).encode()))
+    return page
+
+
+def cursor_page(request, posts, hidden, per_page=None, limit=None):
+    """Страница ленты posts без постов авторов из hidden.
+
+    Вместо OFFSET и anti-join в SQL лента читается курсором,
+    а скрытые авторы отбрасываются в памяти. limit, как срез
+    у постраничной ленты, оставляет только limit последних постов
+    (скрытые среди них просто не показываются).
+    """
+    if limit:
+        last = list(posts.order_by('-created', '-id').values_list(
+            'created', 'id')[limit - 1:limit])
+        if last:
+            posts = up_to(posts, last[0])
+    return merged_page(request, [posts], hidden, per_page)
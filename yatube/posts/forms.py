@@ -1,9 +1,32 @@
 from django import forms
 
-from .models import Post, Comment
+from . import duplicates
+from .models import Comment, NotificationSettings, Post
 
 
-class PostForm (forms.ModelForm):
+class DuplicateTextMixin:
+    """Отклоняет текст, почти повторяющий недавний текст того же
+    автора: повторы одного спамера, а не случайное сходство с чужими.
+
+    Автор передаётся аргументом author, при правке берётся из instance.
+    """
+    duplicate_message = None
+
+    def __init__(self, *args, author=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.author = author
+
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        author_id = self.author.pk if self.author else self.instance.author_id
+        if author_id is not None and duplicates.find_duplicate(
+                self._meta.model.objects.filter(author_id=author_id), text,
+                exclude=self.instance.pk):
+            raise forms.ValidationError(self.duplicate_message)
+        return text
+
+
+class PostForm (DuplicateTextMixin, forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
@@ -18,8 +41,10 @@ class PostForm (forms.ModelForm):
             'image': 'Изображение, которое будет относиться к посту',
         }
 
+    duplicate_message = 'Почти такой же пост уже публиковался'
+
 
-class CommentForm (forms.ModelForm):
+class CommentForm (DuplicateTextMixin, forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
@@ -29,3 +54,15 @@ class CommentForm (forms.ModelForm):
         help_texts = {
             'text': 'Введите комментарий к посту',
         }
+
+    duplicate_message = 'Почти такой же комментарий уже публиковался'
+
+
+class NotificationSettingsForm (forms.ModelForm):
+    class Meta:
+        model = NotificationSettings
+        fields = ('email_frequency',)
+        help_texts = {
+            'email_frequency': 'Как присылать письма о новых постах '
+                               'авторов, на которых вы подписаны',
+        }
@@ -0,0 +1,289 @@
+import csv
+import json
+import os
+from time import perf_counter
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.page_cache import purge_tags
+from . import duplicates
+from .models import Comment, CommentBand, Group, Post, PostBand, User
+from .seeding import explicit_timestamps
+
+BATCH_SIZE = 5000
+# Сколько ошибок хранить для отчёта; считаются все.
+MAX_REPORTED_ERRORS = 100
+# Ограничение SQLite на число параметров в запросе.
+LOOKUP_CHUNK = 500
+
+
+class RecordError(ValueError):
+    pass
+
+
+def _read_csv(file):
+    for number, row in enumerate(csv.DictReader(file), 1):
+        if row.get('comments'):
+            try:
+                row['comments'] = json.loads(row['comments'])
+            except ValueError:
+                pass
+        yield number, row
+
+
+def _read_jsonl(file):
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as error:
+            yield number, RecordError(f'Неверный JSON: {error}')
+
+
+READERS = {'csv': _read_csv, 'jsonl': _read_jsonl, 'ndjson': _read_jsonl}
+
+
+def read_records(path, format=None):
+    """Построчно читает JSONL или CSV, не загружая файл в память.
+
+    Возвращает пары (номер записи, словарь). В CSV комментарии
+    передаются в колонке comments как JSON-список.
+    """
+    format = format or os.path.splitext(path)[1].lstrip('.').lower()
+    if format not in READERS:
+        raise RecordError(f'Неизвестный формат: {format}')
+    with open(path, encoding='utf-8', newline='') as file:
+        yield from READERS[format](file)
+
+
+def _parse_created(value, default):
+    if not value:
+        return default
+    created = parse_datetime(value)
+    if created is None:
+        raise RecordError(f'Неверная дата: {value}')
+    if timezone.is_naive(created):
+        created = timezone.make_aware(created)
+    return created
+
+
+def _slug(value):
+    if not value:
+        return None
+    try:
+        validate_slug(value)
+    except ValidationError:
+        raise RecordError(f'Неверный slug группы: {value}')
+    return value
+
+
+def _require(record, field):
+    value = record.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise RecordError(f'Пустое поле {field}')
+    return value
+
+
+def _bulk_create(model, objects):
+    last_id = model.objects.aggregate(last=Max('id'))['last'] or 0
+    model.objects.bulk_create(objects)
+    if objects and objects[0].pk is None:
+        # SQLite не возвращает id из bulk_create: внутри транзакции
+        # новые id идут подряд в порядке вставки.
+        ids = model.objects.filter(id__gt=last_id).order_by(
+            'id').values_list('id', flat=True)
+        for obj, pk in zip(objects, ids):
+            obj.pk = pk
+
+
+class Importer:
+    """Пакетный импорт постов с комментариями.
+
+    Авторы и группы ищутся по словарям username -> id и slug -> id,
+    загруженным один раз. Каждая пачка записей вставляется через
+    bulk_create в своей транзакции, после неё пишется контрольная
+    точка: число обработанных записей источника.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, dry_run=False,
+                 create_users=False, checkpoint=None, progress=None):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.create_users = create_users
+        self.checkpoint = checkpoint
+        self.progress = progress or (lambda stats: None)
+        self.users = dict(
+            User.objects.values_list('username', 'id').iterator())
+        self.groups = dict(Group.objects.values_list('slug', 'id').iterator())
+        self.stats = {
+            'records': 0, 'skipped': 0, 'posts': 0, 'comments': 0,
+            'users_created': 0, 'groups_created': 0, 'errors': 0,
+            'elapsed_s': 0.0,
+        }
+        self.errors = []
+        self.new_users = []
+        self.new_groups = []
+
+    def parse(self, record):
+        if isinstance(record, RecordError):
+            raise record
+        if not isinstance(record, dict):
+            raise RecordError('Запись не является объектом')
+        post = {
+            'author': self._author(_require(record, 'author')),
+            'text': _require(record, 'text'),
+            'group': _slug(record.get('group')),
+            'image': record.get('image') or '',
+            'created': _parse_created(record.get('created'), timezone.now()),
+            'comments': [],
+        }
+        comments = record.get('comments') or []
+        if not isinstance(comments, list):
+            raise RecordError('Поле comments должно быть списком')
+        for comment in comments:
+            if not isinstance(comment, dict):
+                raise RecordError('Комментарий не является объектом')
+            post['comments'].append({
+                'author': self._author(_require(comment, 'author')),
+                'text': _require(comment, 'text'),
+                'created': _parse_created(
+                    comment.get('created'), post['created']),
+            })
+        return post
+
+    def _author(self, username):
+        if username not in self.users and not self.create_users:
+            raise RecordError(f'Нет пользователя {username}')
+        return username
+
+    def run(self, records, start=0):
+        """Импортирует записи, пропустив первые start."""
+        began = perf_counter()
+        batch = []
+        for number, record in records:
+            self.stats['records'] += 1
+            if self.stats['records'] <= start:
+                self.stats['skipped'] += 1
+                continue
+            try:
+                batch.append(self.parse(record))
+            except RecordError as error:
+                self.stats['errors'] += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append((number, str(error)))
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+                self.stats['elapsed_s'] = perf_counter() - began
+                self.progress(self.stats)
+        self.flush(batch)
+        self._save_checkpoint()
+        self.stats['elapsed_s'] = perf_counter() - began
+        return self.stats
+
+    def flush(self, batch):
+        if not batch:
+            return
+        if self.dry_run:
+            for post in batch:
+                self._count_new(post)
+            self.stats['users_created'] += len(self.new_users)
+            self.stats['groups_created'] += len(self.new_groups)
+            self.new_users, self.new_groups = [], []
+            return
+        with transaction.atomic(), explicit_timestamps(Post, Comment):
+            for post in batch:
+                self._count_new(post)
+            self._create_missing()
+            posts = [
+                Post(author_id=self.users[post['author']],
+                     group_id=self.groups[post['group']]
+                     if post['group'] else None,
+                     text=post['text'], image=post['image'],
+                     created=post['created'], updated=post['created'],
+                     minhash=duplicates.fingerprint(post['text']))
+                for post in batch
+            ]
+            _bulk_create(Post, posts)
+            comments = [
+                Comment(author_id=self.users[comment['author']],
+                        post_id=obj.pk, text=comment['text'],
+                        created=comment['created'],
+                        minhash=duplicates.fingerprint(comment['text']))
+                for post, obj in zip(batch, posts)
+                for comment in post['comments']
+            ]
+            _bulk_create(Comment, comments)
+            duplicates.index(PostBand, 'post', posts)
+            duplicates.index(CommentBand, 'comment', comments)
+        # bulk_create не отправляет сигналы, кэш страниц сбрасываем сами.
+        tags = {'index'}
+        for obj in posts:
+            tags.add(f'author:{obj.author_id}')
+            if obj.group_id:
+                tags.add(f'group:{obj.group_id}')
+        purge_tags(*tags)
+        self.stats['posts'] += len(posts)
+        self.stats['comments'] += len(comments)
+        self._save_checkpoint()
+
+    def _count_new(self, post):
+        usernames = [post['author']] + [
+            comment['author'] for comment in post['comments']]
+        for username in usernames:
+            if username not in self.users:
+                self.users[username] = None
+                self.new_users.append(username)
+        if post['group'] and post['group'] not in self.groups:
+            self.groups[post['group']] = None
+            self.new_groups.append(post['group'])
+        if self.dry_run:
+            self.stats['posts'] += 1
+            self.stats['comments'] += len(post['comments'])
+
+    def _create_missing(self):
+        # Новые авторы и группы появляются только при первом упоминании,
+        # словари дополняются id созданных записей.
+        User.objects.bulk_create(
+            User(username=username, password='!')
+            for username in self.new_users)
+        Group.objects.bulk_create(
+            Group(slug=slug, title=slug, description='')
+            for slug in self.new_groups)
+        for start in range(0, len(self.new_users), LOOKUP_CHUNK):
+            self.users.update(User.objects.filter(
+                username__in=self.new_users[start:start + LOOKUP_CHUNK],
+            ).values_list('username', 'id'))
+        for start in range(0, len(self.new_groups), LOOKUP_CHUNK):
+            self.groups.update(Group.objects.filter(
+                slug__in=self.new_groups[start:start + LOOKUP_CHUNK],
+            ).values_list('slug', 'id'))
+        self.stats['users_created'] += len(self.new_users)
+        self.stats['groups_created'] += len(self.new_groups)
+        self.new_users, self.new_groups = [], []
+
+    def _save_checkpoint(self):
+        if self.checkpoint and not self.dry_run:
+            save_checkpoint(self.checkpoint, self.stats['records'])
+
+
+def load_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as file:
+        return json.load(file)['records']
+
+
+def save_checkpoint(path, records):
+    # Запись через временный файл: прерванный импорт не оставит
+    # повреждённую контрольную точку.
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump({'records': records}, file)
+    os.replace(temp_path, path)
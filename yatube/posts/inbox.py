@@ -0,0 +1,44 @@
+from django.core.cache import cache
+
+from .models import Notification
+
+# Счётчик в кэше меняется на месте при каждом уведомлении; время
+# жизни ограничивает расхождение, если инкремент разминулся с
+# пересчётом после промаха.
+UNREAD_TIMEOUT = 60 * 60
+
+
+def unread_key(user_id):
+    return f'inbox:unread:{user_id}'
+
+
+def unread_count(user_id):
+    """Число непрочитанных уведомлений; COUNT(*) только при промахе."""
+    count = cache.get(unread_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(
+            user_id=user_id, read=False).count()
+        # add, а не set: не затирать счётчик, который уже увеличили.
+        cache.add(unread_key(user_id), count, UNREAD_TIMEOUT)
+    return count
+
+
+def notify(user_ids, kind, actor_id, post_id=None):
+    """Кладёт уведомление во входящие пользователей и увеличивает
+    их счётчики непрочитанных."""
+    Notification.objects.bulk_create(
+        Notification(user_id=user_id, kind=kind, actor_id=actor_id,
+                     post_id=post_id)
+        for user_id in user_ids)
+    for user_id in user_ids:
+        try:
+            cache.incr(unread_key(user_id))
+        except ValueError:
+            # Счётчика нет в кэше: он посчитается при следующем чтении.
+            pass
+
+
+def mark_read(user_id):
+    Notification.objects.filter(user_id=user_id, read=False).update(
+        read=True)
+    cache.set(unread_key(user_id), 0, UNREAD_TIMEOUT)
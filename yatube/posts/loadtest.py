@@ -0,0 +1,220 @@
+import random
+import threading
+from collections import defaultdict
+from time import perf_counter
+
+import requests
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from .benchmark import percentile
+from .models import Group, Post, User
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+# Веса сценариев: имя метода Worker -> доля в трафике.
+SCENARIOS = {
+    'browse_index': 30,
+    'browse_group': 15,
+    'browse_profile': 15,
+    'browse_post': 15,
+    'follow_feed': 5,
+    'follow': 5,
+    'comment': 10,
+    'post_with_image': 5,
+}
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalServer:
+    """WSGI-приложение yatube на свободном порту в фоновом потоке."""
+
+    def __init__(self):
+        self.server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+        self.server.set_app(WSGIHandler())
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Worker(threading.Thread):
+    """Поток, выполняющий сценарии от имени одного пользователя."""
+
+    def __init__(self, base_url, user, data, weights, stop_at, rng):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.data = data
+        self.weights = weights
+        self.stop_at = stop_at
+        self.rng = rng
+        self.samples = []
+        client = Client()
+        client.force_login(user)
+        self.session = requests.Session()
+        self.session.cookies.set(
+            settings.SESSION_COOKIE_NAME,
+            client.cookies[settings.SESSION_COOKIE_NAME].value)
+
+    def request(self, url_name, method, path, expected=200, **kwargs):
+        start = perf_counter()
+        try:
+            response = self.session.request(
+                method, self.base_url + path, allow_redirects=False,
+                **kwargs)
+            error = None if response.status_code == expected else (
+                f'HTTP {response.status_code}')
+        except requests.RequestException as exc:
+            error = type(exc).__name__
+        self.samples.append((url_name, perf_counter() - start, error))
+
+    def post(self, url_name, path, data, files=None):
+        token = self.session.cookies.get('csrftoken')
+        # Успешная отправка формы заканчивается редиректом.
+        self.request(
+            url_name, 'post', path, expected=302, data=data, files=files,
+            headers={'X-CSRFToken': token or ''})
+
+    def run(self):
+        # Страница с формой ставит cookie csrftoken для POST-запросов.
+        self.session.get(self.base_url + reverse('posts:post_create'))
+        names = list(self.weights)
+        weights = list(self.weights.values())
+        while perf_counter() < self.stop_at:
+            getattr(self, self.rng.choices(names, weights)[0])()
+
+    def browse_index(self):
+        page = self.rng.randint(1, 3)
+        self.request(
+            'posts:index', 'get', f'{reverse("posts:index")}?page={page}')
+
+    def browse_group(self):
+        slug = self.rng.choice(self.data['groups'])
+        self.request('posts:group_list', 'get', reverse(
+            'posts:group_list', kwargs={'slug': slug}))
+
+    def browse_profile(self):
+        username = self.rng.choice(self.data['usernames'])
+        self.request('posts:profile', 'get', reverse(
+            'posts:profile', kwargs={'username': username}))
+
+    def browse_post(self):
+        post_id = self.rng.choice(self.data['posts'])
+        self.request('posts:post_detail', 'get', reverse(
+            'posts:post_detail', kwargs={'post_id': post_id}))
+
+    def follow_feed(self):
+        self.request(
+            'posts:follow_index', 'get', reverse('posts:follow_index'))
+
+    def follow(self):
+        username = self.rng.choice(self.data['usernames'])
+        self.request('posts:profile_follow', 'get', reverse(
+            'posts:profile_follow', kwargs={'username': username}),
+            expected=302)
+
+    def comment(self):
+        post_id = self.rng.choice(self.data['posts'])
+        self.post(
+            'posts:add_comment',
+            reverse('posts:add_comment', kwargs={'post_id': post_id}),
+            {'text': 'Комментарий нагрузочного теста'})
+
+    def post_with_image(self):
+        self.post(
+            'posts:post_create', reverse('posts:post_create'),
+            {'text': 'Пост нагрузочного теста',
+             'group': self.rng.choice(self.data['group_ids'])},
+            files={'image': ('small.gif', SMALL_GIF, 'image/gif')})
+
+
+def _test_data(sample_size=1000):
+    return {
+        'groups': list(Group.objects.values_list('slug', flat=True)),
+        'group_ids': list(Group.objects.values_list('id', flat=True)),
+        'usernames': list(User.objects.values_list(
+            'username', flat=True)[:sample_size]),
+        'posts': list(Post.objects.values_list('id', flat=True)[
+            :sample_size]),
+    }
+
+
+# Лимиты частоты исказили бы замеры отказами 429.
+@override_settings(RATE_LIMIT_ENABLED=False)
+def run(threads=8, duration=10.0, weights=None, seed=0):
+    """Нагружает локальный сервер смешанным трафиком.
+
+    Возвращает общую пропускную способность и по каждому имени URL:
+    число запросов, долю ошибок (неожиданный код ответа или сетевая
+    ошибка) и перцентили задержки.
+    """
+    weights = weights or SCENARIOS
+    data = _test_data()
+    users = list(User.objects.order_by('id')[:threads])
+    rng = random.Random(seed)
+    with LocalServer() as server:
+        stop_at = perf_counter() + duration
+        workers = [
+            Worker(server.url, user, data, weights, stop_at,
+                   random.Random(rng.random()))
+            for user in users
+        ]
+        start = perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = perf_counter() - start
+
+    by_name = defaultdict(list)
+    for worker in workers:
+        for url_name, latency, error in worker.samples:
+            by_name[url_name].append((latency, error))
+    total = sum(len(samples) for samples in by_name.values())
+    report = {
+        'threads': len(workers),
+        'duration_s': elapsed,
+        'requests': total,
+        'throughput_rps': total / elapsed,
+        'urls': {},
+    }
+    for url_name, samples in sorted(by_name.items()):
+        latencies = [latency for latency, _ in samples]
+        errors = defaultdict(int)
+        for _, error in samples:
+            if error:
+                errors[error] += 1
+        report['urls'][url_name] = {
+            'requests': len(samples),
+            'throughput_rps': len(samples) / elapsed,
+            'error_rate': sum(errors.values()) / len(samples),
+            'errors': dict(errors),
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+        }
+    return report
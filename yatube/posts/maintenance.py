@@ -0,0 +1,195 @@
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from sorl.thumbnail import default
+from sorl.thumbnail.kvstores.base import add_prefix, del_prefix
+from sorl.thumbnail.models import KVStore
+
+from core.metrics import registry
+from .models import Comment, Post
+
+BATCH_SIZE = 500
+PURGE = 'purge'
+ARCHIVE = 'archive'
+
+DURATION_BUCKETS = (1, 5, 15, 60, 300, 900, 3600)
+
+
+class Throttle:
+    """Ограничивает скорость обработки: не больше rate строк в секунду.
+
+    Обслуживание идёт пачками и между ними уступает базу и диск
+    основному трафику. rate = 0 снимает ограничение.
+    """
+
+    def __init__(self, rate=0):
+        self.rate = rate
+        self.start = time.monotonic()
+        self.done = 0
+
+    def wait(self, count):
+        self.done += count
+        if not self.rate:
+            return
+        delay = self.done / self.rate - (time.monotonic() - self.start)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Sweep:
+    """Один проход очистки: счётчики и метрики по виду объектов."""
+
+    def __init__(self, kind, throttle, dry_run=False):
+        self.kind = kind
+        self.throttle = throttle
+        self.dry_run = dry_run
+        self.scanned = 0
+        self.removed = 0
+        self.start = time.monotonic()
+
+    def batch(self, scanned, removed, action=PURGE):
+        self.scanned += scanned
+        self.removed += removed
+        if not self.dry_run:
+            registry.inc('yatube_maintenance_scanned_total', scanned,
+                         kind=self.kind)
+            registry.inc('yatube_maintenance_removed_total', removed,
+                         kind=self.kind, action=action)
+        self.throttle.wait(scanned)
+
+    def finish(self):
+        if not self.dry_run:
+            registry.observe(
+                'yatube_maintenance_duration_seconds',
+                time.monotonic() - self.start, buckets=DURATION_BUCKETS,
+                kind=self.kind)
+        return {'scanned': self.scanned, 'removed': self.removed}
+
+
+def _archive_path(archive_dir, *parts):
+    path = os.path.join(archive_dir, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def sweep_comments(mode=PURGE, archive_dir=None, batch_size=BATCH_SIZE,
+                   throttle=None, dry_run=False):
+    """Удаляет комментарии удалённых постов (post = NULL).
+
+    В режиме archive перед удалением дописывает их в
+    comments-<дата>.jsonl в archive_dir.
+    """
+    sweep = Sweep('comments', throttle or Throttle(), dry_run)
+    last_id = 0
+    while True:
+        rows = list(Comment.objects.filter(
+            post__isnull=True, id__gt=last_id,
+        ).order_by('id').values(
+            'id', 'author__username', 'text', 'created')[:batch_size])
+        if not rows:
+            return sweep.finish()
+        last_id = rows[-1]['id']
+        if not dry_run:
+            if mode == ARCHIVE:
+                path = _archive_path(
+                    archive_dir, f'comments-{datetime.now():%Y%m%d}.jsonl')
+                with open(path, 'a', encoding='utf-8') as file:
+                    for row in rows:
+                        row['created'] = row['created'].isoformat()
+                        file.write(
+                            json.dumps(row, ensure_ascii=False) + '\n')
+            Comment.objects.filter(
+                id__in=[row['id'] for row in rows]).delete()
+        sweep.batch(len(rows), len(rows), mode)
+
+
+def _referenced_images(names):
+    return set(Post.objects.filter(image__in=names).values_list(
+        'image', flat=True))
+
+
+def sweep_thumbnails(batch_size=BATCH_SIZE, throttle=None, dry_run=False):
+    """Удаляет миниатюры картинок, на которые не ссылается ни один пост.
+
+    Исходники с миниатюрами перечислены в хранилище ключей
+    sorl-thumbnail; оно обходится по ключу пачками.
+    """
+    sweep = Sweep('thumbnails', throttle or Throttle(), dry_run)
+    prefix = add_prefix('', identity='thumbnails')
+    last_key = ''
+    while True:
+        keys = list(KVStore.objects.filter(
+            key__startswith=prefix, key__gt=last_key,
+        ).order_by('key').values_list('key', flat=True)[:batch_size])
+        if not keys:
+            return sweep.finish()
+        last_key = keys[-1]
+        # Тот же разбор ключей, что и в KVStoreBase.cleanup().
+        sources = {
+            key: default.kvstore._get(del_prefix(key)) for key in keys}
+        referenced = _referenced_images(
+            [source.name for source in sources.values() if source])
+        removed = 0
+        for key, source in sources.items():
+            if source and source.name in referenced:
+                continue
+            removed += len(default.kvstore._get(
+                del_prefix(key), identity='thumbnails') or [])
+            if dry_run:
+                continue
+            if source:
+                default.kvstore.delete(source)
+            else:
+                default.kvstore._delete(
+                    del_prefix(key), identity='thumbnails')
+        sweep.batch(len(keys), removed)
+
+
+def _media_batches(directory, batch_size, min_age):
+    # os.scandir отдаёт файлы по одному: память не зависит от их числа.
+    newest = time.time() - min_age
+    batch = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.stat().st_mtime > newest:
+                continue
+            batch.append(entry.name)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def sweep_media(mode=PURGE, archive_dir=None, batch_size=BATCH_SIZE,
+                min_age=24 * 60 * 60, throttle=None, dry_run=False,
+                upload_to='posts'):
+    """Удаляет файлы картинок постов, на которые не ссылается ни один пост.
+
+    Файлы моложе min_age секунд пропускаются: пост с только что
+    загруженной картинкой мог ещё не сохраниться. В режиме archive
+    файлы переносятся в archive_dir/media.
+    """
+    sweep = Sweep('media', throttle or Throttle(), dry_run)
+    directory = os.path.join(settings.MEDIA_ROOT, upload_to)
+    if not os.path.isdir(directory):
+        return sweep.finish()
+    for batch in _media_batches(directory, batch_size, min_age):
+        names = [f'{upload_to}/{name}' for name in batch]
+        referenced = _referenced_images(names)
+        orphans = [name for name in names if name not in referenced]
+        if not dry_run:
+            for name in orphans:
+                if mode == ARCHIVE:
+                    shutil.move(
+                        default_storage.path(name),
+                        _archive_path(archive_dir, 'media', name))
+                else:
+                    default_storage.delete(name)
+        sweep.batch(len(names), len(orphans), mode)
+    return sweep.finish()
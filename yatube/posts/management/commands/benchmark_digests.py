@@ -0,0 +1,125 @@
+import json
+import platform
+import tracemalloc
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from posts import digests, seeding
+from posts.models import NotificationSettings, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк рассылки дайджестов на отдельной тестовой базе: '
+        'время, число запросов и пик памяти на заданное число получателей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=100000)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument(
+            '--days', type=int, default=7,
+            help='За сколько дней до запуска распределены посты.')
+        parser.add_argument(
+            '--frequency', choices=list(digests.PERIODS),
+            default=NotificationSettings.DAILY)
+        parser.add_argument(
+            '--batch-size', type=int, default=digests.BATCH_SIZE)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--memory', action='store_true',
+            help='Замерить пик памяти; tracemalloc замедляет рассылку.')
+        parser.add_argument(
+            '--output',
+            default=f'benchmark-digests-{datetime.now():%Y%m%dT%H%M%S}.json')
+
+    def handle(self, *args, **options):
+        # Данные бенчмарка не должны попасть в рабочую базу.
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            start = perf_counter()
+            self.seed(options)
+            seed_seconds = perf_counter() - start
+            self.stdout.write(f'Данные созданы за {seed_seconds:.1f} с')
+            result = self.measure(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f'получателей {options["recipients"]}: '
+            f'{result["seconds"]:.1f} с, писем {result["sent"]}, '
+            f'запросов {result["queries"]}')
+        if options['memory']:
+            self.stdout.write(
+                f'пик памяти {result["peak_memory_kb"]:.0f}KB')
+        report = {
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'options': {
+                key: options[key] for key in (
+                    'recipients', 'posts', 'follows_per_user', 'days',
+                    'frequency', 'batch_size', 'seed', 'memory')
+            },
+            'seed_seconds': seed_seconds,
+            'result': result,
+        }
+        with open(options['output'], 'w') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        self.stdout.write(f'Результаты записаны в {options["output"]}')
+
+    @staticmethod
+    def seed(options):
+        seeding.seed(
+            posts=options['posts'],
+            users=options['recipients'],
+            follows_per_user=options['follows_per_user'],
+            comments_per_post=0,
+            days=options['days'],
+            seed=options['seed'],
+        )
+        users = User.objects.filter(
+            username__startswith=seeding.username_prefix(options['seed']))
+        users.update(email=Concat('username', Value('@example.com')))
+        NotificationSettings.objects.bulk_create(
+            NotificationSettings(
+                user_id=user_id, email_frequency=options['frequency'])
+            for user_id in users.values_list('id', flat=True).iterator())
+
+    @staticmethod
+    def measure(options):
+        # Запуск на следующие сутки после последнего поста.
+        now = timezone.now() + timedelta(days=1)
+        if options['memory']:
+            tracemalloc.start()
+        start = perf_counter()
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.dummy.EmailBackend',
+        ), CaptureQueriesContext(connection) as queries:
+            run = digests.send_digests(
+                options['frequency'], now=now,
+                batch_size=options['batch_size'])
+        seconds = perf_counter() - start
+        result = {
+            'seconds': seconds,
+            'sent': run.sent,
+            'recipients_per_second': options['recipients'] / seconds,
+            'queries': len(queries),
+        }
+        if options['memory']:
+            result['peak_memory_kb'] = (
+                tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.stop()
+        return result
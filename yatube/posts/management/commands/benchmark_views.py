@@ -0,0 +1,92 @@
+import json
+import platform
+from datetime import datetime
+from time import perf_counter
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts import benchmark, seeding
+
+VIEWS = (
+    'posts:index', 'posts:group_list', 'posts:profile', 'posts:post_detail',
+    'posts:follow_index', 'posts:post_create', 'posts:add_comment',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк view приложения posts на отдельной тестовой базе. '
+        'Результаты пишутся в JSON для сравнения прогонов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--groups', type=int)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--comments-per-post', type=float, default=0.5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Запросов к каждому view.')
+        parser.add_argument(
+            '--warm-cache', action='store_true',
+            help='Не очищать кэш перед запросами.')
+        parser.add_argument(
+            '--view', action='append', choices=VIEWS,
+            help='Замерить только этот view (можно несколько раз).')
+        parser.add_argument(
+            '--output',
+            default=f'benchmark-{datetime.now():%Y%m%dT%H%M%S}.json')
+
+    def handle(self, *args, **options):
+        # Данные бенчмарка не должны попасть в рабочую базу.
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            start = perf_counter()
+            seeding.seed(
+                posts=options['posts'],
+                users=options['users'],
+                groups=options['groups'],
+                follows_per_user=options['follows_per_user'],
+                comments_per_post=options['comments_per_post'],
+                seed=options['seed'],
+            )
+            seed_seconds = perf_counter() - start
+            self.stdout.write(f'Данные созданы за {seed_seconds:.1f} с')
+            results = benchmark.run(
+                requests=options['requests'],
+                warm_cache=options['warm_cache'],
+                views=options['view'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:20} p50={result["p50_ms"]:.1f}ms '
+                f'p95={result["p95_ms"]:.1f}ms '
+                f'p99={result["p99_ms"]:.1f}ms '
+                f'queries={result["queries"]} '
+                f'peak={result["peak_memory_kb"]:.0f}KB'
+            )
+        report = {
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'options': {
+                key: options[key] for key in (
+                    'posts', 'users', 'groups', 'follows_per_user',
+                    'comments_per_post', 'seed', 'requests', 'warm_cache')
+            },
+            'seed_seconds': seed_seconds,
+            'results': results,
+        }
+        with open(options['output'], 'w') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        self.stdout.write(f'Результаты записаны в {options["output"]}')
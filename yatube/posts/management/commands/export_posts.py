@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporting import (
+    FORMATS, export_chunks, posts_of_author, posts_of_group
+)
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковая выгрузка постов автора или группы с комментариями '
+        'в JSONL, CSV или ZIP с картинками. Формат совместим с import_posts.'
+    )
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--author', help='username автора.')
+        source.add_argument('--group', help='slug группы.')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--output', help='Файл выгрузки, по умолчанию stdout.')
+
+    def handle(self, *args, **options):
+        if options['author']:
+            if not User.objects.filter(username=options['author']).exists():
+                raise CommandError(f'Нет пользователя {options["author"]}')
+            posts = posts_of_author(options['author'])
+        else:
+            if not Group.objects.filter(slug=options['group']).exists():
+                raise CommandError(f'Нет группы {options["group"]}')
+            posts = posts_of_group(options['group'])
+        chunks = export_chunks(posts, options['format'])
+        if not options['output']:
+            if options['format'] == 'zip':
+                raise CommandError('Для ZIP нужен --output')
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'wb') as file:
+            for chunk in chunks:
+                file.write(chunk if isinstance(chunk, bytes)
+                           else chunk.encode())
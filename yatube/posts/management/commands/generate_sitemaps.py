@@ -0,0 +1,34 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает sitemap постов, групп и профилей в gzip-файлы по '
+        'SITEMAP_CHUNK_SIZE ссылок и индекс sitemap.xml. Повторный запуск '
+        'пересобирает только изменившиеся файлы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directory', default=settings.SITEMAP_ROOT,
+            help='Куда писать файлы, по умолчанию SITEMAP_ROOT.')
+        parser.add_argument(
+            '--base-url', default=settings.SITE_URL,
+            help='Адрес сайта для ссылок, по умолчанию SITE_URL.')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересобрать все файлы.')
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        stats = sitemaps.generate(
+            options['directory'], options['base_url'], options['force'])
+        self.stdout.write(
+            f'Записано {stats["written"]}, без изменений '
+            f'{stats["unchanged"]}, удалено {stats["removed"]} файлов '
+            f'за {perf_counter() - start:.1f} с')
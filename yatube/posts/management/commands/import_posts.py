@@ -0,0 +1,78 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importing
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковый импорт постов с комментариями из JSONL или CSV. '
+        'Поля записи: author, text, group, image, created, comments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='По умолчанию определяется по расширению файла.')
+        parser.add_argument(
+            '--batch-size', type=int, default=importing.BATCH_SIZE)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только проверить записи, ничего не сохраняя.')
+        parser.add_argument(
+            '--create-users', action='store_true',
+            help='Создавать неизвестных авторов без пароля.')
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки, по умолчанию <path>.checkpoint.')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать с первой записи, игнорируя контрольную точку.')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            raise CommandError(f'Нет файла {options["path"]}')
+        checkpoint = options['checkpoint'] or f'{options["path"]}.checkpoint'
+        start = 0 if options['restart'] else importing.load_checkpoint(
+            checkpoint)
+        if start:
+            self.stdout.write(f'Продолжение с записи {start + 1}')
+
+        def progress(stats):
+            self.stdout.write(
+                f'{stats["records"]} записей, '
+                f'{stats["records"] / stats["elapsed_s"]:.0f} записей/с')
+
+        importer = importing.Importer(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            create_users=options['create_users'],
+            checkpoint=checkpoint,
+            progress=progress,
+        )
+        try:
+            stats = importer.run(
+                importing.read_records(options['path'], options['format']),
+                start=start)
+        except importing.RecordError as error:
+            raise CommandError(error)
+
+        for number, message in importer.errors:
+            self.stderr.write(f'Запись {number}: {message}')
+        if stats['errors'] > len(importer.errors):
+            self.stderr.write(
+                f'... и ещё {stats["errors"] - len(importer.errors)} ошибок')
+        prefix = 'Проверено' if options['dry_run'] else 'Импортировано'
+        elapsed = stats['elapsed_s'] or 1e-9
+        self.stdout.write(
+            f'{prefix}: {stats["posts"]} постов, '
+            f'{stats["comments"]} комментариев, '
+            f'новых пользователей {stats["users_created"]}, '
+            f'новых групп {stats["groups_created"]}, '
+            f'ошибок {stats["errors"]}, пропущено {stats["skipped"]}. '
+            f'{stats["records"] - stats["skipped"]} записей '
+            f'за {stats["elapsed_s"]:.1f} с, '
+            f'{(stats["records"] - stats["skipped"]) / elapsed:.0f} '
+            f'записей/с')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import duplicates
+from posts.models import Comment, CommentBand, Post, PostBand
+
+MODELS = {
+    'posts': (Post, PostBand, 'post'),
+    'comments': (Comment, CommentBand, 'comment'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает отпечатки MinHash постов и комментариев, созданных без '
+        'них (bulk_create, данные до миграции), и строит индекс полос.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        for name, (model, band_model, field) in MODELS.items():
+            indexed = 0
+            last_id = 0
+            while True:
+                batch = list(model.objects.filter(
+                    minhash__isnull=True, id__gt=last_id,
+                ).order_by('id').only('id', 'text')[:options['batch_size']])
+                if not batch:
+                    break
+                last_id = batch[-1].pk
+                for obj in batch:
+                    obj.minhash = duplicates.fingerprint(obj.text)
+                batch = [obj for obj in batch if obj.minhash is not None]
+                with transaction.atomic():
+                    model.objects.bulk_update(batch, ['minhash'])
+                    duplicates.index(band_model, field, batch)
+                indexed += len(batch)
+            self.stdout.write(f'{name}: проиндексировано {indexed}')
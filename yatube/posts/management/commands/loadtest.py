@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from posts import loadtest, seeding
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест: локальный WSGI-сервер на отдельной SQLite-базе '
+        'и потоки со смешанным трафиком чтения и записи.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность нагрузки, в секундах.')
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--weight', action='append', default=[],
+            metavar='СЦЕНАРИЙ=ВЕС',
+            help='Вес сценария, например comment=30 '
+                 f'({", ".join(loadtest.SCENARIOS)}).')
+        parser.add_argument('--output', help='Файл для отчёта в JSON.')
+
+    def handle(self, *args, **options):
+        weights = dict(loadtest.SCENARIOS)
+        for item in options['weight']:
+            name, _, value = item.partition('=')
+            if name not in weights or not value.isdigit():
+                raise CommandError(f'Неверный вес сценария: {item}')
+            weights[name] = int(value)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            report = self.measure(temp_dir, weights, options)
+
+        self.stdout.write(
+            f'{report["requests"]} запросов за {report["duration_s"]:.1f} с, '
+            f'{report["throughput_rps"]:.1f} запр/с')
+        for name, result in report['urls'].items():
+            self.stdout.write(
+                f'{name:22} n={result["requests"]:<6} '
+                f'rps={result["throughput_rps"]:.1f} '
+                f'errors={result["error_rate"]:.1%} '
+                f'p50={result["p50_ms"]:.1f}ms '
+                f'p95={result["p95_ms"]:.1f}ms '
+                f'p99={result["p99_ms"]:.1f}ms'
+            )
+            for error, count in result['errors'].items():
+                self.stdout.write(f'    {error}: {count}')
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2, ensure_ascii=False)
+
+    def measure(self, temp_dir, weights, options):
+        # База в файле, а не в памяти: потоки сервера должны видеть
+        # одни данные и конкурировать за блокировки SQLite.
+        test_settings = connection.settings_dict['TEST']
+        old_test_name = test_settings['NAME']
+        test_settings['NAME'] = os.path.join(temp_dir, 'loadtest.sqlite3')
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            seeding.seed(
+                posts=options['posts'],
+                users=max(options['threads'], options['posts'] // 50),
+                seed=options['seed'])
+            with override_settings(MEDIA_ROOT=temp_dir):
+                return loadtest.run(
+                    threads=options['threads'],
+                    duration=options['duration'],
+                    weights=weights,
+                    seed=options['seed'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = old_test_name
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import deletion
+from posts.models import Deletion, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Фоновое удаление пользователей и постов небольшими пачками. '
+        'Запускается по расписанию; прерванное удаление продолжается '
+        'со следующего запуска.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', default=[], metavar='USERNAME',
+            help='Скрыть пользователя и поставить его в очередь удаления.')
+        parser.add_argument(
+            '--post', action='append', default=[], type=int, metavar='ID',
+            help='Поставить пост в очередь удаления.')
+        parser.add_argument(
+            '--batch-size', type=int, default=deletion.BATCH_SIZE)
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пачками, в секундах.')
+        parser.add_argument(
+            '--status', action='store_true',
+            help='Только показать незавершённые удаления.')
+
+    def handle(self, *args, **options):
+        for username in options['user']:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'Нет пользователя {username}')
+            deletion.schedule_user_deletion(user)
+        for pk in options['post']:
+            post = Post.objects.filter(pk=pk).first()
+            if post is None:
+                raise CommandError(f'Нет поста {pk}')
+            deletion.schedule_post_deletion(post)
+
+        if options['status']:
+            for item in Deletion.objects.filter(
+                    finished__isnull=True).order_by('id'):
+                left = ', '.join(
+                    f'{name} {count}'
+                    for name, count in deletion.remaining(item).items())
+                self.stdout.write(
+                    f'{item}: удалено {item.deleted}, осталось: {left}')
+            return
+
+        def progress(item):
+            state = 'готово' if item.finished else 'в работе'
+            self.stdout.write(f'{item}: удалено {item.deleted}, {state}')
+
+        deletion.process(
+            batch_size=options['batch_size'], pause=options['pause'],
+            progress=progress)
@@ -0,0 +1,66 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import seeding
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'подписками и комментариями. При одном --seed данные совпадают.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument(
+            '--users', type=int,
+            help='По умолчанию один автор на 50 постов.')
+        parser.add_argument(
+            '--groups', type=int,
+            help='По умолчанию одна группа на 1000 постов.')
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--comments-per-post', type=float, default=0.5)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределить посты.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=seeding.BATCH_SIZE,
+            help='Строк в одном bulk_create и одной транзакции.')
+
+    def handle(self, *args, **options):
+        prefix = seeding.username_prefix(options['seed'])
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f'Данные с --seed {options["seed"]} уже есть в базе.')
+        rows = {}
+        start = perf_counter()
+
+        def progress(model, count):
+            name = model.__name__
+            rows[name] = rows.get(name, 0) + count
+            elapsed = perf_counter() - start
+            self.stdout.write(
+                f'\r{name}: {rows[name]} ({elapsed:.0f} с)', ending='')
+            self.stdout.flush()
+
+        seeding.seed(
+            posts=options['posts'],
+            users=options['users'],
+            groups=options['groups'],
+            follows_per_user=options['follows_per_user'],
+            comments_per_post=options['comments_per_post'],
+            days=options['days'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=progress,
+        )
+        elapsed = perf_counter() - start
+        self.stdout.write('')
+        for name, count in rows.items():
+            self.stdout.write(f'{name:10} {count}')
+        self.stdout.write(
+            f'Готово за {elapsed:.1f} с, '
+            f'{sum(rows.values()) / elapsed:.0f} строк/с')
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts import digests
+from posts.models import NotificationSettings
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылка дайджестов новых постов в подписках за последний '
+        'завершённый день или неделю. Запускается по расписанию; '
+        'после сбоя продолжает с места остановки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--frequency', choices=list(digests.PERIODS),
+            default=NotificationSettings.DAILY)
+        parser.add_argument(
+            '--batch-size', type=int, default=digests.BATCH_SIZE)
+        parser.add_argument(
+            '--now', help='Момент запуска в ISO 8601, по умолчанию сейчас.')
+
+    def handle(self, *args, **options):
+        now = None
+        if options['now']:
+            try:
+                now = datetime.fromisoformat(options['now'])
+            except ValueError as error:
+                raise CommandError(f'--now: {error}')
+            if timezone.is_naive(now):
+                now = timezone.make_aware(now)
+        run = digests.send_digests(
+            options['frequency'], now=now,
+            batch_size=options['batch_size'],
+            progress=lambda run: self.stdout.write(
+                f'получатели до id {run.last_user_id}, писем {run.sent}'))
+        self.stdout.write(
+            f'{run}: отправлено писем {run.sent}, '
+            f'завершено {run.finished:%Y-%m-%d %H:%M}')
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.metrics import registry
+from posts import maintenance
+
+MODES = (maintenance.PURGE, maintenance.ARCHIVE, 'keep')
+
+
+class Command(BaseCommand):
+    help = (
+        'Периодическая очистка: комментарии удалённых постов, миниатюры '
+        'и файлы картинок, на которые не ссылается ни один пост.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--comments', choices=MODES, default=maintenance.PURGE,
+            help='Что делать с комментариями без поста.')
+        parser.add_argument(
+            '--media', choices=MODES, default=maintenance.PURGE,
+            help='Что делать с картинками без поста.')
+        parser.add_argument(
+            '--thumbnails', choices=(maintenance.PURGE, 'keep'),
+            default=maintenance.PURGE)
+        parser.add_argument(
+            '--archive-dir', default=settings.ARCHIVE_ROOT)
+        parser.add_argument(
+            '--batch-size', type=int, default=maintenance.BATCH_SIZE)
+        parser.add_argument(
+            '--max-rate', type=float, default=1000,
+            help='Не больше стольких проверенных объектов в секунду; '
+                 '0 - без ограничения.')
+        parser.add_argument(
+            '--min-age-hours', type=float, default=24,
+            help='Не трогать файлы моложе стольких часов.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, ничего не удаляя.')
+
+    def handle(self, *args, **options):
+        throttle = maintenance.Throttle(options['max_rate'])
+        common = {
+            'batch_size': options['batch_size'],
+            'throttle': throttle,
+            'dry_run': options['dry_run'],
+        }
+        results = {}
+        if options['comments'] != 'keep':
+            results['comments'] = maintenance.sweep_comments(
+                mode=options['comments'],
+                archive_dir=options['archive_dir'], **common)
+        if options['thumbnails'] != 'keep':
+            results['thumbnails'] = maintenance.sweep_thumbnails(**common)
+        if options['media'] != 'keep':
+            results['media'] = maintenance.sweep_media(
+                mode=options['media'], archive_dir=options['archive_dir'],
+                min_age=options['min_age_hours'] * 60 * 60, **common)
+        registry.flush()
+        verb = 'найдено' if options['dry_run'] else 'очищено'
+        for kind, result in results.items():
+            self.stdout.write(
+                f'{kind}: проверено {result["scanned"]}, '
+                f'{verb} {result["removed"]}')
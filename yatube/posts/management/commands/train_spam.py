@@ -0,0 +1,100 @@
+import time
+import zlib
+from itertools import chain, islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import spam
+from posts.models import Comment, Post, SpamLabel
+
+
+def unlabelled_ham():
+    """Посты и комментарии, которые можно считать обычными текстами:
+    не отмеченные, не размеченные модераторами и не ждущие удаления."""
+    labelled_texts = SpamLabel.objects.values('text')
+    return (
+        Post.objects.filter(
+            flagged=False, deleted=False, author__is_active=True,
+        ).exclude(text__in=labelled_texts),
+        Comment.objects.filter(
+            flagged=False, post__deleted=False, author__is_active=True,
+        ).exclude(text__in=labelled_texts),
+    )
+
+
+def labelled(options):
+    """Пары (текст, метка): отметки модераторов и не отмеченные посты
+    и комментарии как пример обычных текстов."""
+    ham_limit = options['ham_limit']
+    return chain(
+        ((text, 1) for text in SpamLabel.objects.filter(
+            spam=True).values_list('text', flat=True).iterator()),
+        ((text, 0) for text in SpamLabel.objects.filter(
+            spam=False).values_list('text', flat=True).iterator()),
+        *(
+            ((text, 0) for text in queryset.order_by('-id').values_list(
+                'text', flat=True)[:ham_limit].iterator())
+            for queryset in unlabelled_ham()
+        ),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Обучает классификатор спама на отметках модераторов и '
+        'сохраняет модель в SPAM_MODEL_PATH.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None)
+        parser.add_argument('--bits', type=int, default=spam.FEATURE_BITS,
+                            help='Размер модели: 2 ** bits весов.')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--ham-limit', type=int, default=200000,
+                            help='Сколько последних постов и комментариев '
+                                 'взять как не спам.')
+        parser.add_argument('--test-percent', type=int, default=20,
+                            help='Доля текстов для проверки, не обучения.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        trainer = spam.Trainer(options['bits'])
+        test = []
+        pairs = labelled(options)
+        while True:
+            batch = list(islice(pairs, options['batch_size']))
+            if not batch:
+                break
+            train = []
+            for pair in batch:
+                # Разбиение по тексту не меняется между запусками.
+                bucket = zlib.crc32(pair[0].encode()) % 100
+                (test if bucket < options['test_percent'] else train).append(
+                    pair)
+            if train:
+                trainer.update(*zip(*train))
+        spam_documents = trainer.documents[1]
+        if not spam_documents:
+            raise CommandError('Нет текстов, отмеченных как спам.')
+        output = options['output'] or settings.SPAM_MODEL_PATH
+        trainer.save(output)
+        self.stdout.write(
+            f'Обучено на {trainer.documents.sum()} текстах, из них спам '
+            f'{spam_documents}, за {time.perf_counter() - start:.1f} с; '
+            f'модель {output}')
+        if test:
+            self.evaluate(spam.Model(output), test)
+
+    def evaluate(self, model, test):
+        start = time.perf_counter()
+        predicted = [
+            model.score(text) >= settings.SPAM_THRESHOLD for text, _ in test]
+        elapsed = time.perf_counter() - start
+        hits = sum(p and label for p, (_, label) in zip(predicted, test))
+        precision = hits / max(sum(predicted), 1)
+        recall = hits / max(sum(label for _, label in test), 1)
+        self.stdout.write(
+            f'Проверка на {len(test)} текстах: точность {precision:.3f}, '
+            f'полнота {recall:.3f}, '
+            f'{elapsed / len(test) * 1e6:.0f} мкс на текст')
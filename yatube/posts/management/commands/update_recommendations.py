@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации "кого почитать" по графу подписок. '
+        'Запускается по расписанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=recommendations.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        graph = recommendations.update_recommendations(
+            options['batch_size'],
+            progress=lambda last: self.stdout.write(
+                f'пользователи до id {last}'))
+        self.stdout.write(
+            f'Граф: {graph.size} пользователей, '
+            f'{len(graph.following[1])} подписок; '
+            f'пересчитано за {time.perf_counter() - start:.1f} с')
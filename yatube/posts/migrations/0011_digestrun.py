@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_notificationsettings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('frequency', models.CharField(choices=[('instant', 'Сразу'), ('daily', 'Раз в день'), ('weekly', 'Раз в неделю'), ('off', 'Не присылать')], max_length=10, verbose_name='Частота')),
+                ('period_end', models.DateTimeField(verbose_name='Конец периода')),
+                ('last_user_id', models.PositiveIntegerField(default=0, verbose_name='Последний обработанный получатель')),
+                ('sent', models.PositiveIntegerField(default=0, verbose_name='Отправлено писем')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+            ],
+            options={
+                'verbose_name': 'Рассылка дайджестов',
+                'verbose_name_plural': 'Рассылки дайджестов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='digestrun',
+            constraint=models.UniqueConstraint(fields=('frequency', 'period_end'), name='unique_digest_run_period'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='minhash',
+            field=models.BinaryField(blank=True, null=True, verbose_name='MinHash текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='minhash',
+            field=models.BinaryField(blank=True, null=True, verbose_name='MinHash текста'),
+        ),
+        migrations.CreateModel(
+            name='PostBand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True, verbose_name='Хэш полосы')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='minhash_bands', to='posts.Post')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CommentBand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True, verbose_name='Хэш полосы')),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='minhash_bands', to='posts.Comment')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
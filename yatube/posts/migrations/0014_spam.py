@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_minhash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpamLabel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10, verbose_name='Что отмечено')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('spam', models.BooleanField(verbose_name='Спам')),
+            ],
+            options={
+                'verbose_name': 'Отметка спама',
+                'verbose_name_plural': 'Отметки спама',
+            },
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='flagged',
+            field=models.BooleanField(default=False, verbose_name='Похоже на спам'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='flagged',
+            field=models.BooleanField(default=False, verbose_name='Похоже на спам'),
+        ),
+    ]
@@ -42,6 +42,15 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    # Версия карточки поста в кэше шаблонов
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+    # Отпечаток текста для поиска почти дубликатов, см. posts.duplicates
+    minhash = models.BinaryField('MinHash текста', null=True, blank=True)
+    # Отметка классификатора posts.spam для модераторов
+    flagged = models.BooleanField('Похоже на спам', default=False)
+    # Пост в очереди фонового удаления: скрыт сразу, строки удаляет
+    # process_deletions
+    deleted = models.BooleanField('Удалён', default=False)
 
     class Meta:
         ordering = ['-created']
@@ -72,6 +81,8 @@ class Comment(CreatedModel):
         verbose_name='Пост',
         help_text='Пост, к которой будет относиться комментарий'
     )
+    minhash = models.BinaryField('MinHash текста', null=True, blank=True)
+    flagged = models.BooleanField('Похоже на спам', default=False)
 
     class Meta:
         default_related_name = 'comments'
@@ -82,6 +93,24 @@ class Comment(CreatedModel):
         return self.text[:15]
 
 
+class MinHashBand(models.Model):
+    """Полоса отпечатка текста: индекс поиска почти дубликатов."""
+    key = models.BigIntegerField('Хэш полосы', db_index=True)
+
+    class Meta:
+        abstract = True
+
+
+class PostBand(MinHashBand):
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='minhash_bands')
+
+
+class CommentBand(MinHashBand):
+    comment = models.ForeignKey(
+        Comment, on_delete=models.CASCADE, related_name='minhash_bands')
+
+
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
@@ -103,3 +132,244 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=['user', 'author'],
                                     name='unique_follow_user_author'),
         ]
+
+
+class GroupFollow(models.Model):
+    """Подписка пользователя на группу: её посты идут в ленту подписок."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_follows',
+        verbose_name='Подписчик'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name='Группа'
+    )
+
+    class Meta:
+        verbose_name = 'Подписка на группу'
+        verbose_name_plural = 'Подписки на группы'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'group'],
+                                    name='unique_follow_user_group'),
+        ]
+
+
+class Block(CreatedModel):
+    """Автор, которого пользователь скрыл из своих лент.
+
+    Заглушённый (MUTE) просто не показывается; заблокированный (BLOCK)
+    вдобавок теряет подписку на пользователя и не может её вернуть,
+    а его действия не попадают пользователю во входящие.
+    """
+    MUTE = 'mute'
+    BLOCK = 'block'
+    KINDS = ((MUTE, 'Скрыть посты'), (BLOCK, 'Заблокировать'))
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='blocks',
+        verbose_name='Кто скрыл',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='blocked_by',
+        verbose_name='Кого скрыл',
+    )
+    kind = models.CharField('Как', max_length=10, choices=KINDS)
+
+    class Meta:
+        verbose_name = 'Блокировка'
+        verbose_name_plural = 'Блокировки'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_block_user_author'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}: {self.kind}'
+
+
+class Deletion(CreatedModel):
+    """Заявка на фоновое удаление пользователя или поста."""
+    USER = 'user'
+    POST = 'post'
+    KINDS = ((USER, 'Пользователь'), (POST, 'Пост'))
+
+    kind = models.CharField('Что удаляется', max_length=10, choices=KINDS)
+    object_id = models.PositiveIntegerField('id объекта')
+    deleted = models.PositiveIntegerField('Удалено строк', default=0)
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Фоновое удаление'
+        verbose_name_plural = 'Фоновые удаления'
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+class NotificationSettings(models.Model):
+    """Как пользователь получает письма о новых постах авторов."""
+    INSTANT = 'instant'
+    DAILY = 'daily'
+    WEEKLY = 'weekly'
+    OFF = 'off'
+    FREQUENCIES = (
+        (INSTANT, 'Сразу'),
+        (DAILY, 'Раз в день'),
+        (WEEKLY, 'Раз в неделю'),
+        (OFF, 'Не присылать'),
+    )
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notification_settings',
+        verbose_name='Пользователь'
+    )
+    email_frequency = models.CharField(
+        'Письма о новых постах',
+        max_length=10,
+        choices=FREQUENCIES,
+        default=INSTANT,
+    )
+
+    class Meta:
+        verbose_name = 'Настройки уведомлений'
+        verbose_name_plural = 'Настройки уведомлений'
+
+    def __str__(self):
+        return f'{self.user}: {self.email_frequency}'
+
+
+class DigestRun(CreatedModel):
+    """Рассылка дайджестов за период; хранит место, где она остановилась."""
+    frequency = models.CharField(
+        'Частота', max_length=10, choices=NotificationSettings.FREQUENCIES)
+    period_end = models.DateTimeField('Конец периода')
+    last_user_id = models.PositiveIntegerField(
+        'Последний обработанный получатель', default=0)
+    sent = models.PositiveIntegerField('Отправлено писем', default=0)
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Рассылка дайджестов'
+        verbose_name_plural = 'Рассылки дайджестов'
+        constraints = [
+            models.UniqueConstraint(fields=['frequency', 'period_end'],
+                                    name='unique_digest_run_period'),
+        ]
+
+    def __str__(self):
+        return f'{self.frequency} {self.period_end:%Y-%m-%d}'
+
+
+class Notification(CreatedModel):
+    """Уведомление во входящих пользователя."""
+    FOLLOW = 'follow'
+    COMMENT = 'comment'
+    POST = 'post'
+    KINDS = (
+        (FOLLOW, 'Новый подписчик'),
+        (COMMENT, 'Комментарий к посту'),
+        (POST, 'Новый пост в подписках'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    kind = models.CharField('Тип', max_length=10, choices=KINDS)
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Кто'
+    )
+    post = models.ForeignKey(
+        Post,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост'
+    )
+    read = models.BooleanField('Прочитано', default=False)
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        # Входящие читаются только по получателю, новые сверху.
+        indexes = [
+            models.Index(fields=['user', '-id'], name='notification_inbox'),
+            models.Index(fields=['user', 'read'],
+                         name='notification_unread'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} -> {self.user_id}'
+
+
+class SpamLabel(CreatedModel):
+    """Текст, который модератор отметил как спам или как не спам.
+
+    Обучающая выборка train_spam: текст хранится здесь, потому что
+    сам спам после отметки удаляется.
+    """
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = ((POST, 'Пост'), (COMMENT, 'Комментарий'))
+
+    kind = models.CharField('Что отмечено', max_length=10, choices=KINDS)
+    text = models.TextField('Текст')
+    spam = models.BooleanField('Спам')
+
+    class Meta:
+        verbose_name = 'Отметка спама'
+        verbose_name_plural = 'Отметки спама'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class Recommendation(models.Model):
+    """Автор, которого стоит предложить пользователю в подписки.
+
+    Таблицу целиком пересчитывает команда update_recommendations;
+    строки без пользователя - общий список для тех, у кого своих нет.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='recommendations',
+        verbose_name='Кому',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Кого',
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        indexes = [
+            models.Index(fields=['user', '-score'],
+                         name='recommendation_user'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.core.mail import get_connection, send_mass_mail
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from core.metrics import registry
+from core.tasks import task
+from . import inbox
+from .models import Follow, Notification, NotificationSettings, Post
+
+BATCH_SIZE = 500
+
+
+def instant_recipients(author_id):
+    """Подписчики автора, которым письмо о посте отправляется сразу.
+
+    Пользователи без строки настроек получают письма сразу;
+    остальные частоты обслуживают дайджесты.
+    """
+    return Follow.objects.filter(
+        author_id=author_id, user__is_active=True,
+    ).exclude(user__email='').exclude(
+        user__notification_settings__email_frequency__in=[
+            NotificationSettings.DAILY,
+            NotificationSettings.WEEKLY,
+            NotificationSettings.OFF,
+        ])
+
+
+@task(priority=-10)
+def notify_followers(post_id, batch_size=BATCH_SIZE):
+    """Раскладывает уведомления о новом посте на пачки подписок.
+
+    Подписки обходятся по id, каждая пачка - отдельные задачи писем
+    и входящих с диапазоном id: при повторе упавшей пачки остальным
+    подписчикам ничего не дублируется.
+    """
+    post = Post.objects.filter(pk=post_id).values('author_id').first()
+    if post is None:
+        return
+    follows = Follow.objects.filter(
+        author_id=post['author_id']).order_by('id')
+    last_id = 0
+    while True:
+        ids = list(follows.filter(id__gt=last_id).values_list(
+            'id', flat=True)[:batch_size])
+        if not ids:
+            return
+        send_post_emails.delay(post_id, ids[0], ids[-1])
+        deliver_post_notifications.delay(post_id, ids[0], ids[-1])
+        last_id = ids[-1]
+
+
+@task(priority=-10)
+def send_post_emails(post_id, first_id, last_id):
+    """Отправляет письма о посте подписчикам из диапазона подписок.
+
+    Текст одинаков для всех получателей и рендерится один раз;
+    вся пачка уходит через одно соединение с почтовым сервером.
+    """
+    post = Post.objects.select_related('author').filter(
+        pk=post_id, author__is_active=True, deleted=False).first()
+    if post is None:
+        return
+    emails = list(instant_recipients(post.author_id).filter(
+        id__gte=first_id, id__lte=last_id,
+    ).values_list('user__email', flat=True))
+    if not emails:
+        return
+    context = {
+        'post': post,
+        'url': settings.SITE_URL + reverse(
+            'posts:post_detail', args=(post.pk,)),
+    }
+    subject = render_to_string(
+        'posts/emails/new_post_subject.txt', context).strip()
+    body = render_to_string('posts/emails/new_post.txt', context)
+    sent = send_mass_mail(
+        [(subject, body, None, [email]) for email in emails],
+        connection=get_connection())
+    registry.inc('yatube_emails_sent_total', sent, kind='new_post')
+
+
+@task(priority=-10)
+def deliver_post_notifications(post_id, first_id, last_id):
+    """Кладёт уведомление о посте во входящие подписчиков из диапазона."""
+    post = Post.objects.filter(
+        pk=post_id, author__is_active=True, deleted=False,
+    ).values('author_id').first()
+    if post is None:
+        return
+    user_ids = list(Follow.objects.filter(
+        author_id=post['author_id'], user__is_active=True,
+        id__gte=first_id, id__lte=last_id,
+    ).values_list('user_id', flat=True))
+    inbox.notify(user_ids, Notification.POST, post['author_id'], post_id)
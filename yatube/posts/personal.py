@@ -0,0 +1,60 @@
+from core.personal import personal_context
+from . import blocking, inbox, recommendations
+from .forms import CommentForm
+from .models import Follow, GroupFollow
+
+
+@personal_context('posts/includes/post_actions.html')
+def post_actions(request, post_id):
+    return {'post_id': post_id, 'form': CommentForm()}
+
+
+@personal_context('posts/includes/follow_button.html')
+def follow_button(request, username, author_id=''):
+    user = request.user
+    following = (
+        user.is_authenticated
+        and user.username != username
+        and Follow.objects.filter(
+            user=user, author__username=username).exists()
+    )
+    hidden = blocked = False
+    if user.is_authenticated and author_id:
+        # Из кэша блокировок, без запроса к базе.
+        hidden = int(author_id) in blocking.hidden_authors(user.pk)
+        blocked = int(author_id) in blocking.blocked_authors(user.pk)
+    return {
+        'username': username,
+        'following': following,
+        'is_author': user.username == username,
+        'hidden': hidden,
+        'blocked': blocked,
+    }
+
+
+@personal_context('posts/includes/group_follow_button.html')
+def group_follow_button(request, slug):
+    user = request.user
+    return {
+        'slug': slug,
+        'following': user.is_authenticated and GroupFollow.objects.filter(
+            user=user, group__slug=slug).exists(),
+    }
+
+
+@personal_context('includes/header_user.html')
+def header_user(request, view_name=''):
+    user = request.user
+    return {
+        'view_name': view_name,
+        'unread': inbox.unread_count(user.pk) if user.is_authenticated else 0,
+    }
+
+
+@personal_context('posts/includes/who_to_follow.html')
+def who_to_follow(request):
+    user = request.user
+    return {
+        'suggestions': (
+            recommendations.for_user(user) if user.is_authenticated else []),
+    }
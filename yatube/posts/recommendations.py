@@ -0,0 +1,205 @@
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Follow, Recommendation
+
+TOP_K = 10
+BATCH_SIZE = 5000
+# Сколько похожих авторов хранится для каждого автора.
+SIMILAR = 50
+# Сколько подписчиков автора смотреть для его похожести с другими:
+# у популярного автора их сотни тысяч, а оценке хватает выборки.
+MAX_FOLLOWERS = 1000
+# У новичков без подписок рекомендации общие - самые популярные авторы.
+POPULAR = TOP_K
+
+
+def csr(sources, targets, size):
+    """Списки смежности в формате CSR: соседи вершины v -
+    indices[indptr[v]:indptr[v + 1]]."""
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=size), out=indptr[1:])
+    return indptr, targets[order]
+
+
+def expand(indptr, indices, rows, limit=None):
+    """Соседи всех вершин rows разом: номера в rows и сами соседи.
+
+    limit ограничивает число соседей каждой вершины первыми limit.
+    """
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    if limit is not None:
+        counts = np.minimum(counts, limit)
+    owners = np.repeat(np.arange(len(rows)), counts)
+    # Смещение каждого соседа внутри списка своей вершины.
+    offsets = np.arange(counts.sum()) - np.repeat(
+        np.cumsum(counts) - counts, counts)
+    return owners, indices[np.repeat(starts, counts) + offsets]
+
+
+def aggregate(rows, columns, weights, size):
+    """Суммы весов одинаковых пар (row, column)."""
+    keys, inverse = np.unique(rows * size + columns, return_inverse=True)
+    sums = np.bincount(inverse.ravel(), weights=weights)
+    return keys // size, keys % size, sums
+
+
+def top(rows, columns, scores, k):
+    """Первые k столбцов каждой строки по убыванию оценки."""
+    order = np.lexsort((-scores, rows))
+    rows, columns, scores = rows[order], columns[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    lengths = np.diff(np.r_[starts, len(rows)])
+    rank = np.arange(len(rows)) - np.repeat(starts, lengths)
+    keep = rank < k
+    return rows[keep], columns[keep], scores[keep]
+
+
+class Graph:
+    """Граф подписок активных пользователей в массивах NumPy.
+
+    Вершины - плотные номера 0..n-1, ids переводит их обратно в id
+    пользователей. Подписки хранятся дважды: исходящие (на кого
+    подписан) и входящие (кто подписан).
+    """
+
+    def __init__(self, users, authors):
+        self.ids, inverse = np.unique(
+            np.concatenate([users, authors]), return_inverse=True)
+        self.size = len(self.ids)
+        users, authors = np.split(inverse.ravel(), [len(users)])
+        self.following = csr(users, authors, self.size)
+        self.followers = csr(authors, users, self.size)
+        self.follower_counts = np.diff(self.followers[0])
+
+    @classmethod
+    def load(cls):
+        follows = Follow.objects.filter(
+            user__is_active=True, author__is_active=True,
+        ).values_list('user_id', 'author_id')
+        pairs = np.fromiter(
+            (value for pair in follows.iterator() for value in pair),
+            dtype=np.int64).reshape(-1, 2)
+        return cls(pairs[:, 0], pairs[:, 1])
+
+    def similar_authors(self, batch_size=BATCH_SIZE):
+        """Для каждого автора SIMILAR авторов с общими подписчиками.
+
+        Похожесть - косинус векторов подписчиков: общие подписчики,
+        делённые на корень из произведения их чисел. Результат - CSR
+        с весами.
+        """
+        empty = np.zeros(0, dtype=np.int64)
+        parts = [(empty, empty, np.zeros(0))]
+        for start in range(0, self.size, batch_size):
+            authors = np.arange(start, min(start + batch_size, self.size))
+            owners, followers = expand(
+                *self.followers, authors, MAX_FOLLOWERS)
+            sampled = np.minimum(self.follower_counts[authors],
+                                 MAX_FOLLOWERS)
+            pairs, others = expand(*self.following, followers)
+            rows, columns, common = aggregate(
+                owners[pairs], others, None, self.size)
+            # Выборка подписчиков занижает число общих пропорционально.
+            common = common * (
+                self.follower_counts[authors[rows]] / sampled[rows])
+            rows = authors[rows]
+            keep = rows != columns
+            rows, columns, common = rows[keep], columns[keep], common[keep]
+            scores = common / np.sqrt(
+                self.follower_counts[rows] * self.follower_counts[columns])
+            parts.append(top(rows, columns, scores, SIMILAR))
+        rows, columns, scores = (np.concatenate(part) for part in zip(*parts))
+        indptr, order = csr(rows, np.arange(len(rows)), self.size)
+        return indptr, columns[order], scores[order]
+
+    def recommend(self, users, similar):
+        """Рекомендации для вершин users: (вершина, автор, оценка).
+
+        Оценка - число авторов пользователя, подписанных на кандидата
+        (друзья друзей), плюс сумма похожести кандидата на авторов
+        пользователя. Свои подписки и сам пользователь исключаются.
+        """
+        owners, authors = expand(*self.following, users)
+        pairs, friends = expand(*self.following, authors)
+        indptr, similar_authors, weights = similar
+        # Номера рёбер вместо соседей: по ним берутся и вес, и автор.
+        similar_pairs, edges = expand(
+            indptr, np.arange(len(weights)), authors)
+        rows, columns, scores = aggregate(
+            np.concatenate([owners[pairs], owners[similar_pairs]]),
+            np.concatenate([friends, similar_authors[edges]]),
+            np.concatenate([np.ones(len(friends)), weights[edges]]),
+            self.size)
+        # Уже существующие подписки и сам пользователь.
+        known = np.unique(np.concatenate([
+            owners * self.size + authors,
+            np.arange(len(users)) * self.size + users]))
+        keep = ~np.isin(rows * self.size + columns, known)
+        rows, columns, scores = top(
+            rows[keep], columns[keep], scores[keep], TOP_K)
+        return users[rows], columns, scores
+
+
+def _replace(graph, users, authors, scores, after, last):
+    """Заменяет рекомендации пользователей с id в (after, last]."""
+    with transaction.atomic():
+        Recommendation.objects.filter(
+            user_id__gt=after, user_id__lte=last).delete()
+        Recommendation.objects.bulk_create(
+            Recommendation(user_id=user, author_id=author, score=score)
+            for user, author, score in zip(
+                graph.ids[users].tolist(), graph.ids[authors].tolist(),
+                scores.tolist()))
+
+
+def update_recommendations(batch_size=BATCH_SIZE, progress=None):
+    """Пересчитывает таблицу рекомендаций по текущему графу подписок.
+
+    Пользователи обходятся пачками по возрастанию id; рекомендации
+    пачки заменяются в одной транзакции, так что страницы всё время
+    видят либо старый, либо новый список.
+    """
+    graph = Graph.load()
+    similar = graph.similar_authors(batch_size)
+    after = 0
+    for start in range(0, graph.size, batch_size):
+        users = np.arange(start, min(start + batch_size, graph.size))
+        last = int(graph.ids[users[-1]])
+        _replace(graph, *graph.recommend(users, similar), after, last)
+        after = last
+        if progress:
+            progress(last)
+    # Пользователи, выпавшие из графа, и общий список для новичков.
+    Recommendation.objects.filter(user_id__gt=after).delete()
+    popular = np.argsort(-graph.follower_counts, kind='stable')[:POPULAR]
+    with transaction.atomic():
+        Recommendation.objects.filter(user__isnull=True).delete()
+        Recommendation.objects.bulk_create(
+            Recommendation(author_id=author, score=score)
+            for author, score in zip(
+                graph.ids[popular].tolist(),
+                graph.follower_counts[popular].tolist()))
+    return graph
+
+
+def for_user(user, limit=5):
+    """Рекомендации для страницы одним запросом по индексу.
+
+    Запрос читает не больше TOP_K своих строк и POPULAR общих, общие
+    показываются, если своих нет. Подписки, оформленные после
+    пересчёта, и скрытые авторы исключаются там же.
+    """
+    suggestions = list(Recommendation.objects.filter(
+        Q(user=user) | Q(user__isnull=True), author__is_active=True,
+    ).exclude(author=user).exclude(
+        author__following__user=user,
+    ).exclude(
+        author__blocked_by__user=user,
+    ).order_by(F('user').asc(nulls_last=True), '-score').select_related(
+        'author')[:TOP_K + POPULAR])
+    own = [suggestion for suggestion in suggestions if suggestion.user_id]
+    return (own or suggestions)[:limit]
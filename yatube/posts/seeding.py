@@ -0,0 +1,167 @@
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 10000
+TEXT_POOL_SIZE = 1000
+
+
+def zipf_cum_weights(size, exponent=1.0):
+    """Накопленные веса степенного закона для random.choices().
+
+    Немногие авторы собирают большинство подписчиков и постов,
+    немногие посты - большинство комментариев.
+    """
+    return list(itertools.accumulate(
+        1 / (rank ** exponent) for rank in range(1, size + 1)))
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Позволяет задать created и updated вручную при bulk_create."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def username_prefix(seed):
+    return f'seed{seed}_'
+
+
+def _batches(total, size):
+    for start in range(0, total, size):
+        yield min(size, total - start)
+
+
+def _insert(model, objects):
+    # Каждая пачка в своей транзакции: память и блокировка SQLite
+    # не растут с объёмом данных.
+    with transaction.atomic():
+        model.objects.bulk_create(objects)
+
+
+def seed(posts=10000, users=None, groups=None, follows_per_user=20,
+         comments_per_post=0.5, days=365, seed=0, batch_size=BATCH_SIZE,
+         progress=None):
+    """Заполняет базу синтетическими данными, одинаковыми при одном seed.
+
+    Колонки каждой пачки (авторы, группы, даты, тексты) генерируются
+    одним вызовом random.choices(), строки вставляются через bulk_create.
+    progress(model, count) вызывается после каждой пачки.
+    """
+    users = users or max(posts // 50, 10)
+    groups = groups or max(posts // 1000, 3)
+    progress = progress or (lambda model, count: None)
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    texts = [fake.text(200) for _ in range(TEXT_POOL_SIZE)]
+    first_names = [fake.first_name() for _ in range(100)]
+    last_names = [fake.last_name() for _ in range(100)]
+
+    prefix = username_prefix(seed)
+    numbers = iter(range(users))
+    for count in _batches(users, batch_size):
+        # Пароль '!' непригоден для входа и не тратит время на хэширование.
+        _insert(User, [
+            User(username=f'{prefix}{number}', password='!',
+                 first_name=first, last_name=last)
+            for first, last, number in zip(
+                rng.choices(first_names, k=count),
+                rng.choices(last_names, k=count),
+                numbers)
+        ])
+        progress(User, count)
+    user_ids = list(
+        User.objects.filter(username__startswith=prefix)
+        .order_by('id').values_list('id', flat=True))
+    _insert(Group, [
+        Group(title=fake.catch_phrase(), slug=f'{prefix}{i}',
+              description=rng.choice(texts))
+        for i in range(groups)
+    ])
+    progress(Group, groups)
+    # Порядок id задаёт выбор rng: без order_by он зависит от плана
+    # запроса, и одно зерно давало бы разные данные.
+    group_ids = list(
+        Group.objects.filter(slug__startswith=prefix)
+        .order_by('id').values_list('id', flat=True))
+
+    # Популярность авторов не связана с порядком регистрации.
+    authors = user_ids[:]
+    rng.shuffle(authors)
+    author_weights = zipf_cum_weights(len(authors))
+    group_choices = group_ids + [None]
+
+    now = timezone.now()
+    start = now - timedelta(days=days)
+    step = timedelta(days=days) / max(posts, 1)
+    created = 0
+    last_post_id = Post.objects.aggregate(last=Max('id'))['last'] or 0
+    with explicit_timestamps(Post, Comment):
+        for count in _batches(posts, batch_size):
+            # Даты растут вместе с id, как у настоящих постов.
+            dates = [start + step * (created + i) for i in range(count)]
+            _insert(Post, [
+                Post(author_id=author_id, group_id=group_id, text=text,
+                     created=date, updated=date)
+                for author_id, group_id, text, date in zip(
+                    rng.choices(authors, cum_weights=author_weights,
+                                k=count),
+                    rng.choices(group_choices, k=count),
+                    rng.choices(texts, k=count),
+                    dates)
+            ])
+            created += count
+            progress(Post, count)
+
+        follows = set()
+        for user_id in user_ids:
+            for author_id in rng.choices(
+                    authors, cum_weights=author_weights,
+                    k=follows_per_user):
+                if author_id != user_id:
+                    follows.add((user_id, author_id))
+        follows = sorted(follows)
+        for offset in range(0, len(follows), batch_size):
+            batch = follows[offset:offset + batch_size]
+            _insert(Follow, [
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in batch
+            ])
+            progress(Follow, len(batch))
+
+        post_ids = list(Post.objects.filter(
+            id__gt=last_post_id).order_by('id').values_list('id', flat=True))
+        rng.shuffle(post_ids)
+        post_weights = zipf_cum_weights(len(post_ids))
+        for count in _batches(int(posts * comments_per_post), batch_size):
+            _insert(Comment, [
+                Comment(author_id=author_id, post_id=post_id, text=text,
+                        created=now)
+                for author_id, post_id, text in zip(
+                    rng.choices(user_ids, k=count),
+                    rng.choices(post_ids, cum_weights=post_weights,
+                                k=count),
+                    rng.choices(texts, k=count))
+            ])
+            progress(Comment, count)
+    return user_ids, group_ids
@@ -0,0 +1,87 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.page_cache import purge_tags
+from . import blocking, duplicates, inbox
+from .models import Comment, CommentBand, Follow, Group, Post, PostBand, User
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_pages(sender, instance, **kwargs):
+    # Главная страница и счётчик постов на странице поста
+    # зависят от любого поста.
+    tags = ['index', f'post:{instance.pk}', f'author:{instance.author_id}']
+    if instance.group_id:
+        tags.append(f'group:{instance.group_id}')
+    purge_tags(*tags)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def update_minhash(sender, instance, **kwargs):
+    # В minhash загруженного объекта - подпись сохранённого текста:
+    # полосы переписываются, только если она изменилась.
+    minhash = duplicates.fingerprint(instance.text)
+    old = None if instance._state.adding else instance.minhash
+    instance.minhash_changed = (
+        instance._state.adding
+        or (None if old is None else bytes(old)) != minhash)
+    instance.minhash = minhash
+
+
+def _reindex(band_model, field, instance, created):
+    if not created:
+        band_model.objects.filter(**{field: instance}).delete()
+    duplicates.index(band_model, field, [instance])
+
+
+@receiver(post_save, sender=Post)
+def index_post_minhash(sender, instance, created, **kwargs):
+    if instance.deleted:
+        # Скрытый пост не должен находиться как дубликат.
+        PostBand.objects.filter(post=instance).delete()
+    elif getattr(instance, 'minhash_changed', True):
+        _reindex(PostBand, 'post', instance, created)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment_minhash(sender, instance, created, **kwargs):
+    if getattr(instance, 'minhash_changed', True):
+        _reindex(CommentBand, 'comment', instance, created)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, **kwargs):
+    if instance.post_id:
+        purge_tags(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def purge_follow_pages(sender, instance, **kwargs):
+    purge_tags(f'author:{instance.author_id}', f'author:{instance.user_id}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def purge_group_pages(sender, instance, **kwargs):
+    purge_tags(f'group:{instance.pk}', f'group_card:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+def purge_author_pages(sender, instance, update_fields=None, **kwargs):
+    # При входе на сайт обновляется только last_login, он не выводится.
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    purge_tags(f'author:{instance.pk}', f'author_card:{instance.pk}')
+
+
+@receiver(user_logged_in)
+def warm_user_caches(sender, user, **kwargs):
+    # Счётчик в шапке и скрытые авторы нужны на первой же странице
+    # после входа.
+    inbox.unread_count(user.pk)
+    blocking.hidden_authors(user.pk)
@@ -0,0 +1,195 @@
+import gzip
+import json
+import os
+import zlib
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, F, Max
+from django.urls import reverse
+
+from .models import Group, Post, User
+
+MANIFEST = 'sitemap.json'
+INDEX = 'sitemap.xml'
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+class Section:
+    """Раздел sitemap: модель, поля ссылки и поле даты изменения.
+
+    Файл раздела с номером n содержит объекты с id из диапазона
+    (n * SITEMAP_CHUNK_SIZE, (n + 1) * SITEMAP_CHUNK_SIZE]. Границы
+    не сдвигаются при удалении объектов, и выборка идёт по индексу
+    первичного ключа без OFFSET.
+    """
+
+    def __init__(self, name, queryset, url_name, url_field, lastmod=None):
+        self.name = name
+        self.queryset = queryset
+        self.url_name = url_name
+        self.url_field = url_field
+        self.lastmod = lastmod
+
+    @property
+    def size(self):
+        return settings.SITEMAP_CHUNK_SIZE
+
+    def location(self, value):
+        return reverse(self.url_name, args=[value])
+
+    def chunk_count(self):
+        last = self.queryset.aggregate(last=Max('id'))['last']
+        return (last - 1) // self.size + 1 if last else 0
+
+    def rows(self, chunk):
+        fields = [self.url_field] + ([self.lastmod] if self.lastmod else [])
+        return self.queryset.filter(
+            id__gt=chunk * self.size, id__lte=(chunk + 1) * self.size,
+        ).order_by('id').values_list(*fields).iterator()
+
+    def fingerprints(self):
+        """Отпечатки всех файлов раздела: [число, последний id,
+        lastmod, контрольная сумма ссылок].
+
+        Для разделов с lastmod хватает одного GROUP BY-запроса:
+        добавление, удаление и изменение объекта меняют отпечаток его
+        файла. У разделов без lastmod переименование (slug, username)
+        видно только по самим ссылкам, поэтому их поле читается одним
+        проходом по индексу и сворачивается в crc32 по файлам.
+        """
+        if not self.lastmod:
+            return self._url_fingerprints()
+        rows = self.queryset.values(
+            chunk=(F('id') - 1) / self.size,
+        ).annotate(
+            count=Count('id'), last_id=Max('id'),
+            lastmod=Max(self.lastmod),
+        ).order_by('chunk')
+        return {
+            row['chunk']: [
+                row['count'], row['last_id'], row['lastmod'].isoformat(),
+                None,
+            ]
+            for row in rows
+        }
+
+    def _url_fingerprints(self):
+        fingerprints = {}
+        for pk, value in self.queryset.order_by('id').values_list(
+                'id', self.url_field).iterator():
+            fingerprint = fingerprints.setdefault(
+                (pk - 1) // self.size, [0, None, None, 0])
+            fingerprint[0] += 1
+            fingerprint[1] = pk
+            fingerprint[3] = zlib.crc32(
+                f'{value}\n'.encode(), fingerprint[3])
+        return fingerprints
+
+
+SECTIONS = {
+    section.name: section for section in (
+        Section('posts',
+                Post.objects.filter(author__is_active=True, deleted=False),
+                'posts:post_detail', 'id', lastmod='updated'),
+        Section('groups', Group.objects.all(), 'posts:group_list', 'slug'),
+        Section('profiles', User.objects.filter(is_active=True),
+                'posts:profile', 'username'),
+    )
+}
+
+
+def urlset(section, chunk, base_url):
+    """Строки файла sitemap с одним диапазоном id раздела."""
+    yield XML_HEADER
+    yield f'<urlset {XMLNS}>\n'
+    for row in section.rows(chunk):
+        loc = escape(base_url + section.location(row[0]))
+        if section.lastmod:
+            yield (f'<url><loc>{loc}</loc>'
+                   f'<lastmod>{row[1].isoformat()}</lastmod></url>\n')
+        else:
+            yield f'<url><loc>{loc}</loc></url>\n'
+    yield '</urlset>\n'
+
+
+def sitemap_index(entries):
+    """Строки индекса sitemap из пар (адрес файла, lastmod или None)."""
+    yield XML_HEADER
+    yield f'<sitemapindex {XMLNS}>\n'
+    for loc, lastmod in entries:
+        yield f'<sitemap><loc>{escape(loc)}</loc>'
+        if lastmod:
+            yield f'<lastmod>{lastmod}</lastmod>'
+        yield '</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def filename(section, chunk):
+    return f'sitemap-{section.name}-{chunk}.xml.gz'
+
+
+def _write(path, lines, compress):
+    # Сначала во временный файл: поисковик не увидит недописанный sitemap.
+    temp_path = f'{path}.tmp'
+    if compress:
+        # mtime=0: одинаковые данные дают одинаковый файл.
+        with open(temp_path, 'wb') as raw, gzip.GzipFile(
+                fileobj=raw, mode='wb', mtime=0) as file:
+            for line in lines:
+                file.write(line.encode())
+    else:
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.writelines(lines)
+    os.replace(temp_path, path)
+
+
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def generate(directory=None, base_url=None, force=False):
+    """Пишет gzip-файлы sitemap и индекс в directory.
+
+    Пересобираются только файлы, чей отпечаток изменился с прошлого
+    запуска (см. Section.fingerprints), и файлы без данных удаляются.
+    Возвращает число записанных, нетронутых и удалённых файлов.
+    """
+    directory = directory or settings.SITEMAP_ROOT
+    base_url = (base_url or settings.SITE_URL).rstrip('/')
+    os.makedirs(directory, exist_ok=True)
+    manifest = _load_manifest(directory)
+    if manifest.get('base_url') != base_url:
+        force = True
+    old_chunks = manifest.get('chunks', {})
+    new_chunks = {}
+    stats = {'written': 0, 'unchanged': 0, 'removed': 0}
+    entries = []
+    for section in SECTIONS.values():
+        for chunk, fingerprint in section.fingerprints().items():
+            name = filename(section, chunk)
+            path = os.path.join(directory, name)
+            new_chunks[name] = fingerprint
+            if (not force and old_chunks.get(name) == fingerprint
+                    and os.path.exists(path)):
+                stats['unchanged'] += 1
+            else:
+                _write(path, urlset(section, chunk, base_url), True)
+                stats['written'] += 1
+            entries.append((f'{base_url}/{name}', fingerprint[2]))
+    for name in set(old_chunks) - set(new_chunks):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
+        stats['removed'] += 1
+    _write(os.path.join(directory, INDEX), sitemap_index(entries), False)
+    _write(
+        os.path.join(directory, MANIFEST),
+        [json.dumps({'base_url': base_url, 'chunks': new_chunks})], False)
+    return stats
@@ -0,0 +1,126 @@
+import math
+import os
+import re
+import zlib
+
+import numpy as np
+from django.conf import settings
+
+from core.metrics import registry
+
+FEATURE_BITS = 18
+# Сглаживание Лапласа: признак, не встречавшийся в одном из классов,
+# не делает вероятность нулевой.
+ALPHA = 1.0
+WORD_RE = re.compile(r'\w+')
+
+_cache = {}
+
+
+def features(text, bits=FEATURE_BITS):
+    """Номера хэшированных признаков текста: слова и пары слов подряд.
+
+    crc32 не зависит от PYTHONHASHSEED, поэтому номера одинаковы
+    при обучении и в каждом процессе сервера.
+    """
+    words = WORD_RE.findall(text.lower())
+    grams = words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+    mask = (1 << bits) - 1
+    return {zlib.crc32(gram.encode()) & mask for gram in grams}
+
+
+class Trainer:
+    """Мультиномиальный наивный Байес на хэшированных признаках.
+
+    Пачки текстов превращаются в массивы номеров признаков, счётчики
+    по классам обновляются одним np.bincount на пачку.
+    """
+
+    def __init__(self, bits=FEATURE_BITS):
+        self.bits = bits
+        self.size = 1 << bits
+        self.counts = np.zeros(2 * self.size, dtype=np.int64)
+        self.documents = np.zeros(2, dtype=np.int64)
+
+    def update(self, texts, labels):
+        """Учитывает пачку текстов; labels - 1 для спама, 0 для остального."""
+        rows = [
+            np.fromiter(features(text, self.bits), dtype=np.int64)
+            for text in texts]
+        if not rows:
+            return
+        labels = np.asarray(labels, dtype=np.int64)
+        lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+        # Признак класса c с номером f - ячейка c * size + f.
+        cells = np.concatenate(rows) + np.repeat(labels * self.size, lengths)
+        self.counts += np.bincount(cells, minlength=2 * self.size)
+        self.documents += np.bincount(labels, minlength=2)
+
+    def weights(self):
+        """Веса признаков и сдвиг (последний элемент) для Model."""
+        ham, spam = self.counts.reshape(2, self.size) + ALPHA
+        weights = np.empty(self.size + 1, dtype=np.float32)
+        weights[:-1] = (
+            np.log(spam / spam.sum()) - np.log(ham / ham.sum()))
+        ham_documents, spam_documents = self.documents + 1
+        weights[-1] = math.log(spam_documents / ham_documents)
+        return weights
+
+    def save(self, path):
+        # Замена файла атомарна: процессы, которые уже отобразили
+        # старую модель в память, дочитают её.
+        with open(f'{path}.tmp', 'wb') as file:
+            np.save(file, self.weights())
+        os.replace(f'{path}.tmp', path)
+
+
+class Model:
+    """Обученная модель, отображённая в память только для чтения.
+
+    Процессы сервера делят одни страницы файла; оценка текста -
+    выборка весов его признаков и сумма.
+    """
+
+    def __init__(self, path):
+        self.weights = np.load(path, mmap_mode='r')
+        self.bits = (len(self.weights) - 1).bit_length() - 1
+        self.bias = float(self.weights[-1])
+
+    def score(self, text):
+        """Вероятность того, что текст - спам."""
+        indexes = list(features(text, self.bits))
+        logit = self.bias + float(self.weights[indexes].sum())
+        return 1 / (1 + math.exp(-max(min(logit, 50), -50)))
+
+
+def get_model(path=None):
+    """Модель из SPAM_MODEL_PATH или None, если её ещё не обучили.
+
+    Файл перечитывается, когда train_spam заменяет его новым.
+    """
+    path = path or settings.SPAM_MODEL_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _cache[path] = (mtime, Model(path))
+    return cached[1]
+
+
+def is_spam(text):
+    model = get_model()
+    return model is not None and model.score(text) >= settings.SPAM_THRESHOLD
+
+
+def flag(obj):
+    """Отметка flagged для нового поста или комментария.
+
+    Классификатор не отклоняет текст, а только показывает его
+    модераторам: ложное срабатывание не должно стоить автору поста.
+    """
+    if not is_spam(obj.text):
+        return False
+    registry.inc('yatube_spam_flagged_total', kind=obj._meta.model_name)
+    return True
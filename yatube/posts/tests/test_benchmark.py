@@ -0,0 +1,19 @@
+from django.test import TestCase
+
+from posts import benchmark, seeding
+from posts.models import Comment, Follow, Post
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_and_run(self):
+        """Бенчмарк создаёт данные и замеряет каждый view."""
+        seeding.seed(posts=200, comments_per_post=1)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertTrue(Follow.objects.exists())
+        results = benchmark.run(requests=2)
+        self.assertEqual(len(results), 7)
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+                self.assertGreater(result['queries'], 0)
@@ -0,0 +1,111 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import blocking, feeds
+from posts.models import Block, Follow, Notification, Post, User
+
+
+@override_settings(SELECT_LIMIT=3)
+class BlockingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.writer = User.objects.create_user(username='writer')
+        # Лента: пачка постов spammer между постами writer.
+        for i in range(4):
+            Post.objects.create(author=cls.writer, text=f'Пост {i}')
+        for i in range(20):
+            Post.objects.create(author=cls.spammer, text=f'Спам {i}')
+        for i in range(4, 8):
+            Post.objects.create(author=cls.writer, text=f'Пост {i}')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def pages(self, url):
+        """Тексты постов по страницам, переходя по курсорам."""
+        pages = []
+        while url is not None:
+            page = self.client.get(url).context['page_obj']
+            pages.append([post.text for post in page])
+            url = page.next_cursor and (
+                url.partition('?')[0] + f'?after={page.next_cursor}')
+        return pages
+
+    def test_muted_author_skipped_with_cursor_pages(self):
+        Follow.objects.create(user=self.reader, author=self.writer)
+        Follow.objects.create(user=self.reader, author=self.spammer)
+        blocking.block(self.reader, self.spammer, Block.MUTE)
+        pages = self.pages(reverse('posts:follow_index'))
+        self.assertEqual(
+            [text for page in pages for text in page],
+            [f'Пост {i}' for i in reversed(range(8))])
+        self.assertEqual(pages[0], ['Пост 7', 'Пост 6', 'Пост 5'])
+        # Двадцать постов spammer подряд: за MAX_SCANS запросов
+        # по восемь постов набирается только часть страницы.
+        self.assertLessEqual(max(map(len, pages)), 3)
+
+    def test_index_cursor_pages_not_shared_in_fragment_cache(self):
+        """Курсорные страницы главной не смешиваются в кэше фрагмента
+        ни друг с другом, ни у зрителей с разными скрытыми авторами."""
+        blocking.block(self.reader, self.writer, Block.MUTE)
+        url = reverse('posts:index')
+        first = self.client.get(url)
+        self.assertContains(first, 'Спам 19')
+        second = self.client.get(
+            f'{url}?after={first.context["page_obj"].next_cursor}')
+        self.assertContains(second, 'Спам 16')
+        self.assertNotContains(second, 'Спам 19')
+        other = Client()
+        other.force_login(User.objects.create_user(username='other'))
+        blocking.block(User.objects.get(username='other'), self.spammer,
+                       Block.MUTE)
+        response = other.get(url)
+        self.assertContains(response, 'Пост 7')
+        self.assertNotContains(response, 'Спам 19')
+
+    def test_index_limit_kept_for_hidden_authors(self):
+        """Главная с курсором показывает те же последние 10 постов,
+        что и без скрытых авторов, за вычетом скрытых."""
+        blocking.block(self.reader, self.spammer, Block.MUTE)
+        pages = self.pages(reverse('posts:index'))
+        self.assertEqual(
+            [text for page in pages for text in page],
+            [f'Пост {i}' for i in reversed(range(4, 8))])
+
+    def test_cursor_round_trip(self):
+        post = Post.objects.first()
+        created, pk = feeds.decode_cursor(
+            feeds.encode_cursor(post.created, post.pk))
+        self.assertEqual((created, pk), (post.created, post.pk))
+        self.assertIsNone(feeds.decode_cursor('мусор'))
+
+    def test_block_removes_follows_and_notifications(self):
+        Follow.objects.create(user=self.reader, author=self.spammer)
+        Follow.objects.create(user=self.spammer, author=self.reader)
+        Notification.objects.create(
+            user=self.reader, actor=self.spammer, kind=Notification.FOLLOW)
+        self.client.get(reverse('posts:profile_block', args=('spammer',)))
+        self.assertFalse(Follow.objects.filter(
+            user__in=(self.reader, self.spammer)).exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(blocking.blocked_authors(self.reader.pk),
+                         {self.spammer.pk})
+        # Заблокированный не может подписаться снова.
+        spammer = Client()
+        spammer.force_login(self.spammer)
+        spammer.get(reverse('posts:profile_follow', args=('reader',)))
+        self.assertFalse(Follow.objects.exists())
+        self.client.get(reverse('posts:profile_unblock', args=('spammer',)))
+        self.assertEqual(blocking.hidden_authors(self.reader.pk), set())
+
+    def test_hidden_set_cached(self):
+        blocking.block(self.reader, self.spammer, Block.MUTE)
+        blocking.hidden_authors(self.reader.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(blocking.hidden_authors(self.reader.pk),
+                             {self.spammer.pk})
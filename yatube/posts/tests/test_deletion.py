@@ -0,0 +1,159 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import deletion, inbox
+from posts.models import (
+    Block, Comment, CommentBand, Deletion, Follow, Group, GroupFollow,
+    Notification, NotificationSettings, Post, PostBand, Recommendation, User
+)
+
+
+class DeletionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {i}') for i in range(5))
+        self.post = Post.objects.filter(author=self.author).first()
+        self.reader_post = Post.objects.create(
+            author=self.reader, text='Пост читателя')
+        Comment.objects.bulk_create(
+            Comment(author=self.reader, post=self.post, text=f'К {i}')
+            for i in range(7))
+        Comment.objects.create(
+            author=self.author, post=self.reader_post, text='От автора')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+
+    def test_user_is_hidden_at_once(self):
+        """Пользователь и его посты пропадают до удаления данных."""
+        client = Client()
+        client.force_login(self.author)
+        deletion.schedule_user_deletion(self.author)
+        self.assertEqual(
+            client.get(reverse('posts:follow_index')).status_code, 302)
+        guest = Client()
+        self.assertEqual(guest.get(reverse(
+            'posts:profile', kwargs={'username': 'author'})).status_code, 404)
+        self.assertEqual(guest.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ).status_code, 404)
+        self.assertNotContains(
+            guest.get(reverse('posts:index')), 'Пост 0')
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+
+    def test_user_deleted_in_batches(self):
+        """Данные пользователя удаляются пачками, удаление
+        продолжается после прерывания."""
+        item = deletion.schedule_user_deletion(self.author)
+        self.assertTrue(deletion.run_batch(item, batch_size=3))
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 4)
+        # Новый объект заявки, как после перезапуска процесса.
+        item = Deletion.objects.get(pk=item.pk)
+        batches = 1
+        while deletion.run_batch(item, batch_size=3):
+            batches += 1
+        self.assertEqual(batches, 3 + 1 + 1 + 1 + 2 + 1)
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(Follow.objects.count(), 0)
+        self.assertEqual(list(Post.objects.all()), [self.reader_post])
+        item.refresh_from_db()
+        self.assertIsNotNone(item.finished)
+        self.assertEqual(item.deleted, 7 + 1 + 1 + 1 + 5 + 1)
+
+    def test_post_is_hidden_at_once(self):
+        """Пост пропадает из выдачи и кэша страниц до удаления строк."""
+        guest = Client()
+        profile = reverse('posts:profile', kwargs={'username': 'author'})
+        self.assertContains(guest.get(profile), 'Пост 0')
+        post = Post.objects.get(text='Пост 0')
+        deletion.schedule_post_deletion(post)
+        self.assertNotContains(guest.get(profile), 'Пост 0')
+        self.assertEqual(guest.get(reverse(
+            'posts:post_detail', kwargs={'post_id': post.pk}),
+        ).status_code, 404)
+        self.assertTrue(Post.objects.filter(pk=post.pk).exists())
+
+    def test_dependent_tables_deleted_before_user(self):
+        """Все строки, ссылающиеся на пользователя, удаляются пачками
+        до строки пользователя, а не её каскадом."""
+        group = Group.objects.create(title='Группа', slug='group')
+        post = Post.objects.create(author=self.author, text='С отпечатком')
+        Comment.objects.create(
+            author=self.author, post=post,
+            text='Комментарий достаточно длинный для отпечатка MinHash '
+                 'из многих слов подряд')
+        GroupFollow.objects.create(user=self.author, group=group)
+        Block.objects.create(
+            user=self.author, author=self.reader, kind=Block.MUTE)
+        Block.objects.create(
+            user=self.reader, author=self.author, kind=Block.BLOCK)
+        Recommendation.objects.create(
+            user=self.author, author=self.reader, score=1)
+        Recommendation.objects.create(author=self.author, score=1)
+        NotificationSettings.objects.create(user=self.author)
+        item = deletion.schedule_user_deletion(self.author)
+        while deletion.remaining(item) != {'user': 1}:
+            self.assertTrue(deletion.run_batch(item, batch_size=2))
+        for model in (CommentBand, PostBand, GroupFollow, Block,
+                      Recommendation, NotificationSettings):
+            with self.subTest(model=model.__name__):
+                self.assertFalse(model.objects.exists())
+        deletion.process()
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+
+    def test_fanned_out_notifications_deleted_in_batches(self):
+        """Уведомления о постах удаляемого автора, от него и ему
+        удаляются пачками до строки пользователя."""
+        readers = [self.reader] + [
+            User.objects.create_user(username=f'reader{i}') for i in range(4)]
+        reader_ids = [reader.pk for reader in readers]
+        self.assertEqual(inbox.unread_count(self.reader.pk), 0)
+        inbox.notify(reader_ids, Notification.POST, self.author.pk,
+                     self.post.pk)
+        # Уведомление о чужом посте, где автор - лишь действующее лицо,
+        # и уведомление самому автору.
+        inbox.notify([self.reader.pk], Notification.COMMENT, self.author.pk,
+                     self.reader_post.pk)
+        inbox.notify([self.author.pk], Notification.FOLLOW, self.reader.pk)
+        self.assertEqual(inbox.unread_count(self.reader.pk), 2)
+        item = deletion.schedule_user_deletion(self.author)
+        self.assertIn('notification', deletion.remaining(item))
+        while deletion.remaining(item) != {'user': 1}:
+            self.assertTrue(deletion.run_batch(item, batch_size=2))
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(inbox.unread_count(self.reader.pk), 0)
+
+    def test_post_deletion_removes_notifications(self):
+        inbox.notify([self.reader.pk], Notification.POST, self.author.pk,
+                     self.post.pk)
+        item = deletion.schedule_post_deletion(self.post)
+        self.assertEqual(deletion.remaining(item),
+                         {'comment': 7, 'notification': 1, 'post': 1})
+        deletion.process()
+        self.assertFalse(Notification.objects.exists())
+
+    def test_post_deletion_removes_comments(self):
+        """Комментарии удаляемого поста удаляются, а не осиротевают."""
+        item = deletion.schedule_post_deletion(self.post)
+        self.assertEqual(deletion.remaining(item), {'comment': 7, 'post': 1})
+        deletion.process(batch_size=5)
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(Comment.objects.filter(post=None).exists())
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_command(self):
+        """Команда ставит удаление в очередь и показывает прогресс."""
+        out = StringIO()
+        call_command(
+            'process_deletions', '--user', 'author', '--status', stdout=out)
+        self.assertIn('удалено 0, осталось: comment 8', out.getvalue())
+        call_command('process_deletions', '--pause', '0', stdout=out)
+        self.assertIn(f'user {self.author.pk}: удалено 16, готово',
+                      out.getvalue())
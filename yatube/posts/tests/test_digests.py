@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts import digests
+from posts.models import (
+    DigestRun, Follow, NotificationSettings, Post, User
+)
+
+# Среда, дайджест за вторник.
+NOW = timezone.make_aware(datetime(2026, 10, 21, 9, 0))
+TUESDAY = timezone.make_aware(datetime(2026, 10, 20, 12, 0))
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class DigestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}')
+            for i in range(3)]
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{i}', email=f'reader{i}@example.com')
+            for i in range(5)]
+        for reader in cls.readers:
+            NotificationSettings.objects.create(
+                user=reader, email_frequency=NotificationSettings.DAILY)
+            Follow.objects.create(user=reader, author=cls.authors[0])
+        Follow.objects.create(user=cls.readers[0], author=cls.authors[1])
+        NotificationSettings.objects.filter(user=cls.readers[4]).update(
+            email_frequency=NotificationSettings.WEEKLY)
+        with mock.patch('django.utils.timezone.now', return_value=TUESDAY):
+            for author in cls.authors:
+                for i in range(2):
+                    Post.objects.create(author=author, text=f'{author} {i}')
+        Post.objects.create(author=cls.authors[0], text='Сегодняшний')
+
+    def test_period(self):
+        self.assertEqual(
+            digests.period_end(NotificationSettings.DAILY, NOW),
+            timezone.make_aware(datetime(2026, 10, 21)))
+        self.assertEqual(
+            digests.period_end(NotificationSettings.WEEKLY, NOW),
+            timezone.make_aware(datetime(2026, 10, 19)))
+
+    def test_batch_queries(self):
+        """Пачка собирается тремя запросами при любом числе получателей."""
+        until = digests.period_end(NotificationSettings.DAILY, NOW)
+        builder = digests.DigestBuilder(
+            NotificationSettings.DAILY, until - timedelta(days=1), until)
+        with self.assertNumQueries(3):
+            messages, last_user_id = builder.batch(0)
+        self.assertEqual(last_user_id, self.readers[3].pk)
+        self.assertEqual(len(messages), 4)
+        subject, body, _, [email] = messages[0]
+        self.assertEqual(email, 'reader0@example.com')
+        self.assertIn('Новое за день', subject)
+        self.assertEqual(
+            [line for line in body.splitlines() if ', 20 ' in line],
+            ['author1, 20 октября 12:00', 'author1, 20 октября 12:00',
+             'author0, 20 октября 12:00', 'author0, 20 октября 12:00'])
+        self.assertNotIn('Сегодняшний', body)
+        self.assertNotIn('author2', body)
+
+    def test_resume_after_failure(self):
+        """После сбоя рассылка продолжается с места остановки."""
+        real = digests.send_mass_mail
+        calls = []
+
+        def flaky(messages, **kwargs):
+            calls.append(len(messages))
+            if len(calls) == 2:
+                raise ConnectionError
+            return real(messages, **kwargs)
+
+        with mock.patch('posts.digests.send_mass_mail', flaky):
+            with self.assertRaises(ConnectionError):
+                digests.send_digests(
+                    NotificationSettings.DAILY, now=NOW, batch_size=2)
+        run = DigestRun.objects.get()
+        self.assertEqual((run.last_user_id, run.sent), (self.readers[1].pk, 2))
+        self.assertIsNone(run.finished)
+        out = StringIO()
+        call_command('send_digests', '--now', NOW.isoformat(),
+                     '--batch-size', '2', stdout=out)
+        self.assertIn('отправлено писем 4', out.getvalue())
+        self.assertEqual(
+            [message.to[0] for message in mail.outbox],
+            [f'reader{i}@example.com' for i in range(4)])
+        run = digests.send_digests(NotificationSettings.DAILY, now=NOW)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertIsNotNone(run.finished)
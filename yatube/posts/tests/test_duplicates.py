@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import deletion, duplicates
+from posts.models import Comment, Post, PostBand, User
+
+TEXT = (
+    'Только сегодня лучшие курсы программирования со скидкой девяносто '
+    'процентов переходите по ссылке в профиле и получите подарок'
+)
+
+
+class DuplicateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='spammer')
+        cls.post = Post.objects.create(author=cls.user, text=TEXT)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_fingerprint(self):
+        self.assertIsNone(duplicates.fingerprint('Спасибо за пост!'))
+        edited = TEXT.replace('сегодня', 'завтра')
+        self.assertGreaterEqual(duplicates.similarity(
+            duplicates.fingerprint(TEXT), duplicates.fingerprint(edited)),
+            0.6)
+        self.assertEqual(
+            PostBand.objects.filter(post=self.post).count(),
+            duplicates.BANDS)
+
+    def test_post_form_rejects_near_duplicate(self):
+        """Пост с парой изменённых слов отклоняется, правка своего - нет."""
+        response = self.client.post(
+            reverse('posts:post_create'),
+            {'text': TEXT.replace('девяносто', 'восемьдесят')})
+        self.assertFormError(
+            response, 'form', 'text', 'Почти такой же пост уже публиковался')
+        self.assertEqual(Post.objects.count(), 1)
+        response = self.client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': TEXT + ' сейчас'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_other_author_may_post_similar_text(self):
+        """Сходство с чужим текстом не повод отклонять пост."""
+        client = Client()
+        client.force_login(User.objects.create_user(username='reader'))
+        response = client.post(reverse('posts:post_create'), {'text': TEXT})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_bands_kept_when_text_unchanged(self):
+        """Сохранение без изменения текста не переписывает полосы,
+        скрытие поста удаляет их."""
+        bands = set(PostBand.objects.values_list('pk', flat=True))
+        post = Post.objects.get(pk=self.post.pk)
+        post.flagged = True
+        post.save()
+        self.assertEqual(
+            set(PostBand.objects.values_list('pk', flat=True)), bands)
+        post.text = TEXT + ' и ещё кое-что'
+        post.save()
+        self.assertFalse(PostBand.objects.filter(pk__in=bands).exists())
+        self.assertEqual(PostBand.objects.count(), duplicates.BANDS)
+        deletion.schedule_post_deletion(post)
+        self.assertFalse(PostBand.objects.exists())
+
+    def test_comment_form_rejects_near_duplicate(self):
+        url = reverse('posts:add_comment', args=(self.post.pk,))
+        self.client.post(url, {'text': TEXT})
+        self.client.post(url, {'text': TEXT.replace('подарок', 'бонус')})
+        self.client.post(url, {'text': 'Спасибо за пост!'})
+        self.client.post(url, {'text': 'Спасибо за пост!'})
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)),
+            [TEXT, 'Спасибо за пост!', 'Спасибо за пост!'])
+
+    def test_index_command(self):
+        """Команда индексирует посты, созданные через bulk_create."""
+        Post.objects.bulk_create([Post(author=self.user, text=TEXT * 2)])
+        out = StringIO()
+        call_command('index_minhash', stdout=out)
+        self.assertIn('posts: проиндексировано 1', out.getvalue())
+        self.assertEqual(PostBand.objects.count(), 2 * duplicates.BANDS)
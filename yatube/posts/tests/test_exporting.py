@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import importing
+from posts.models import Comment, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='С картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост {i}') for i in range(600))
+        Comment.objects.create(
+            author=cls.author, post=cls.post, text='Комментарий')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.url = reverse(
+            'posts:profile_export', kwargs={'username': 'author'})
+
+    def test_jsonl_streams_all_posts(self):
+        """Выгрузка в JSONL отдаётся потоком и содержит комментарии."""
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(records), 601)
+        self.assertEqual(records[0]['text'], 'С картинкой')
+        self.assertEqual(records[0]['group'], 'group')
+        self.assertEqual(records[0]['comments'][0]['text'], 'Комментарий')
+
+    def test_csv(self):
+        """CSV содержит заголовок и строку на пост."""
+        response = self.client.get(self.url, {'format': 'csv'})
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 601)
+        self.assertEqual(
+            json.loads(rows[0]['comments'])[0]['author'], 'author')
+
+    def test_zip_includes_media(self):
+        """ZIP содержит посты и файлы картинок."""
+        response = self.client.get(self.url, {'format': 'zip'})
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            archive.namelist(), ['posts.jsonl', f'media/{self.post.image}'])
+        self.assertEqual(
+            archive.read(f'media/{self.post.image}'), SMALL_GIF)
+        self.assertEqual(
+            len(archive.read('posts.jsonl').splitlines()), 601)
+
+    def test_only_author_exports_profile(self):
+        """Чужой архив автора недоступен, архив группы доступен."""
+        other = User.objects.create_user(username='other')
+        self.client.force_login(other)
+        self.assertRedirects(
+            self.client.get(self.url),
+            reverse('posts:profile', kwargs={'username': 'author'}))
+        response = self.client.get(
+            reverse('posts:group_export', kwargs={'slug': 'group'}))
+        self.assertEqual(len(b''.join(response.streaming_content)
+                             .splitlines()), 1)
+
+    def test_group_export_skips_inactive_authors(self):
+        """Посты скрытого (удаляемого) автора не попадают в выгрузку
+        группы."""
+        hidden = User.objects.create_user(username='hidden', is_active=False)
+        Post.objects.create(author=hidden, group=self.group, text='Скрыт')
+        response = self.client.get(
+            reverse('posts:group_export', kwargs={'slug': 'group'}))
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(content.splitlines()), 1)
+        self.assertNotIn('Скрыт', content)
+
+    def test_command_skips_hidden_posts(self):
+        """Команда выгружает те же посты, что и страницы выгрузки."""
+        hidden = User.objects.create_user(username='hidden', is_active=False)
+        Post.objects.create(author=hidden, group=self.group, text='Скрыт')
+        Post.objects.create(author=self.author, group=self.group,
+                            text='Удалён', deleted=True)
+        for option, value, count in (('--group', 'group', 1),
+                                     ('--author', 'author', 601)):
+            with self.subTest(option=option):
+                out = io.StringIO()
+                call_command('export_posts', option, value, stdout=out)
+                content = out.getvalue()
+                self.assertEqual(len(content.splitlines()), count)
+                self.assertNotIn('Скрыт', content)
+                self.assertNotIn('Удалён', content)
+
+    def test_unknown_format(self):
+        response = self.client.get(self.url, {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_output_imports_back(self):
+        """Выгрузка команды загружается обратно через import_posts."""
+        path = os.path.join(TEMP_MEDIA_ROOT, 'export.jsonl')
+        call_command('export_posts', '--group', 'group', '--output', path)
+        Post.objects.filter(group=self.group).delete()
+        stats = importing.Importer().run(importing.read_records(path))
+        self.assertEqual(stats['posts'], 1)
+        post = Post.objects.get(group=self.group)
+        self.assertEqual(post.image, self.post.image)
+        self.assertEqual(post.created, self.post.created)
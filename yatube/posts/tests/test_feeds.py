@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, GroupFollow, Post, User
+
+
+@override_settings(SELECT_LIMIT=4)
+class MergedFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        GroupFollow.objects.create(user=cls.reader, group=cls.group)
+        # Посты автора, чужие посты в группе, посты автора в группе
+        # (попадают в оба источника) и чужие посты вне подписок.
+        for i in range(12):
+            Post.objects.create(
+                author=(cls.author, cls.stranger)[i % 2],
+                group=cls.group if i % 3 else None,
+                text=f'Пост {i}')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def pages(self):
+        pages = []
+        url = reverse('posts:follow_index')
+        while url is not None:
+            page = self.client.get(url).context['page_obj']
+            pages.append([post.text for post in page])
+            url = page.next_cursor and (
+                reverse('posts:follow_index') + f'?after={page.next_cursor}')
+        return pages
+
+    def test_authors_and_groups_merged_once(self):
+        expected = [
+            f'Пост {i}' for i in reversed(range(12))
+            if i % 2 == 0 or i % 3]
+        pages = self.pages()
+        self.assertEqual([text for page in pages for text in page], expected)
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+
+    def test_query_count_flat_in_subscriptions(self):
+        """Число запросов страницы не растёт с числом подписок."""
+        url = reverse('posts:follow_index')
+        queries = self.client.get(url).wsgi_request.metrics.queries
+        for i in range(30):
+            author = User.objects.create_user(username=f'author{i}')
+            group = Group.objects.create(title=f'Группа {i}', slug=f'g{i}')
+            Follow.objects.create(user=self.reader, author=author)
+            GroupFollow.objects.create(user=self.reader, group=group)
+            Post.objects.create(author=author, group=group, text=f'Новый {i}')
+        response = self.client.get(url)
+        self.assertEqual(response.context['page_obj'][0].text, 'Новый 29')
+        self.assertEqual(response.wsgi_request.metrics.queries, queries)
+
+    def test_group_follow_and_unfollow(self):
+        GroupFollow.objects.all().delete()
+        url = reverse('posts:group_list', args=('group',))
+        self.assertContains(self.client.get(url), 'Подписаться на группу')
+        self.client.get(reverse('posts:group_follow', args=('group',)))
+        self.client.get(reverse('posts:group_follow', args=('group',)))
+        self.assertEqual(GroupFollow.objects.count(), 1)
+        self.assertContains(self.client.get(url), 'Отписаться от группы')
+        self.client.get(reverse('posts:group_unfollow', args=('group',)))
+        self.assertFalse(GroupFollow.objects.exists())
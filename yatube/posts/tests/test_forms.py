@@ -75,7 +75,7 @@ class PostFormTests(TestCase):
                 text='Новый пост',
                 author=self.user_auth,
                 group=self.group,
-                image=self.post.image,
+                image='posts/small.gif',
             ).exists()
         )
 
@@ -0,0 +1,106 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import importing
+from posts.models import Comment, Group, Post, User
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.temp_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='leo')
+        self.group = Group.objects.create(
+            title='Группа', slug='old-group', description='Описание')
+
+    def write_jsonl(self, records, name='posts.jsonl'):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def import_posts(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_jsonl_with_comments(self):
+        """Посты из JSONL импортируются с комментариями и датами."""
+        path = self.write_jsonl([
+            {'author': 'leo', 'text': 'Первый', 'group': 'old-group',
+             'created': '2020-01-02T03:04:05',
+             'comments': [{'author': 'leo', 'text': 'Комментарий'}]},
+            {'author': 'leo', 'text': 'Второй'},
+        ])
+        out, _ = self.import_posts(path, '--batch-size', '1')
+        self.assertIn('Импортировано: 2 постов, 1 комментариев', out)
+        post = Post.objects.get(text='Первый')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.created.year, 2020)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.post, post)
+        self.assertEqual(comment.created, post.created)
+
+    def test_csv_creates_users_and_groups(self):
+        """Из CSV создаются неизвестные авторы и группы."""
+        path = os.path.join(self.temp_dir, 'posts.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(
+                file, ['author', 'text', 'group', 'comments'])
+            writer.writeheader()
+            writer.writerow({
+                'author': 'newbie', 'text': 'Текст', 'group': 'new-group',
+                'comments': json.dumps([{'author': 'other', 'text': 'Да'}]),
+            })
+        self.import_posts(path, '--create-users')
+        post = Post.objects.get(text='Текст')
+        self.assertEqual(post.author.username, 'newbie')
+        self.assertEqual(post.group.slug, 'new-group')
+        self.assertEqual(post.comments.get().author.username, 'other')
+        self.assertFalse(post.author.has_usable_password())
+
+    def test_dry_run_reports_errors(self):
+        """Проверка без записи находит ошибки и ничего не сохраняет."""
+        path = self.write_jsonl([
+            {'author': 'leo', 'text': 'Хороший'},
+            {'author': 'ghost', 'text': 'Без автора'},
+            {'author': 'leo', 'text': ''},
+            {'author': 'leo', 'text': 'Дата', 'created': 'вчера'},
+        ])
+        out, err = self.import_posts(path, '--dry-run')
+        self.assertIn('Проверено: 1 постов', out)
+        self.assertIn('ошибок 3', out)
+        self.assertIn('Запись 2: Нет пользователя ghost', err)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_resume_from_checkpoint(self):
+        """Повторный запуск продолжает с контрольной точки."""
+        path = self.write_jsonl(
+            [{'author': 'leo', 'text': f'Пост {i}'} for i in range(5)],
+            name='resume.jsonl')
+        importing.save_checkpoint(f'{path}.checkpoint', 3)
+        out, _ = self.import_posts(path)
+        self.assertIn('Продолжение с записи 4', out)
+        self.assertEqual(
+            list(Post.objects.order_by('id').values_list('text', flat=True)),
+            ['Пост 3', 'Пост 4'])
+        self.assertEqual(importing.load_checkpoint(f'{path}.checkpoint'), 5)
+        self.import_posts(path)
+        self.assertEqual(Post.objects.count(), 2)
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import tasks
+from posts import inbox
+from posts.models import Notification, Post, User
+
+
+class InboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_follow_and_comment(self):
+        """Подписка и чужой комментарий попадают во входящие автора."""
+        self.reader_client.get(reverse(
+            'posts:profile_follow', args=(self.author.username,)))
+        self.reader_client.get(reverse(
+            'posts:profile_follow', args=(self.author.username,)))
+        for client in (self.reader_client, self.author_client):
+            client.post(reverse('posts:add_comment', args=(self.post.pk,)),
+                        {'text': 'Комментарий'})
+        self.assertEqual(
+            list(self.author.notifications.values_list('kind', 'actor')),
+            [(Notification.COMMENT, self.reader.pk),
+             (Notification.FOLLOW, self.reader.pk)])
+        self.assertEqual(inbox.unread_count(self.author.pk), 2)
+
+    def test_header_uses_cached_counter(self):
+        """Шапка берёт счётчик из кэша, без COUNT(*) на каждый запрос."""
+        inbox.notify([self.author.pk], Notification.FOLLOW, self.reader.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.author_client.get(reverse('posts:index'))
+        self.assertContains(response, 'bg-danger">1</span>')
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'posts_notification' in query['sql']])
+
+    def test_new_post_and_mark_read(self):
+        """Новый пост доходит до подписчиков; просмотр входящих
+        обнуляет счётчик."""
+        self.reader_client.get(reverse(
+            'posts:profile_follow', args=(self.author.username,)))
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Новый'})
+        tasks.run_pending()
+        self.assertEqual(inbox.unread_count(self.reader.pk), 1)
+        response = self.reader_client.get(reverse('posts:notifications'))
+        self.assertContains(response, 'опубликовал(а) новый пост')
+        self.assertEqual(inbox.unread_count(self.reader.pk), 0)
+        self.assertFalse(
+            self.reader.notifications.filter(read=False).exists())
@@ -0,0 +1,30 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TransactionTestCase, override_settings
+
+from posts import loadtest, seeding
+from posts.models import Comment
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class LoadTestTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_mixed_traffic_report(self):
+        """Нагрузочный тест проходит все сценарии без ошибок."""
+        seeding.seed(posts=100)
+        report = loadtest.run(threads=2, duration=2)
+        self.assertGreater(report['requests'], 0)
+        for name, result in report['urls'].items():
+            with self.subTest(name=name):
+                self.assertEqual(result['errors'], {})
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertIn('posts:add_comment', report['urls'])
+        self.assertGreater(Comment.objects.count(), 50)
@@ -0,0 +1,121 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import get_thumbnail
+
+from core.metrics import registry
+from posts import maintenance
+from posts.models import Comment, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_ARCHIVE_ROOT = tempfile.mkdtemp()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SweepTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_ARCHIVE_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Каждому тесту - пустая MEDIA_ROOT и кэш хранилища sorl-thumbnail.
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.kept = self.create_post('kept.gif')
+        self.deleted = self.create_post('deleted.gif')
+        self.kept_thumbnail, self.deleted_thumbnail = (
+            get_thumbnail(post.image, '960x339', crop='center')
+            for post in (self.kept, self.deleted))
+        Comment.objects.bulk_create(
+            Comment(author=self.author, post=post, text=f'{post.pk}-{i}')
+            for post in (self.kept, self.deleted) for i in range(3))
+        self.deleted.delete()
+
+    def create_post(self, name):
+        return Post.objects.create(
+            author=self.author, text=name,
+            image=SimpleUploadedFile(name, SMALL_GIF, 'image/gif'))
+
+    def media_exists(self, name):
+        return os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+
+    def test_comments_archived_in_batches(self):
+        """Комментарии без поста архивируются и удаляются пачками."""
+        result = maintenance.sweep_comments(
+            mode=maintenance.ARCHIVE, archive_dir=TEMP_ARCHIVE_ROOT,
+            batch_size=2)
+        self.assertEqual(result, {'scanned': 3, 'removed': 3})
+        self.assertFalse(Comment.objects.filter(post=None).exists())
+        self.assertEqual(Comment.objects.count(), 3)
+        [name] = os.listdir(TEMP_ARCHIVE_ROOT)
+        with open(os.path.join(TEMP_ARCHIVE_ROOT, name)) as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['author__username'], 'author')
+
+    def test_thumbnails_and_media(self):
+        """Удаляются миниатюры и файлы только удалённого поста."""
+        result = maintenance.sweep_thumbnails()
+        self.assertEqual(result['removed'], 1)
+        self.assertFalse(self.media_exists(self.deleted_thumbnail.name))
+        self.assertTrue(self.media_exists(self.kept_thumbnail.name))
+        self.assertEqual(maintenance.sweep_media()['removed'], 0)
+        result = maintenance.sweep_media(min_age=-60)
+        self.assertEqual(result, {'scanned': 2, 'removed': 1})
+        self.assertFalse(self.media_exists(self.deleted.image.name))
+        self.assertTrue(self.media_exists(self.kept.image.name))
+
+    def test_dry_run_command(self):
+        """С --dry-run команда только считает и не пишет метрики."""
+        before = registry.render()
+        out = StringIO()
+        call_command(
+            'sweep_orphans', '--dry-run', '--min-age-hours', '-1',
+            '--max-rate', '0', stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), [
+            'comments: проверено 3, найдено 3',
+            'thumbnails: проверено 2, найдено 1',
+            'media: проверено 2, найдено 1',
+        ])
+        self.assertEqual(Comment.objects.count(), 6)
+        self.assertTrue(self.media_exists(self.deleted.image.name))
+        self.assertEqual(registry.render(), before)
+
+    def test_command_emits_metrics(self):
+        """Команда считает очищенные объекты в метриках."""
+        call_command('sweep_orphans', '--max-rate', '0', stdout=StringIO())
+        self.assertIn(
+            'yatube_maintenance_removed_total'
+            '{action="purge",kind="comments"}',
+            registry.render())
+
+    def test_throttle(self):
+        """Скорость ограничивается паузами между пачками."""
+        throttle = maintenance.Throttle(rate=1000)
+        throttle.start -= 1
+        with mock.patch('posts.maintenance.time.sleep') as sleep:
+            throttle.wait(500)
+            throttle.wait(1000)
+        sleep.assert_called_once()
+        self.assertAlmostEqual(sleep.call_args[0][0], 0.5, places=1)
@@ -0,0 +1,68 @@
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import tasks
+from core.models import Job
+from posts import notifications
+from posts.models import Follow, NotificationSettings, Post, User
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class FollowerEmailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(
+                username=f'reader{i}', email=f'reader{i}@example.com')
+            for i in range(7)]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=cls.author) for user in cls.followers)
+        NotificationSettings.objects.create(
+            user=cls.followers[0],
+            email_frequency=NotificationSettings.DAILY)
+        User.objects.filter(pk=cls.followers[1].pk).update(email='')
+        User.objects.filter(pk=cls.followers[2].pk).update(is_active=False)
+        cls.post = Post.objects.create(author=cls.author, text='Новости')
+
+    def test_fan_out_in_batches(self):
+        """Рассылка раскладывается на пачки и учитывает настройки."""
+        notifications.notify_followers(self.post.pk, batch_size=3)
+        self.assertEqual(
+            Job.objects.filter(
+                name='posts.notifications.send_post_emails').count(), 3)
+        # Пачка - два запроса, сколько бы в ней ни было получателей.
+        ids = list(Follow.objects.order_by('id').values_list(
+            'id', flat=True)[3:6])
+        with self.assertNumQueries(2):
+            notifications.send_post_emails(self.post.pk, ids[0], ids[2])
+        self.assertEqual(len(mail.outbox), 3)
+        mail.outbox.clear()
+        tasks.run_pending()
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            [f'reader{i}@example.com' for i in range(3, 7)])
+        self.assertIn(
+            reverse('posts:post_detail', args=(self.post.pk,)),
+            mail.outbox[0].body)
+        self.assertIn('author', mail.outbox[0].subject)
+
+    def test_post_create_enqueues(self):
+        """Новый пост не рассылается в запросе, а ставится в очередь."""
+        client = Client()
+        client.force_login(self.author)
+        client.post(reverse('posts:post_create'), {'text': 'Ещё'})
+        self.assertEqual(mail.outbox, [])
+        tasks.run_pending()
+        self.assertEqual(len(mail.outbox), 4)
+
+    def test_settings_page(self):
+        client = Client()
+        client.force_login(self.followers[3])
+        client.post(reverse('posts:notification_settings'),
+                    {'email_frequency': NotificationSettings.OFF})
+        notifications.notify_followers(self.post.pk)
+        tasks.run_pending()
+        self.assertEqual(len(mail.outbox), 3)
@@ -0,0 +1,226 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.middleware import PageCacheMiddleware
+from core.page_cache import add_page_tags, get_page
+from core.personal import fill_holes, make_marker
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user('author')
+        cls.user_auth = User.objects.create_user('auth')
+        cls.group = Group.objects.create(title='Группа', slug='slug')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        cls.post = Post.objects.create(
+            author=cls.user_author, group=cls.group, text='Пост')
+        cls.post_detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk})
+        cls.group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug})
+        cls.profile_url = reverse(
+            'posts:profile', kwargs={'username': cls.user_author})
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_auth)
+
+    def test_anonymous_page_served_from_cache(self):
+        """Повторный запрос неавторизованного посетителя
+        не обращается к базе данных."""
+        for url in (self.post_detail_url, self.group_url, self.profile_url):
+            with self.subTest(url=url):
+                response_1 = self.client.get(url)
+                with self.assertNumQueries(0):
+                    response_2 = self.client.get(url)
+                self.assertEqual(response_1.content, response_2.content)
+
+    def test_cached_page_keeps_headers(self):
+        """Страница из кэша отдаётся с теми же заголовками, включая
+        выставленные middleware после кэша."""
+        for url in (self.post_detail_url, self.group_url, self.profile_url):
+            with self.subTest(url=url):
+                miss = self.client.get(url)
+                with self.assertNumQueries(0):
+                    hit = self.client.get(url)
+                self.assertEqual(hit['X-Frame-Options'], 'SAMEORIGIN')
+                # Server-Timing у каждого запроса свой.
+                headers = dict(miss.items())
+                headers.pop('Server-Timing')
+                for header, value in headers.items():
+                    self.assertEqual(hit[header], value)
+
+    def test_pages_cached_separately(self):
+        """Страницы паджинатора кэшируются отдельно."""
+        self.client.get(self.profile_url)
+        with self.assertNumQueries(0):
+            self.client.get(self.profile_url)
+        response = self.client.get(self.profile_url + '?page=2')
+        self.assertIsNotNone(response.context)
+
+    def test_authorized_user_bypasses_cache(self):
+        """Авторизованный пользователь не получает страницу из кэша."""
+        self.client.get(self.post_detail_url)
+        response = self.authorized_client.get(self.post_detail_url)
+        self.assertIsNotNone(response.context)
+        self.assertContains(response, 'Добавить комментарий')
+
+    def test_comment_purges_post_page(self):
+        """Новый комментарий сбрасывает кэш страницы поста."""
+        self.client.get(self.post_detail_url)
+        Comment.objects.create(
+            author=self.user_auth, post=self.post, text='Комментарий')
+        response = self.client.get(self.post_detail_url)
+        self.assertContains(response, 'Комментарий')
+
+    def test_post_edit_purges_only_affected_pages(self):
+        """Изменение поста сбрасывает только страницы с этим постом."""
+        other_group_url = reverse(
+            'posts:group_list', kwargs={'slug': self.other_group.slug})
+        self.client.get(self.group_url)
+        self.client.get(other_group_url)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        with self.assertNumQueries(0):
+            self.client.get(other_group_url)
+        response = self.client.get(self.group_url)
+        self.assertContains(response, 'Новый текст')
+
+    def test_follow_purges_author_profile(self):
+        """Подписка на автора сбрасывает кэш его профайла."""
+        self.client.get(self.profile_url)
+        Follow.objects.create(user=self.user_auth, author=self.user_author)
+        response = self.client.get(self.profile_url)
+        self.assertIsNotNone(response.context)
+
+    def test_page_with_csrf_token_not_cached(self):
+        """Страница с CSRF-токеном не попадает в кэш."""
+        def view(request):
+            add_page_tags(request, 'index')
+            return HttpResponse(get_token(request))
+
+        middleware = PageCacheMiddleware(view)
+        request = RequestFactory().get(reverse('posts:index'))
+        request.user = AnonymousUser()
+        middleware(request)
+        self.assertIsNone(get_page(request))
+
+
+@override_settings(PAGE_CACHE_AUTHENTICATED=True)
+class PersonalHolesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user('author')
+        cls.user_auth = User.objects.create_user('auth')
+        cls.post = Post.objects.create(author=cls.user_author, text='Пост')
+        cls.post_detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk})
+        cls.profile_url = reverse(
+            'posts:profile', kwargs={'username': cls.user_author})
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_auth)
+
+    def test_cached_page_personalized_for_each_user(self):
+        """Страница из общего кэша получает персональную шапку и форму
+        комментария."""
+        response = self.client.get(self.post_detail_url)
+        self.assertContains(response, 'Войти')
+        self.assertNotContains(response, 'Добавить комментарий')
+        response = self.authorized_client.get(self.post_detail_url)
+        self.assertTemplateNotUsed(response, 'posts/post_detail.html')
+        self.assertContains(response, 'Пользователь: auth')
+        self.assertContains(response, 'Добавить комментарий')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertNotContains(response, '<!--personal:')
+
+    def test_follow_button_rendered_per_user(self):
+        """Кнопка подписки в профайле зависит от пользователя."""
+        Follow.objects.create(user=self.user_auth, author=self.user_author)
+        self.client.get(self.profile_url)
+        response = self.authorized_client.get(self.profile_url)
+        self.assertTemplateNotUsed(response, 'posts/profile.html')
+        self.assertContains(response, 'Отписаться')
+
+    def test_fill_holes_keeps_shared_content(self):
+        """Метка заменяется фрагментом, остальная страница не меняется."""
+        request = RequestFactory().get('/')
+        request.user = self.user_author
+        content = 'до ' + make_marker(
+            'posts/includes/follow_button.html', username='auth') + ' после'
+        filled = fill_holes(request, content)
+        self.assertTrue(filled.startswith('до '))
+        self.assertTrue(filled.endswith(' после'))
+        self.assertIn('Подписаться', filled)
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user('author')
+        cls.group = Group.objects.create(title='Группа', slug='slug')
+        cls.post = Post.objects.create(
+            author=cls.user_author, group=cls.group, text='Пост')
+        cls.group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug})
+        cls.profile_url = reverse(
+            'posts:profile', kwargs={'username': cls.user_author})
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_author)
+
+    def test_card_reused_across_pages(self):
+        """Карточка поста, отрисованная на странице группы,
+        берётся из кэша на странице профайла."""
+        self.authorized_client.get(self.group_url)
+        # update() не меняет дату изменения, ключ карточки прежний.
+        Post.objects.filter(pk=self.post.pk).update(text='Скрытый текст')
+        response = self.authorized_client.get(self.profile_url)
+        self.assertContains(response, 'Пост')
+        self.assertNotContains(response, 'Скрытый текст')
+
+    def test_edited_post_card_rerendered(self):
+        """После редактирования поста карточка отрисовывается заново."""
+        self.authorized_client.get(self.group_url)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        response = self.authorized_client.get(self.group_url)
+        self.assertContains(response, 'Новый текст')
+
+    def test_card_rerendered_after_group_rename_and_delete(self):
+        """Переименование и удаление группы меняют ключ карточки."""
+        self.authorized_client.get(self.profile_url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        response = self.authorized_client.get(self.profile_url)
+        self.assertContains(response, '/group/renamed/')
+        group.delete()
+        response = self.authorized_client.get(self.profile_url)
+        self.assertNotContains(response, 'все записи группы')
+
+    def test_card_rerendered_after_author_rename(self):
+        self.authorized_client.get(self.group_url)
+        author = User.objects.get(pk=self.user_author.pk)
+        author.first_name = 'Новое'
+        author.last_name = 'Имя'
+        author.save()
+        self.assertContains(
+            self.authorized_client.get(self.group_url), 'Новое Имя')
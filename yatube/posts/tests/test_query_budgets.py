@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryBudgetTests(TestCase):
+    """Лимиты SQL-запросов для view на заполненной базе.
+
+    Число запросов берётся из request.metrics, которое заполняет
+    core.middleware.RequestMetricsMiddleware.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create_user(f'author{i}') for i in range(5)]
+        cls.user_auth = User.objects.create_user('auth')
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'slug{i}')
+            for i in range(3)]
+        Post.objects.bulk_create(
+            Post(author=cls.authors[i % 5], group=cls.groups[i % 3],
+                 text=f'Пост {i}')
+            for i in range(60))
+        cls.post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(author=cls.authors[i % 5], post=cls.post,
+                    text=f'Комментарий {i}')
+            for i in range(20))
+        Follow.objects.bulk_create(
+            Follow(user=cls.user_auth, author=author)
+            for author in cls.authors[:3])
+        # Два запроса в каждом лимите - сессия и пользователь; в профиле
+        # и ленте подписок ещё один - рекомендации "кого почитать",
+        # в группе - кнопка подписки на неё.
+        cls.budgets = {
+            reverse('posts:index'): 4,
+            reverse('posts:group_list',
+                    kwargs={'slug': cls.groups[0].slug}): 6,
+            reverse('posts:profile',
+                    kwargs={'username': cls.authors[0].username}): 9,
+            reverse('posts:post_detail',
+                    kwargs={'post_id': cls.post.pk}): 6,
+            reverse('posts:follow_index'): 5,
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_auth)
+
+    def test_views_fit_query_budget(self):
+        """Страницы укладываются в лимит запросов к базе."""
+        for url, budget in self.budgets.items():
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                queries = response.wsgi_request.metrics.queries
+                self.assertLessEqual(queries, budget)
+
+    def test_server_timing_header(self):
+        """Ответ содержит заголовок Server-Timing."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
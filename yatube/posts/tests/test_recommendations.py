@@ -0,0 +1,84 @@
+import random
+from collections import Counter
+
+import numpy as np
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import recommendations
+from posts.models import Follow, Recommendation, User
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('alice', 'bob', 'carol', 'dave', 'eve', 'newbie')}
+        for user, author in (
+            ('alice', 'bob'), ('alice', 'carol'), ('bob', 'dave'),
+            ('carol', 'dave'), ('eve', 'bob'), ('eve', 'dave'),
+        ):
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author])
+
+    def setUp(self):
+        cache.clear()
+        recommendations.update_recommendations()
+
+    def suggested(self, name):
+        return [
+            suggestion.author.username for suggestion in
+            recommendations.for_user(self.users[name])]
+
+    def test_friends_of_friends_first(self):
+        """dave читают оба автора alice; свои подписки не предлагаются."""
+        self.assertEqual(self.suggested('alice')[0], 'dave')
+        self.assertNotIn('bob', self.suggested('alice'))
+        self.assertNotIn('alice', self.suggested('alice'))
+
+    def test_newcomers_get_popular_authors(self):
+        self.assertEqual(self.suggested('newbie')[:2], ['dave', 'bob'])
+        self.assertFalse(
+            Recommendation.objects.filter(user=self.users['newbie']).exists())
+
+    def test_shown_on_pages_and_forgotten_after_follow(self):
+        client = Client()
+        client.force_login(self.users['alice'])
+        for url in (reverse('posts:follow_index'),
+                    reverse('posts:profile', args=('bob',))):
+            with self.subTest(url=url):
+                self.assertContains(
+                    client.get(url), reverse('posts:profile', args=('dave',)))
+        client.get(reverse('posts:profile_follow', args=('dave',)))
+        self.assertNotIn('dave', self.suggested('alice'))
+
+    def test_friends_of_friends_match_loops(self):
+        """Векторный подсчёт друзей друзей совпадает с прямым перебором."""
+        generator = random.Random(1)
+        pairs = {
+            (generator.randrange(40), generator.randrange(40))
+            for _ in range(300)}
+        pairs = np.array([pair for pair in pairs if pair[0] != pair[1]])
+        graph = recommendations.Graph(pairs[:, 0], pairs[:, 1])
+        empty = (np.zeros(graph.size + 1, dtype=np.int64),
+                 np.zeros(0, dtype=np.int64), np.zeros(0))
+        following = {}
+        for user, author in pairs.tolist():
+            following.setdefault(user, set()).add(author)
+        users, authors, scores = graph.recommend(np.arange(graph.size), empty)
+        result = {}
+        for user, author, score in zip(
+                graph.ids[users].tolist(), graph.ids[authors].tolist(),
+                scores.tolist()):
+            result.setdefault(user, {})[author] = score
+        for user, authors in following.items():
+            expected = Counter(
+                other for author in authors
+                for other in following.get(author, ())
+                if other != user and other not in authors)
+            top = sorted(expected.values(), reverse=True)[
+                :recommendations.TOP_K]
+            self.assertEqual(
+                sorted(result.get(user, {}).values(), reverse=True), top)
@@ -0,0 +1,61 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase
+
+from posts import seeding
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class SeedingTests(TestCase):
+    def test_seed_is_reproducible(self):
+        """Данные с одним seed совпадают."""
+        seeding.seed(posts=200, seed=1)
+        first = list(Post.objects.order_by('id').values_list(
+            'author__username', 'group__slug', 'text'))
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        seeding.seed(posts=200, seed=1)
+        second = list(Post.objects.order_by('id').values_list(
+            'author__username', 'group__slug', 'text'))
+        self.assertEqual(first, second)
+
+    def test_small_batches(self):
+        """Размер пачки не влияет на объём данных."""
+        seeding.seed(
+            posts=250, users=30, groups=4, comments_per_post=1,
+            batch_size=40)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertEqual(Post.objects.count(), 250)
+        self.assertEqual(Comment.objects.count(), 250)
+
+    def test_timestamps_follow_ids(self):
+        """Даты постов распределены по периоду и растут вместе с id."""
+        seeding.seed(posts=100, days=30)
+        dates = list(Post.objects.order_by('id').values_list(
+            'created', flat=True))
+        self.assertEqual(dates, sorted(dates))
+        self.assertGreater(dates[-1] - dates[0], (dates[1] - dates[0]) * 90)
+        self.assertEqual(
+            Post.objects.exclude(updated__in=dates).count(), 0)
+
+    def test_followers_follow_power_law(self):
+        """Несколько авторов собирают большую часть подписчиков."""
+        seeding.seed(posts=2000, users=200, follows_per_user=10)
+        counts = sorted(
+            (author.following.count() for author in User.objects.all()),
+            reverse=True)
+        self.assertGreater(sum(counts[:20]), sum(counts) / 2)
+        self.assertFalse(
+            Follow.objects.filter(user_id=F('author_id')).exists())
+
+    def test_command(self):
+        """Команда выводит итоги и не повторяет тот же seed."""
+        out = StringIO()
+        call_command('seed_yatube', posts=100, seed=3, stdout=out)
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertIn('Post       100', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('seed_yatube', posts=100, seed=3, stdout=out)
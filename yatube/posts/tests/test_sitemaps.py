@@ -0,0 +1,123 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import sitemaps
+from posts.models import Group, Post, User
+
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    SITEMAP_ROOT=TEMP_SITEMAP_ROOT, SITEMAP_CHUNK_SIZE=10,
+    SITE_URL='http://testserver')
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост {i}') for i in range(25))
+        cls.posts = list(Post.objects.order_by('id'))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+
+    def read(self, name):
+        with gzip.open(os.path.join(TEMP_SITEMAP_ROOT, name), 'rt') as file:
+            return file.read()
+
+    def post_chunk(self, post):
+        return (post.pk - 1) // 10
+
+    def test_generate_chunks(self):
+        """Посты делятся на файлы по диапазонам id."""
+        stats = sitemaps.generate()
+        chunks = {self.post_chunk(post) for post in self.posts}
+        self.assertEqual(stats['written'], len(chunks) + 2)
+        content = ''.join(
+            self.read(f'sitemap-posts-{chunk}.xml.gz') for chunk in chunks)
+        for post in self.posts:
+            self.assertIn(
+                f'<loc>http://testserver/posts/{post.pk}/</loc>', content)
+        self.assertIn(
+            'http://testserver/profile/author/',
+            self.read(sitemaps.filename(
+                sitemaps.SECTIONS['profiles'],
+                (self.author.pk - 1) // 10)))
+        with open(os.path.join(TEMP_SITEMAP_ROOT, 'sitemap.xml')) as file:
+            index = file.read()
+        self.assertEqual(index.count('<sitemap>'), stats['written'])
+
+    def test_regenerates_only_touched_chunks(self):
+        """Повторный запуск пишет только изменившиеся файлы."""
+        sitemaps.generate()
+        self.assertEqual(sitemaps.generate()['written'], 0)
+        post = self.posts[-1]
+        post.text = 'Изменён'
+        post.save()
+        stats = sitemaps.generate()
+        self.assertEqual(stats['written'], 1)
+        first = self.posts[0]
+        first_chunk = f'sitemap-posts-{self.post_chunk(first)}.xml.gz'
+        Post.objects.filter(
+            id__lte=(self.post_chunk(first) + 1) * 10).delete()
+        stats = sitemaps.generate()
+        self.assertEqual((stats['written'], stats['removed']), (0, 1))
+        self.assertFalse(
+            os.path.exists(os.path.join(TEMP_SITEMAP_ROOT, first_chunk)))
+
+    def test_rename_regenerates_chunk(self):
+        """Переименование группы или пользователя пересобирает файл
+        раздела без lastmod."""
+        sitemaps.generate()
+        Group.objects.filter(pk=self.group.pk).update(slug='renamed')
+        User.objects.filter(pk=self.author.pk).update(username='writer')
+        self.assertEqual(sitemaps.generate()['written'], 2)
+        self.assertIn(
+            'http://testserver/group/renamed/',
+            self.read(sitemaps.filename(
+                sitemaps.SECTIONS['groups'], (self.group.pk - 1) // 10)))
+
+    def test_command(self):
+        """Команда пишет файлы и с --force пересобирает все."""
+        out = StringIO()
+        call_command('generate_sitemaps', stdout=out)
+        self.assertIn('без изменений 0', out.getvalue())
+        files = len([
+            name for name in os.listdir(TEMP_SITEMAP_ROOT)
+            if name.endswith('.xml.gz')])
+        call_command('generate_sitemaps', '--force', stdout=out)
+        self.assertIn(f'Записано {files}, без изменений 0', out.getvalue())
+
+    def test_dynamic_views(self):
+        """Индекс и файлы раздела отдаются и без сборки командой."""
+        client = Client()
+        response = client.get(reverse('posts:sitemap_index'))
+        index = b''.join(response.streaming_content).decode()
+        url = reverse('posts:sitemap_section',
+                      kwargs={'section': 'posts', 'chunk': 0})
+        self.assertIn(f'http://testserver{url}', index)
+        post = self.posts[0]
+        response = client.get(reverse(
+            'posts:sitemap_section',
+            kwargs={'section': 'posts', 'chunk': self.post_chunk(post)}))
+        self.assertIn(
+            f'/posts/{post.pk}/',
+            b''.join(response.streaming_content).decode())
+        response = client.get(reverse(
+            'posts:sitemap_section',
+            kwargs={'section': 'posts', 'chunk': 1000}))
+        self.assertEqual(response.status_code, 404)
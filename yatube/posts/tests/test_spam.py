@@ -0,0 +1,105 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import spam
+from posts.management.commands.train_spam import unlabelled_ham
+from posts.models import Comment, Post, SpamLabel, User
+
+SPAM = [
+    f'Скидка {n} процентов на курсы, переходите по ссылке в профиле'
+    for n in range(10, 60)
+] + [
+    f'Заработок {n} тысяч в день без вложений, пишите в личку'
+    for n in range(10, 60)
+]
+HAM = [
+    f'Сегодня гулял в парке номер {n}, погода отличная и листья жёлтые'
+    for n in range(100)
+] + [
+    f'Дочитал главу {n}, автор хорошо описывает героев и их споры'
+    for n in range(100)
+]
+
+
+class SpamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.user, text='Первый пост')
+        SpamLabel.objects.bulk_create(
+            SpamLabel(kind=SpamLabel.COMMENT, text=text, spam=True)
+            for text in SPAM)
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=text) for text in HAM)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'spam.npy')
+        self.settings = override_settings(SPAM_MODEL_PATH=self.path)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def train(self):
+        out = StringIO()
+        call_command('train_spam', bits=12, test_percent=0, stdout=out)
+        return out.getvalue()
+
+    def test_train_and_score(self):
+        self.assertIn('из них спам 100', self.train())
+        model = spam.get_model()
+        self.assertEqual(model.bits, 12)
+        self.assertGreater(
+            model.score('Скидка 99 процентов, переходите по ссылке'), 0.9)
+        self.assertLess(
+            model.score('Гулял в парке, листья жёлтые и погода хорошая'),
+            0.1)
+
+    def test_comments_are_flagged_not_rejected(self):
+        url = reverse('posts:add_comment', args=(self.post.pk,))
+        self.client.post(url, {'text': 'Заработок 99 тысяч без вложений'})
+        self.assertFalse(Comment.objects.get().flagged)
+        self.train()
+        self.client.post(url, {'text': 'Заработок 77 тысяч, пишите в личку'})
+        self.client.post(url, {'text': 'Хорошо описывает героев'})
+        self.assertEqual(
+            list(Comment.objects.order_by('id').values_list(
+                'flagged', flat=True)),
+            [False, True, False])
+
+    def test_admin_actions_label_texts(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        comment = Comment.objects.create(
+            author=self.user, post=self.post, text='Пишите в личку')
+        self.client.post(reverse('admin:posts_comment_changelist'), {
+            'action': 'mark_spam', '_selected_action': [comment.pk]})
+        self.assertFalse(Comment.objects.exists())
+        self.assertTrue(SpamLabel.objects.filter(
+            text='Пишите в личку', spam=True).exists())
+
+    def test_spam_post_hidden_and_excluded_from_ham(self):
+        """Пост, отмеченный как спам, скрыт сразу и не попадает
+        в обычные тексты, пока ждёт удаления."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        post = Post.objects.create(author=self.user, text='Пишите в личку')
+        self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'mark_spam', '_selected_action': [post.pk]})
+        post.refresh_from_db()
+        self.assertTrue(post.flagged and post.deleted)
+        # Размеченный текст без отметки на самой строке тоже исключается.
+        Post.objects.create(author=self.user, text=SPAM[0])
+        posts, _ = unlabelled_ham()
+        self.assertFalse(posts.filter(
+            text__in=('Пишите в личку', SPAM[0])).exists())
+        self.assertEqual(posts.count(), len(HAM) + 1)
@@ -1,22 +1,43 @@
 from django.urls import path
 from . import views
+from .models import Block
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/follow/', views.group_follow,
+         name='group_follow'),
+    path('group/<slug:slug>/unfollow/', views.group_unfollow,
+         name='group_unfollow'),
     # Профайл пользователя
     path('profile/<str:username>/', views.profile, name='profile'),
     # Просмотр записи
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<post_id>/edit/', views.post_edit, name='post_edit'),
+    path('group/<slug:slug>/export/',
+         views.group_export, name='group_export'),
+    path('profile/<str:username>/export/',
+         views.profile_export, name='profile_export'),
     path('posts/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
+    path('sitemap.xml', views.sitemap_index, name='sitemap_index'),
+    path('sitemap-<slug:section>-<int:chunk>.xml',
+         views.sitemap_section, name='sitemap_section'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('notifications/', views.notifications, name='notifications'),
+    path('follow/settings/', views.notification_settings,
+         name='notification_settings'),
     path('profile/<str:username>/follow/',
          views.profile_follow, name='profile_follow'),
     path('profile/<str:username>/unfollow/',
          views.profile_unfollow, name='profile_unfollow'),
+    path('profile/<str:username>/block/',
+         views.profile_block, name='profile_block'),
+    path('profile/<str:username>/mute/',
+         views.profile_block, {'kind': Block.MUTE}, name='profile_mute'),
+    path('profile/<str:username>/unblock/',
+         views.profile_unblock, name='profile_unblock'),
 ]
@@ -1,10 +1,24 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import (
+    Http404, HttpResponseBadRequest, StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 
-from .models import Follow, Group, Post, User
-from .forms import PostForm, CommentForm
+from core.page_cache import add_page_tags
+from core.ratelimit import ratelimit
+from . import blocking, feeds, inbox, sitemaps, spam
+from .exporting import (
+    FORMATS, export_chunks, posts_of_author, posts_of_group
+)
+from .models import (
+    Block, Follow, Group, GroupFollow, Notification, NotificationSettings,
+    Post, User
+)
+from .forms import CommentForm, NotificationSettingsForm, PostForm
+from .notifications import notify_followers
 
 
 def paginator(request, posts):
@@ -14,11 +28,28 @@ def paginator(request, posts):
     return page_obj
 
 
+def feed_page(request, posts, limit=None):
+    """Страница ленты без авторов, которых зритель скрыл.
+
+    Пока скрытых нет - обычная постраничная навигация, иначе -
+    курсорная с фильтром в памяти. limit в обоих случаях ограничивает
+    ленту последними limit постами.
+    """
+    if request.user.is_authenticated:
+        hidden = blocking.hidden_authors(request.user.pk)
+        if hidden:
+            return feeds.cursor_page(request, posts, hidden, limit=limit)
+    return paginator(request, posts[:limit] if limit else posts)
+
+
 def index(request):
     title = 'Последние обновления на сайте'
     text = 'Последние обновления на сайте'
-    posts = Post.objects.select_related('author', 'group')[:10]
-    page_obj = paginator(request, posts)
+    posts = Post.objects.select_related('author', 'group').filter(
+        author__is_active=True, deleted=False)
+    page_obj = feed_page(request, posts, limit=10)
+    posts = posts[:10]
+    add_page_tags(request, 'index', posts=page_obj)
     context = {
         'title': title,
         'text': text,
@@ -33,8 +64,11 @@ def group_posts(request, slug):
     title = f'Записи сообщества {group.title}'
     text = f'{group.title}'
     text_group = f'{group.description}'
-    posts = group.posts.select_related('author')[:10]
-    page_obj = paginator(request, posts)
+    posts = group.posts.select_related('author').filter(
+        author__is_active=True, deleted=False)
+    page_obj = feed_page(request, posts, limit=10)
+    posts = posts[:10]
+    add_page_tags(request, f'group:{group.pk}', posts=page_obj)
     context = {
         'group': group,
         'title': title,
@@ -47,32 +81,33 @@ def group_posts(request, slug):
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(User, username=username, is_active=True)
     title = f'Профайл пользователя: {author.get_full_name()}'
-    posts = author.posts.select_related('group')
+    posts = author.posts.select_related('group').filter(deleted=False)
     posts_count = posts.count()
     page_obj = paginator(request, posts)
-    following = (request.user.is_authenticated) and (
-        request.user != author) and Follow.objects.filter(
-        user=request.user, author=author).exists()
+    add_page_tags(request, f'author:{author.pk}', posts=page_obj)
     context = {
         'author': author,
         'title': title,
         'posts': posts,
         'posts_count': posts_count,
         'page_obj': page_obj,
-        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'),
+        id=post_id, author__is_active=True, deleted=False)
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = post.comments.select_related('author')
     posts = Post.objects.select_related('author')
     posts_count = posts.count()
     page_obj = paginator(request, posts)
+    # Счётчик постов считается по всем постам, поэтому и тег 'index'.
+    add_page_tags(request, 'index', posts=[post])
     context = {
         'post': post,
         'posts_count': posts_count,
@@ -86,11 +121,15 @@ def post_detail(request, post_id):
 @login_required
 def post_create(request):
     # передаем POST если он есть, иначе None
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None,
+                    files=request.FILES or None, author=request.user)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
+        post.flagged = spam.flag(post)
         post.save()
+        # Письма подписчикам рассылает исполнитель run_tasks.
+        notify_followers.delay(post.pk)
         return redirect('posts:profile', post.author)
     context = {
         'form': form,
@@ -100,7 +139,7 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post, id=post_id, deleted=False)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id)
     form = PostForm(request.POST or None,
@@ -115,20 +154,35 @@ def post_edit(request, post_id):
 @login_required
 def add_comment(request, post_id):
     # Получаем пост и сохраняем его в переменную post.
-    post = get_object_or_404(Post, id=post_id)
-    form = CommentForm(request.POST or None)
+    post = get_object_or_404(
+        Post, id=post_id, author__is_active=True, deleted=False)
+    form = CommentForm(request.POST or None, author=request.user)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        comment.flagged = spam.flag(comment)
         comment.save()
+        if post.author_id != request.user.pk and (
+                request.user.pk not in blocking.blocked_authors(
+                    post.author_id)):
+            inbox.notify(
+                [post.author_id], Notification.COMMENT, request.user.pk,
+                post.pk)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginator(request, post)
+    posts = Post.objects.filter(
+        author__is_active=True, deleted=False,
+    ).select_related('author', 'group')
+    # Авторы и группы - отдельные источники, слитые по (created, id):
+    # в SQL нет ни OR по двум соединениям, ни DISTINCT.
+    page_obj = feeds.merged_page(request, [
+        posts.filter(author__following__user=request.user),
+        posts.filter(group__followers__user=request.user),
+    ], blocking.hidden_authors(request.user.pk))
     context = {'page_obj': page_obj}
     return render(request, 'posts/follow.html', context)
 
@@ -136,8 +190,13 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+    if request.user != author and (
+            request.user.pk not in blocking.blocked_authors(author.pk)):
+        _, created = Follow.objects.get_or_create(
+            user=request.user, author=author)
+        if created:
+            inbox.notify(
+                [author.pk], Notification.FOLLOW, request.user.pk)
     return redirect('posts:profile', username=author.username)
 
 
@@ -146,3 +205,109 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=author.username)
+
+
+@login_required
+def group_follow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    GroupFollow.objects.get_or_create(user=request.user, group=group)
+    return redirect('posts:group_list', slug=slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    GroupFollow.objects.filter(user=request.user, group__slug=slug).delete()
+    return redirect('posts:group_list', slug=slug)
+
+
+@login_required
+def profile_block(request, username, kind=Block.BLOCK):
+    author = get_object_or_404(User, username=username)
+    if request.user != author:
+        blocking.block(request.user, author, kind)
+    return redirect('posts:profile', username=author.username)
+
+
+@login_required
+def profile_unblock(request, username):
+    author = get_object_or_404(User, username=username)
+    blocking.unblock(request.user, author)
+    return redirect('posts:profile', username=author.username)
+
+
+@login_required
+def notifications(request):
+    page_obj = paginator(
+        request,
+        Notification.objects.filter(user=request.user).select_related(
+            'actor', 'post'))
+    # Страница читается до отметки: новые уведомления выделяются.
+    page_obj.object_list = list(page_obj.object_list)
+    inbox.mark_read(request.user.pk)
+    return render(request, 'posts/notifications.html',
+                  {'page_obj': page_obj})
+
+
+@login_required
+def notification_settings(request):
+    instance, _ = NotificationSettings.objects.get_or_create(
+        user=request.user)
+    form = NotificationSettingsForm(request.POST or None, instance=instance)
+    if form.is_valid():
+        form.save()
+        return redirect('posts:follow_index')
+    return render(request, 'posts/notification_settings.html',
+                  {'form': form})
+
+
+def export_response(request, posts, name):
+    # Выгрузка отдаётся частями по мере чтения из базы.
+    format = request.GET.get('format', 'jsonl')
+    if format not in FORMATS:
+        return HttpResponseBadRequest(
+            f'Формат выгрузки: {", ".join(FORMATS)}')
+    response = StreamingHttpResponse(
+        export_chunks(posts, format), content_type=FORMATS[format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}-posts.{format}"')
+    return response
+
+
+@login_required
+@ratelimit('20/h', key='user', methods=('GET',))
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        return redirect('posts:profile', username=author.username)
+    return export_response(
+        request, posts_of_author(author.username), author.username)
+
+
+@login_required
+@ratelimit('20/h', key='user', methods=('GET',))
+def group_export(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return export_response(request, posts_of_group(group.slug), group.slug)
+
+
+def sitemap_index(request):
+    # Индекс без отпечатков: число файлов раздела берётся по max(id).
+    entries = (
+        (request.build_absolute_uri(reverse(
+            'posts:sitemap_section',
+            kwargs={'section': name, 'chunk': chunk})), None)
+        for name, section in sitemaps.SECTIONS.items()
+        for chunk in range(section.chunk_count())
+    )
+    return StreamingHttpResponse(
+        sitemaps.sitemap_index(entries), content_type='application/xml')
+
+
+def sitemap_section(request, section, chunk):
+    section = sitemaps.SECTIONS.get(section)
+    if section is None or chunk >= section.chunk_count():
+        raise Http404
+    base_url = request.build_absolute_uri('/').rstrip('/')
+    return StreamingHttpResponse(
+        sitemaps.urlset(section, chunk, base_url),
+        content_type='application/xml')
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -50,11 +51,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.RateLimitMiddleware',
+    'core.middleware.ProfilerMiddleware',
+    'core.middleware.PersonalMiddleware',
+    'core.middleware.PageCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -142,6 +148,8 @@ LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # директория, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# адрес отправителя писем-уведомлений
+DEFAULT_FROM_EMAIL = 'Yatube <noreply@yatube.local>'
 
 SELECT_LIMIT = 8
 
@@ -149,6 +157,82 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',
     }
 }
+
+# время жизни страниц в кэше, в секундах
+PAGE_CACHE_TIMEOUT = 60 * 15
+# отдавать ли страницы из кэша авторизованным пользователям;
+# персональные части страниц заполняет core.middleware.PersonalMiddleware
+PAGE_CACHE_AUTHENTICATED = False
+# функция user -> bool: True, если общие страницы этому пользователю
+# не подходят - ленты без скрытых им авторов собираются для него заново
+PAGE_CACHE_SKIP_USER = 'posts.blocking.has_hidden_authors'
+
+# директория, через которую процессы сервера делятся метриками для /metrics
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'yatube_metrics')
+# как часто процесс сбрасывает свои метрики в METRICS_DIR, в секундах
+METRICS_FLUSH_INTERVAL = 1
+# кому отдаётся /metrics, кроме сотрудников: адреса REMOTE_ADDR
+# (заголовки прокси не учитываются) и токен из заголовка
+# Authorization: Bearer <токен>; None отключает доступ по токену
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+METRICS_TOKEN = None
+# запросы дольше порога пишутся в лог yatube.slow_queries с планом запроса;
+# None отключает журнал, статистика по формам SQL собирается всегда
+SLOW_QUERY_THRESHOLD_MS = 100
+
+# директория для дампов cProfile из core.middleware.ProfilerMiddleware
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), 'yatube_profiles')
+# профилировать каждый N-й запрос процесса; 0 - только по запросу сотрудника
+PROFILE_SAMPLE_RATE = 0
+
+THUMBNAIL_BACKEND = 'core.thumbnail.TimedThumbnailBackend'
+
+# адрес сайта для абсолютных ссылок в sitemap, собранных командой
+SITE_URL = 'http://localhost:8000'
+# директория для готовых sitemap из команды generate_sitemaps;
+# веб-сервер отдаёт /sitemap*.xml(.gz) из неё
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+# число ссылок в одном файле sitemap, не больше 50000 по протоколу
+SITEMAP_CHUNK_SIZE = 50000
+
+# директория для архива, который пишет команда sweep_orphans --*=archive;
+# в отличие от MEDIA_ROOT, не раздаётся веб-сервером
+ARCHIVE_ROOT = os.path.join(BASE_DIR, 'archive')
+
+# выполнять задачи core.tasks сразу при .delay(), без исполнителя run_tasks
+TASKS_EAGER = False
+# сколько дней хранить выполненные и упавшие задачи; старые удаляет
+# исполнитель run_tasks раз в TASKS_PURGE_INTERVAL секунд
+TASKS_DONE_RETENTION_DAYS = 7
+TASKS_FAILED_RETENTION_DAYS = 30
+TASKS_PURGE_INTERVAL = 60 * 60
+
+# лимиты частоты запросов для core.middleware.RateLimitMiddleware:
+# имя URL -> rate ('число/s|m|h|d'), key ('user_or_ip', 'user', 'ip')
+# и methods (по умолчанию только POST)
+RATE_LIMITS = {
+    'posts:post_create': {'rate': '10/m'},
+    'posts:add_comment': {'rate': '30/m'},
+    'posts:profile_follow': {'rate': '60/m', 'methods': ('GET', 'POST')},
+    'users:signup': {'rate': '5/h', 'key': 'ip'},
+}
+# False отключает все лимиты, например для нагрузочных тестов
+RATE_LIMIT_ENABLED = True
+# заголовок с адресом клиента за прокси, например 'HTTP_X_FORWARDED_FOR';
+# None - адрес соединения REMOTE_ADDR
+RATE_LIMIT_IP_HEADER = None
+
+# PostForm и CommentForm отклоняют текст, похожий на текст того же автора
+# за последние DUPLICATE_WINDOW_DAYS дней; похожесть - оценка MinHash доли
+# общих фрагментов по Жаккару
+DUPLICATE_SIMILARITY = 0.6
+DUPLICATE_WINDOW_DAYS = 30
+
+# Модель классификатора спама, её обучает команда train_spam; пока файла
+# нет, посты и комментарии не проверяются. Текст с вероятностью спама
+# не ниже SPAM_THRESHOLD помечается для модераторов (Post.flagged)
+SPAM_MODEL_PATH = os.path.join(BASE_DIR, 'spam_model.npy')
+SPAM_THRESHOLD = 0.9